@@ -0,0 +1,82 @@
+from typing import Any, Dict, List
+import json
+import os
+
+import numpy as np
+
+# Snapshots are .npz archives: every array of the state is stored as its
+# own .npy member and everything else as a JSON header, so loading never
+# unpickles and does not depend on the layout of the classes.
+SNAPSHOT_FORMAT = "backtester.snapshot"
+SNAPSHOT_VERSION = 1
+_HEADER = "header"
+
+
+def _flatten(state: Any, arrays: List[np.ndarray]) -> Any:
+    """
+    Replaces the arrays of a nested state by references into arrays.
+    """
+    if isinstance(state, np.ndarray):
+        if state.dtype.hasobject:
+            raise TypeError("Arrays of Python objects cannot be stored in a snapshot, use a list instead.")
+        arrays.append(state)
+        return {"__array__": len(arrays) - 1}
+    if isinstance(state, dict):
+        return {str(key): _flatten(value, arrays) for key, value in state.items()}
+    if isinstance(state, (list, tuple)):
+        return [_flatten(value, arrays) for value in state]
+    if isinstance(state, np.generic):
+        return state.item()
+    return state
+
+
+def _unflatten(state: Any, arrays) -> Any:
+    if isinstance(state, dict):
+        if "__array__" in state:
+            return arrays[f"a{state['__array__']}"]
+        return {key: _unflatten(value, arrays) for key, value in state.items()}
+    if isinstance(state, list):
+        return [_unflatten(value, arrays) for value in state]
+    return state
+
+
+def save_snapshot(filename: str, state: Dict[str, Any]) -> None:
+    """
+    Writes the state of a session to a snapshot file.
+
+    The state is a nested dict whose leaves are NumPy arrays of numbers
+    or strings, or JSON values: None, bools, numbers, strings and lists
+    of them. The file is written next to its destination and moved into
+    place, so an interrupted save leaves the previous snapshot intact.
+
+    :param filename: Path of the snapshot, by convention ending in .npz.
+    :param state: The state to save.
+    """
+    arrays: List[np.ndarray] = []
+    header = {"format": SNAPSHOT_FORMAT, "version": SNAPSHOT_VERSION, "state": _flatten(state, arrays)}
+    members = {f"a{i}": values for i, values in enumerate(arrays)}
+    members[_HEADER] = np.frombuffer(json.dumps(header).encode("utf-8"), dtype=np.uint8)
+    tmp_filename = f"{filename}.tmp"
+    with open(tmp_filename, "wb") as fd:
+        np.savez(fd, **members)
+    os.replace(tmp_filename, filename)
+
+
+def load_snapshot(filename: str) -> Dict[str, Any]:
+    """
+    Reads the state saved by save_snapshot.
+
+    :param filename: Path of the snapshot.
+    :return: The state, with its arrays loaded into memory.
+    """
+    with np.load(filename, allow_pickle=False) as archive:
+        if _HEADER not in archive.files:
+            raise ValueError(f"{filename} is not a backtester snapshot.")
+        header = json.loads(archive[_HEADER].tobytes().decode("utf-8"))
+        if header.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"{filename} is not a backtester snapshot.")
+        if header["version"] > SNAPSHOT_VERSION:
+            raise ValueError(
+                f"{filename} is a version {header['version']} snapshot, this version reads up to {SNAPSHOT_VERSION}."
+            )
+        return _unflatten(header["state"], {name: archive[name] for name in archive.files if name != _HEADER})
@@ -1,7 +1,10 @@
-from typing import Optional
+from typing import Iterator, Optional, Sequence
 from datetime import datetime, date
 from enum import Enum
 
+import numpy as np
+import pandas as pd
+
 
 class EventType(Enum):
     NAN = 0
@@ -10,6 +13,26 @@ class EventType(Enum):
     ORDER = 3
     FILL = 4
     EOD = 5
+    BARS = 6
+    ORDERS = 7
+    FILLS = 8
+
+
+_READABLE_PERIODS = {
+    1: "1sec",
+    5: "5sec",
+    10: "10sec",
+    15: "15sec",
+    30: "30sec",
+    60: "1min",
+    300: "5min",
+    600: "10min",
+    900: "15min",
+    1800: "30min",
+    3600: "1hr",
+    86400: "1day",
+    604800: "1wk"
+}
 
 
 class Event(object):
@@ -17,7 +40,11 @@ class Event(object):
     Event is base class providing an interface for all subsequent
     (inherited) events, that will trigger further events in the
     trading infrastructure.
+
+    Events are created millions of times per backtest, so all event
+    classes declare __slots__ and keep their type on the class.
     """
+    __slots__ = ()
     type = EventType.NAN
 
     @property
@@ -26,6 +53,8 @@ class Event(object):
 
 
 class EODEvent(Event):
+    __slots__ = ("time",)
+    type = EventType.EOD
 
     def __init__(self, time: datetime) -> None:
         """
@@ -33,7 +62,6 @@ class EODEvent(Event):
 
         :param time: The timestamp of the EOD-event
         """
-        self.type = EventType.EOD
         self.time = time
 
     def __str__(self):
@@ -44,6 +72,8 @@ class EODEvent(Event):
 
 
 class TickEvent(Event):
+    __slots__ = ("ticker", "time", "bid", "ask")
+    type = EventType.TICK
 
     def __init__(self, ticker: str, time: datetime, bid: float, ask: float) -> None:
         """
@@ -54,7 +84,6 @@ class TickEvent(Event):
         :param bid: The best bid price at the time of the tick.
         :param ask: The best ask price at the time of the tick.
         """
-        self.type = EventType.TICK
         self.ticker = ticker
         self.time = time
         self.bid = bid
@@ -68,6 +97,12 @@ class TickEvent(Event):
 
 
 class BarEvent(Event):
+    __slots__ = (
+        "ticker", "time", "period", "open_price", "high_price",
+        "low_price", "close_price", "volume"
+    )
+    type = EventType.BAR
+
     def __init__(
             self, ticker: str, time: datetime, period: int,
             open_price: float, high_price: float, low_price: float,
@@ -85,7 +120,6 @@ class BarEvent(Event):
         :param close_price: The unadjusted close price of the bar
         :param volume: The volume of trading within the bar
         """
-        self.type = EventType.BAR
         self.ticker = ticker
         self.time = time
         self.period = period
@@ -94,9 +128,9 @@ class BarEvent(Event):
         self.low_price = low_price
         self.close_price = close_price
         self.volume = volume
-        self.period_readable = self._readable_period()
 
-    def _readable_period(self):
+    @property
+    def period_readable(self) -> str:
         """
         Creates a human-readable period from the number
         of seconds specified for 'period'.
@@ -111,25 +145,7 @@ class BarEvent(Event):
         readable period is simply passed through from period,
         in seconds.
         """
-        lut = {
-            1: "1sec",
-            5: "5sec",
-            10: "10sec",
-            15: "15sec",
-            30: "30sec",
-            60: "1min",
-            300: "5min",
-            600: "10min",
-            900: "15min",
-            1800: "30min",
-            3600: "1hr",
-            86400: "1day",
-            604800: "1wk"
-        }
-        if self.period in lut:
-            return lut[self.period]
-        else:
-            return "%ssec" % str(self.period)
+        return _READABLE_PERIODS.get(self.period, "%ssec" % str(self.period))
 
     def __str__(self):
         return f"Type: {self.type}, Ticker: {self.ticker}], Time: {self.time}, Period: {self.period_readable}, " \
@@ -140,12 +156,70 @@ class BarEvent(Event):
         return str(self)
 
 
+class BarSliceEvent(Event):
+    __slots__ = (
+        "time", "tickers", "indices", "periods", "open_price",
+        "high_price", "low_price", "close_price", "volume"
+    )
+    type = EventType.BARS
+
+    def __init__(
+            self, time: datetime, tickers: np.ndarray, indices: np.ndarray, periods: np.ndarray,
+            open_price: np.ndarray, high_price: np.ndarray, low_price: np.ndarray,
+            close_price: np.ndarray, volume: np.ndarray
+    ):
+        """
+        All the bars of one timestamp, as parallel arrays.
+
+        :param time: The timestamp of the bars.
+        :param tickers: The ticker symbols of the bars.
+        :param indices: The indices of the tickers into the price arrays of the price handler.
+        :param periods: The periods of the bars in seconds.
+        :param open_price: The opening prices.
+        :param high_price: The high prices.
+        :param low_price: The low prices.
+        :param close_price: The closing prices.
+        :param volume: The volumes.
+        """
+        self.time = time
+        self.tickers = tickers
+        self.indices = indices
+        self.periods = periods
+        self.open_price = open_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.close_price = close_price
+        self.volume = volume
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def bars(self) -> Iterator[BarEvent]:
+        """
+        Yields the slice as one BarEvent per ticker.
+        """
+        for ticker, period, open_price, high_price, low_price, close_price, volume in zip(
+                self.tickers.tolist(), self.periods.tolist(), self.open_price.tolist(), self.high_price.tolist(),
+                self.low_price.tolist(), self.close_price.tolist(), self.volume.tolist()
+        ):
+            yield BarEvent(ticker, self.time, period, open_price, high_price, low_price, close_price, volume)
+
+    def __str__(self):
+        return f"Type: {self.type}, Time: {self.time}, Tickers: {len(self)}"
+
+    def __repr__(self):
+        return str(self)
+
+
 class OrderEvent(Event):
     """
     Handles the event of sending an Order to an execution system.
     The order contains a ticker (e.g. GOOG), action (BOT or SLD)
     and quantity.
     """
+    __slots__ = ("ticker", "action", "quantity")
+    type = EventType.ORDER
+
     def __init__(self, ticker: str, action: str, quantity: float):
         """
         Order-event
@@ -154,7 +228,6 @@ class OrderEvent(Event):
         :param action: 'BOT' (for long) or 'SLD' (for short).
         :param quantity: The quantity of shares to transact.
         """
-        self.type = EventType.ORDER
         self.ticker = ticker
         self.action = action
         self.quantity = quantity
@@ -176,6 +249,8 @@ class FillEvent(Event):
     Currently does not support filling positions at
     different prices.
     """
+    __slots__ = ("timestamp", "ticker", "action", "quantity", "exchange", "price", "commission")
+    type = EventType.FILL
 
     def __init__(
             self, timestamp: datetime, ticker: str,
@@ -194,7 +269,6 @@ class FillEvent(Event):
         :param price: The price at which the trade was filled
         :param commission: The brokerage commission for carrying out the trade.
         """
-        self.type = EventType.FILL
         self.timestamp = timestamp
         self.ticker = ticker
         self.action = action
@@ -203,3 +277,92 @@ class FillEvent(Event):
         self.price = price
         self.commission = commission
 
+
+class OrderBatchEvent(Event):
+    """
+    A basket of orders, e.g. the trades of a cross-sectional
+    rebalance, sent to an execution system in one event.
+    """
+    __slots__ = ("tickers", "actions", "quantities")
+    type = EventType.ORDERS
+
+    def __init__(self, tickers: Sequence[str], actions: Sequence[str], quantities: Sequence[float]):
+        """
+        Order-batch-event
+
+        :param tickers: The ticker symbols of the orders.
+        :param actions: 'BOT' (for long) or 'SLD' (for short) per order.
+        :param quantities: The quantities of shares to transact.
+        """
+        self.tickers = list(tickers)
+        self.actions = np.asarray(actions)
+        self.quantities = np.asarray(quantities, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def orders(self) -> Iterator[OrderEvent]:
+        """
+        Yields the batch as one OrderEvent per order.
+        """
+        for ticker, action, quantity in zip(self.tickers, self.actions.tolist(), self.quantities.tolist()):
+            yield OrderEvent(ticker, action, quantity)
+
+    def __str__(self):
+        return f"Type: {self.type}, Orders: {len(self)}"
+
+    def __repr__(self):
+        return str(self)
+
+
+class FillBatchEvent(Event):
+    """
+    The fills of an OrderBatchEvent, applied to the portfolio in one
+    update. Orders that could not be filled are left out.
+    """
+    __slots__ = ("timestamps", "tickers", "actions", "quantities", "exchange", "prices", "commissions")
+    type = EventType.FILLS
+
+    def __init__(
+            self, timestamps: np.ndarray, tickers: Sequence[str],
+            actions: np.ndarray, quantities: np.ndarray,
+            exchange: str, prices: np.ndarray,
+            commissions: np.ndarray
+    ):
+        """
+        Initialises the FillBatchEvent object.
+
+        :param timestamps: The times the orders were filled, in int64 nanoseconds.
+        :param tickers: The ticker symbols of the fills.
+        :param actions: 'BOT' (for long) or 'SLD' (for short) per fill.
+        :param quantities: The filled quantities.
+        :param exchange: The exchange where the orders were filled.
+        :param prices: The prices at which the trades were filled.
+        :param commissions: The brokerage commissions of the trades.
+        """
+        self.timestamps = timestamps
+        self.tickers = tickers
+        self.actions = actions
+        self.quantities = quantities
+        self.exchange = exchange
+        self.prices = prices
+        self.commissions = commissions
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+    def fills(self) -> Iterator[FillEvent]:
+        """
+        Yields the batch as one FillEvent per fill.
+        """
+        for timestamp, ticker, action, quantity, price, commission in zip(
+                self.timestamps.tolist(), self.tickers, self.actions.tolist(), self.quantities.tolist(),
+                self.prices.tolist(), self.commissions.tolist()
+        ):
+            yield FillEvent(pd.Timestamp(timestamp), ticker, action, quantity, self.exchange, price, commission)
+
+    def __str__(self):
+        return f"Type: {self.type}, Fills: {len(self)}"
+
+    def __repr__(self):
+        return str(self)
@@ -0,0 +1,142 @@
+from typing import Optional
+from abc import ABC, abstractmethod
+from collections import deque
+from queue import Queue, Empty
+import asyncio
+
+from backtester.event import Event
+
+
+class EventBus(ABC):
+    """
+    EventBus is a base class providing an interface for the event
+    queues that connect the components of a TradingSession.
+
+    Components only ever call put. The TradingSession calls poll,
+    which returns the next event or None when the bus is empty, so
+    an empty bus is not signalled through an exception.
+    """
+
+    @abstractmethod
+    def put(self, event: Event) -> None:
+        pass
+
+    @abstractmethod
+    def poll(self) -> Optional[Event]:
+        pass
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+
+class DequeEventBus(EventBus):
+    """
+    Lock-free event bus for single-threaded backtests, backed by
+    a collections.deque.
+    """
+
+    def __init__(self) -> None:
+        self.events = deque()
+
+    def put(self, event: Event) -> None:
+        self.events.append(event)
+
+    def poll(self) -> Optional[Event]:
+        if self.events:
+            return self.events.popleft()
+        return None
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+
+class QueueEventBus(EventBus):
+    """
+    Thread-safe event bus backed by a queue.Queue, for live sessions
+    where events are put from other threads.
+    """
+
+    def __init__(self, events_queue: Optional[Queue] = None) -> None:
+        self.events_queue = Queue() if events_queue is None else events_queue
+
+    def put(self, event: Event) -> None:
+        self.events_queue.put(event)
+
+    def poll(self) -> Optional[Event]:
+        try:
+            return self.events_queue.get(False)
+        except Empty:
+            return None
+
+    def __len__(self) -> int:
+        return self.events_queue.qsize()
+
+
+class AsyncEventBus(EventBus):
+    """
+    Awaitable event bus for an AsyncTradingSession, backed by an
+    asyncio.Queue.
+
+    put and poll never block and must be called from the thread of the
+    event loop. The session awaits get, so it sleeps instead of polling
+    while no events arrive.
+
+    The queue is created by start, inside the loop of the session, as
+    on Python < 3.10 an asyncio.Queue is bound to the loop current when
+    it is created. Events put before are buffered.
+    """
+
+    def __init__(self) -> None:
+        self.pending = deque()
+        self.events: Optional[asyncio.Queue] = None
+
+    def start(self) -> None:
+        """
+        Creates the queue in the running event loop and moves the
+        buffered events, and those left on the queue of a previous
+        loop, onto it.
+        """
+        if self.events is not None:
+            while not self.events.empty():
+                self.pending.append(self.events.get_nowait())
+        self.events = asyncio.Queue()
+        while self.pending:
+            self.events.put_nowait(self.pending.popleft())
+
+    def put(self, event: Event) -> None:
+        if self.events is None:
+            self.pending.append(event)
+        else:
+            self.events.put_nowait(event)
+
+    def poll(self) -> Optional[Event]:
+        if self.events is None:
+            return self.pending.popleft() if self.pending else None
+        try:
+            event = self.events.get_nowait()
+        except asyncio.QueueEmpty:
+            return None
+        self.events.task_done()
+        return event
+
+    async def get(self) -> Event:
+        """
+        Waits for and returns the next event. Each event returned must
+        be acknowledged with task_done once it has been handled.
+        """
+        return await self.events.get()
+
+    def task_done(self) -> None:
+        self.events.task_done()
+
+    async def join(self) -> None:
+        """
+        Waits until every event put on the bus has been handled.
+        """
+        await self.events.join()
+
+    def __len__(self) -> int:
+        if self.events is None:
+            return len(self.pending)
+        return self.events.qsize()
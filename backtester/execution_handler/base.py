@@ -1,9 +1,18 @@
 from abc import ABC, abstractmethod
 
-from backtester.event import Event
+from backtester.event import Event, OrderBatchEvent
 
 
 class ExecutionHandler(ABC):
     @abstractmethod
     def execute_order(self, event: Event):
         pass
+
+    def execute_orders(self, event: OrderBatchEvent):
+        """
+        Executes a basket of orders. The default executes the orders
+        one by one; handlers that can price a basket at once should
+        override this and emit a single FillBatchEvent.
+        """
+        for order in event.orders():
+            self.execute_order(order)
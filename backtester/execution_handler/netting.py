@@ -0,0 +1,73 @@
+from typing import Dict
+
+import numpy as np
+
+from backtester.execution_handler.base import ExecutionHandler
+from backtester.event import OrderEvent, OrderBatchEvent
+from backtester.portfolio import Portfolio
+
+
+class OrderNetter(object):
+    """
+    Order netting stage between the strategy and the execution handler.
+
+    Orders are not executed as they arrive but summed per ticker into
+    one signed quantity, BOT positive and SLD negative. When the
+    session has handled every event of the current timestamp it calls
+    flush, which sends one net order per ticker to the execution
+    handler as an OrderBatchEvent. Offsetting orders, e.g. liquidating a
+    portfolio and allocating it afresh on the same day, then cost one
+    fill and one commission per ticker instead of several, and tickers
+    that net to zero are not traded at all. The final positions are the
+    same as without netting.
+
+    A Position cannot change sides, so a net order that takes a
+    position through zero is sent as one order closing the position
+    and one opening it on the other side, as the orders it replaces
+    would have done.
+    """
+    def __init__(self, execution_handler: ExecutionHandler, portfolio: Portfolio) -> None:
+        self.execution_handler = execution_handler
+        self.portfolio = portfolio
+        self.net_quantities: Dict[str, float] = {}
+
+    @property
+    def pending(self) -> bool:
+        return bool(self.net_quantities)
+
+    def on_order(self, event: OrderEvent) -> None:
+        quantity = event.quantity if event.action == "BOT" else -event.quantity
+        self.net_quantities[event.ticker] = self.net_quantities.get(event.ticker, 0.0) + quantity
+
+    def on_orders(self, event: OrderBatchEvent) -> None:
+        net_quantities = self.net_quantities
+        signed = np.where(event.actions == "BOT", event.quantities, -event.quantities)
+        for ticker, quantity in zip(event.tickers, signed.tolist()):
+            net_quantities[ticker] = net_quantities.get(ticker, 0.0) + quantity
+
+    def flush(self) -> None:
+        """
+        Executes the net orders collected since the last flush, in the
+        order their tickers were first ordered.
+        """
+        net_quantities = self.net_quantities
+        self.net_quantities = {}
+        positions = self.portfolio.positions
+        tickers = []
+        quantities = []
+        for ticker, quantity in net_quantities.items():
+            if quantity == 0:
+                continue
+            held = positions[ticker].net if ticker in positions else 0.0
+            if held * (held + quantity) < 0:
+                tickers.append(ticker)
+                quantities.append(-held)
+                quantity += held
+            tickers.append(ticker)
+            quantities.append(quantity)
+        if not tickers:
+            return
+        quantities = np.array(quantities, dtype=np.float64)
+        self.execution_handler.execute_orders(
+            OrderBatchEvent(tickers, np.where(quantities > 0, "BOT", "SLD"), np.abs(quantities))
+        )
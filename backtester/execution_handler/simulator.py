@@ -1,9 +1,11 @@
 from typing import Optional
 from queue import Queue
 
+import numpy as np
+
 from backtester.execution_handler.base import ExecutionHandler
-from backtester.event import FillEvent, EventType, OrderEvent
-from backtester.price_handler.base import PriceHandler
+from backtester.event import FillEvent, FillBatchEvent, EventType, OrderEvent, OrderBatchEvent
+from backtester.price_handler.base import PriceHandler, NAT
 from backtester.price_parser import PriceParser
 
 
@@ -33,9 +35,10 @@ class SimulatedStockExecutionHandler(ExecutionHandler):
     def calculate_commission(quantity: float, fill_price: Optional[float] = 0.0) -> float:
         """
         Calculate the commission for a transaction.
+        Accepts scalars or NumPy arrays of quantities and prices.
         Fixme: Implement the Quantopian commission algorithm here.
         """
-        return min(0.5 * fill_price * quantity, max(1.0, 0.005 * quantity))
+        return np.minimum(0.5 * fill_price * quantity, np.maximum(1.0, 0.005 * quantity))
 
     def execute_order(self, event: OrderEvent) -> None:
         """
@@ -62,7 +65,7 @@ class SimulatedStockExecutionHandler(ExecutionHandler):
 
             # Set a dummy exchange and calculate trade commission
             exchange = "Oslo Boers"
-            commission = SimulatedStockExecutionHandler.calculate_commission(quantity, fill_price)
+            commission = self.calculate_commission(quantity, fill_price)
 
             # Create the FillEvent and place on the events queue
             fill_event = FillEvent(
@@ -75,6 +78,53 @@ class SimulatedStockExecutionHandler(ExecutionHandler):
 
         return None
 
+    def execute_orders(self, event: OrderBatchEvent) -> None:
+        """
+        Converts an OrderBatchEvent into one FillBatchEvent, pricing
+        and charging commission for the whole basket with array
+        operations. Orders without a price are reported and left out.
+        """
+        if event.type != EventType.ORDERS or len(event) == 0:
+            return None
+
+        index_of = self.price_handler.tickers
+        indices = np.fromiter((index_of.get(ticker, -1) for ticker in event.tickers), dtype=np.intp, count=len(event))
+        buys = event.actions == "BOT"
+        known = indices >= 0
+        fill_prices = np.full(len(event), np.nan)
+        if self.price_handler.istick():
+            bids, asks = self.price_handler.get_best_bid_asks(indices[known])
+            fill_prices[known] = np.where(buys[known], asks, bids)
+        else:
+            fill_prices[known] = self.price_handler.get_last_closes(indices[known])
+        timestamps = np.full(len(event), NAT, dtype=np.int64)
+        timestamps[known] = self.price_handler.last_timestamp[indices[known]]
+
+        filled = ~np.isnan(fill_prices)
+        if not filled.all():
+            for ticker in np.asarray(event.tickers, dtype=object)[~filled].tolist():
+                print(f"Price for ticker {ticker} is not available from the PriceHandler. Could not fill the order.")
+        tickers = [ticker for ticker, fill in zip(event.tickers, filled.tolist()) if fill]
+        if not tickers:
+            return None
+        quantities = event.quantities[filled]
+        fill_prices = fill_prices[filled]
+
+        # Set a dummy exchange and calculate trade commissions
+        exchange = "Oslo Boers"
+        commissions = np.broadcast_to(
+            np.asarray(self.calculate_commission(quantities, fill_prices), dtype=np.float64), quantities.shape
+        )
+
+        fill_event = FillBatchEvent(
+            timestamps[filled], tickers,
+            event.actions[filled], quantities,
+            exchange, fill_prices,
+            commissions
+        )
+        self.events_queue.put(fill_event)
+        return None
+
 
 class SimulatedFundExecutionHandler(SimulatedStockExecutionHandler):
     """
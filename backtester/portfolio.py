@@ -1,9 +1,15 @@
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
 from backtester.position import Position
+from backtester.position_book import PositionBook, PositionBookView, PositionView, FIELDS, BOT, SLD
 from backtester.price_handler.base import PriceHandler
+from backtester.trade_journal import TradeJournal
 
 
 class Portfolio(object):
-    def __init__(self, price_handler: PriceHandler, cash: float) -> None:
+    def __init__(self, price_handler: PriceHandler, cash: float, trade_journal: Optional[TradeJournal] = None) -> None:
         """
         On creation, the Portfolio object contains no
         positions and all values are "reset" to the initial
@@ -12,13 +18,23 @@ class Portfolio(object):
         Note that realised_pnl is the running tally pnl from closed
         positions (closed_pnl), as well as realised_pnl
         from currently open positions.
+
+        Equity and unrealised PnL are kept as running aggregates.
+        A fill only adjusts them by the change in value of the
+        position it touched, while update_portfolio re-marks every
+        open position from scratch.
+
+        Closed positions are not kept as objects but recorded in
+        trade_journal, together with the times they were opened and
+        closed.
         """
         self.price_handler = price_handler
         self.init_cash = cash
         self.equity = cash
         self.cur_cash = cash
         self.positions = {}
-        self.closed_positions = []
+        self.entry_times = {}
+        self.trade_journal = trade_journal if trade_journal is not None else TradeJournal()
         self.realised_pnl = 0
         self.unrealised_pnl = 0
 
@@ -31,18 +47,95 @@ class Portfolio(object):
         self.equity = self.realised_pnl
         self.equity += self.init_cash
 
-        for ticker in self.positions:
-            pt = self.positions[ticker]
-            if self.price_handler.istick():
-                bid, ask = self.price_handler.get_best_bid_ask(ticker=ticker)
-            else:
-                close_price = self.price_handler.get_last_close(ticker=ticker)
-                bid = close_price
-                ask = close_price
+        if not self.positions:
+            return
+
+        indices = self.price_handler.get_ticker_indices(list(self.positions))
+        if self.price_handler.istick():
+            bids, asks = self.price_handler.get_best_bid_asks(indices)
+        else:
+            bids = asks = self.price_handler.get_last_closes(indices)
+
+        for pt, bid, ask in zip(self.positions.values(), bids.tolist(), asks.tolist()):
             pt.update_market_value(bid=bid, ask=ask)
             self.unrealised_pnl += pt.unrealised_pnl
             self.equity += pt.market_value - pt.cost_basis + pt.realised_pnl
 
+    @staticmethod
+    def _position_value(position: Position) -> float:
+        """
+        The contribution of an open position to the portfolio equity.
+        """
+        return position.market_value - position.cost_basis + position.realised_pnl
+
+    def _update_position_value(self, position: Position, old_value: float, old_unrealised_pnl: float) -> None:
+        """
+        Adjusts equity and unrealised PnL by the change in value of a
+        single position, instead of re-marking the whole portfolio.
+        """
+        self.equity += self._position_value(position) - old_value
+        self.unrealised_pnl += position.unrealised_pnl - old_unrealised_pnl
+
+    def _timestamp(self, ticker: str) -> int:
+        """
+        The time of the last price of a ticker, in nanoseconds.
+        """
+        return int(self.price_handler.last_timestamp[self.price_handler.get_ticker_index(ticker)])
+
+    def _get_cash_state(self) -> Dict[str, float]:
+        return {
+            "init_cash": float(self.init_cash),
+            "equity": float(self.equity),
+            "cur_cash": float(self.cur_cash),
+            "realised_pnl": float(self.realised_pnl),
+            "unrealised_pnl": float(self.unrealised_pnl),
+        }
+
+    def _set_cash_state(self, state: Dict[str, float]) -> None:
+        self.init_cash = state["init_cash"]
+        self.equity = state["equity"]
+        self.cur_cash = state["cur_cash"]
+        self.realised_pnl = state["realised_pnl"]
+        self.unrealised_pnl = state["unrealised_pnl"]
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Returns the cash, the open positions and the trade journal as
+        arrays, for a session snapshot.
+        """
+        positions = list(self.positions.values())
+        return {
+            "cash": self._get_cash_state(),
+            "tickers": [position.ticker for position in positions],
+            "action": np.array([BOT if position.action == "BOT" else SLD for position in positions], dtype=np.int8),
+            "entry_time": np.array([self.entry_times[position.ticker] for position in positions], dtype=np.int64),
+            "fields": {
+                field: np.array([getattr(position, field) for position in positions], dtype=np.float64)
+                for field in FIELDS
+            },
+            "trade_journal": self.trade_journal.get_state(),
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restores the portfolio saved by get_state.
+        """
+        self._set_cash_state(state["cash"])
+        self.positions = {}
+        self.entry_times = {}
+        fields = {field: state["fields"][field].tolist() for field in FIELDS}
+        for i, (ticker, action, entry_time) in enumerate(
+                zip(state["tickers"], state["action"].tolist(), state["entry_time"].tolist())
+        ):
+            position = Position.__new__(Position)
+            position.ticker = ticker
+            position.action = "BOT" if action == BOT else "SLD"
+            for field in FIELDS:
+                setattr(position, field, fields[field][i])
+            self.positions[ticker] = position
+            self.entry_times[ticker] = entry_time
+        self.trade_journal.set_state(state["trade_journal"])
+
     def print_portfolio(self) -> None:
         print(self.equity)
         for ticker in self.positions:
@@ -59,7 +152,7 @@ class Portfolio(object):
         "market value".
 
         Once the Position is added, the Portfolio values
-        are updated.
+        are updated by the value of the new position.
 
         :param action:
         :param ticker:
@@ -77,7 +170,8 @@ class Portfolio(object):
                 ask = close_price
             position = Position(action=action, ticker=ticker, init_quantity=quantity, init_price=price, init_commission=commission, bid=bid, ask=ask)
             self.positions[ticker] = position
-            self.update_portfolio()
+            self.entry_times[ticker] = self._timestamp(ticker)
+            self._update_position_value(position, old_value=0.0, old_unrealised_pnl=0.0)
         else:
             print(f"Ticker {ticker} is already in the positions list. Could not add a new position.")
 
@@ -89,7 +183,7 @@ class Portfolio(object):
         "market value".
 
         Once the Position is modified, the Portfolio values
-        are updated.
+        are updated by the change in value of the position.
 
         :param action:
         :param ticker:
@@ -100,21 +194,29 @@ class Portfolio(object):
         """
 
         if ticker in self.positions:
-            self.positions[ticker].transact_shares(action=action, quantity=quantity, price=price, commission=commission)
+            position = self.positions[ticker]
+            old_value = self._position_value(position)
+            old_unrealised_pnl = position.unrealised_pnl
+
+            position.transact_shares(action=action, quantity=quantity, price=price, commission=commission)
             if self.price_handler.istick():
                 bid, ask = self.price_handler.get_best_bid_ask(ticker=ticker)
             else:
                 close_price = self.price_handler.get_last_close(ticker=ticker)
                 bid = close_price
                 ask = close_price
-            self.positions[ticker].update_market_value(bid=bid, ask=ask)
+            position.update_market_value(bid=bid, ask=ask)
+            self._update_position_value(position, old_value=old_value, old_unrealised_pnl=old_unrealised_pnl)
 
-            if self.positions[ticker].quantity == 0:
+            if position.quantity == 0:
+                # The value of a closed position is its realised PnL, which moves
+                # from the open positions to the portfolio tally
                 closed = self.positions.pop(ticker)
                 self.realised_pnl += closed.realised_pnl
-                self.closed_positions.append(closed)
-
-            self.update_portfolio()
+                self.unrealised_pnl -= closed.unrealised_pnl
+                self.trade_journal.append(
+                    closed, entry_time=self.entry_times.pop(ticker), exit_time=self._timestamp(ticker)
+                )
         else:
             print(f"Ticker {ticker} not in the current position list. Could not modify a current position.")
 
@@ -137,3 +239,196 @@ class Portfolio(object):
             self._add_position(action=action, ticker=ticker, quantity=quantity, price=price, commission=commission)
         else:
             self._modify_position(action=action, ticker=ticker, quantity=quantity, price=price, commission=commission)
+
+    def transact_positions(
+            self,
+            tickers: Sequence[str],
+            actions: Sequence[str],
+            quantities: Sequence[float],
+            prices: Sequence[float],
+            commissions: Sequence[float],
+    ) -> None:
+        """
+        Applies a batch of fills in order, one transact_position each.
+        """
+        for ticker, action, quantity, price, commission in zip(
+                tickers, np.asarray(actions).tolist(), np.asarray(quantities, dtype=np.float64).tolist(),
+                np.asarray(prices, dtype=np.float64).tolist(), np.asarray(commissions, dtype=np.float64).tolist()
+        ):
+            self.transact_position(action, ticker, quantity, price, commission)
+
+
+class BookPortfolio(Portfolio):
+    """
+    Portfolio that keeps its positions in a PositionBook of NumPy
+    arrays instead of a dict of Position objects.
+
+    Fills can be applied in batches through transact_positions and
+    update_portfolio marks all open positions in one array operation.
+    The positions attribute is a read-only mapping of ticker ->
+    Position-like view, so strategies can keep reading it as before.
+    """
+    def __init__(self, price_handler: PriceHandler, cash: float, trade_journal: Optional[TradeJournal] = None) -> None:
+        super().__init__(price_handler=price_handler, cash=cash, trade_journal=trade_journal)
+        self.book = PositionBook()
+        self.positions = PositionBookView(self.book, price_handler)
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "cash": self._get_cash_state(),
+            "book": self.book.get_state(),
+            "entry_tickers": list(self.entry_times),
+            "entry_time": np.fromiter(self.entry_times.values(), dtype=np.int64, count=len(self.entry_times)),
+            "trade_journal": self.trade_journal.get_state(),
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        self._set_cash_state(state["cash"])
+        self.book.set_state(state["book"])
+        self.entry_times = dict(zip(state["entry_tickers"], state["entry_time"].tolist()))
+        self.trade_journal.set_state(state["trade_journal"])
+
+    def _marks(self, indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        if self.price_handler.istick():
+            return self.price_handler.get_best_bid_asks(indices)
+        closes = self.price_handler.get_last_closes(indices)
+        return closes, closes
+
+    def update_portfolio(self) -> None:
+        """
+        Marks all open positions to market in one pass.
+        """
+        indices = self.book.open_indices
+        bids, asks = self._marks(indices)
+        self.book.mark_to_market(indices, bids, asks)
+        self.unrealised_pnl = float(np.sum(self.book.unrealised_pnl[indices]))
+        self.equity = self.init_cash + self.realised_pnl + float(np.sum(self.book.values(indices)))
+
+    def transact_position(self, action: str, ticker: str, quantity: float, price: float, commission: float) -> None:
+        """
+        Applies a single fill with the scalar arithmetic of the book,
+        which for one fill is much cheaper than the array operations of
+        transact_positions.
+        """
+        index = self.price_handler.get_ticker_index(ticker)
+        if index is None:
+            raise KeyError(f"Ticker {ticker} is not subscribed to the price handler.")
+        book = self.book
+        side = BOT if action == "BOT" else SLD
+        self.cur_cash -= side * quantity * price + commission
+
+        if index >= len(book.action) or book.action[index] == 0:
+            old_value = old_unrealised_pnl = 0.0
+            self.entry_times[ticker] = int(self.price_handler.last_timestamp[index])
+            book.open_one(index, ticker, side, quantity, price, commission)
+        else:
+            old_value = float(book.values(index))
+            old_unrealised_pnl = float(book.unrealised_pnl[index])
+            book.transact_one(index, side, quantity, price, commission)
+
+        bid, ask = self._marks(index)
+        book.mark_to_market(index, bid, ask)
+        self.equity += float(book.values(index)) - old_value
+        self.unrealised_pnl += float(book.unrealised_pnl[index]) - old_unrealised_pnl
+        if book.quantity[index] == 0:
+            self._close_positions(np.array([index]))
+
+    def transact_positions(
+            self,
+            tickers: Sequence[str],
+            actions: Sequence[str],
+            quantities: Sequence[float],
+            prices: Sequence[float],
+            commissions: Sequence[float],
+    ) -> None:
+        """
+        Applies a batch of fills. A ticker may appear several times, its
+        fills are then applied in order.
+        """
+        if len(tickers) == 1:
+            self.transact_position(
+                str(actions[0]), tickers[0], float(quantities[0]), float(prices[0]), float(commissions[0])
+            )
+            return
+        try:
+            indices = self.price_handler.get_ticker_indices(tickers)
+        except KeyError as e:
+            raise KeyError(f"Ticker {e.args[0]} is not subscribed to the price handler.") from None
+        actions = np.where(np.asarray(actions) == "BOT", BOT, SLD).astype(np.int8)
+        quantities = np.asarray(quantities, dtype=np.float64)
+        prices = np.asarray(prices, dtype=np.float64)
+        commissions = np.asarray(commissions, dtype=np.float64)
+
+        self.cur_cash -= float(np.sum(actions * quantities * prices + commissions))
+        self.book.ensure_capacity(int(indices.max()) + 1)
+
+        # Each round applies the next fill of every ticker left, so a
+        # position closed in one round can be reopened in the next
+        remaining = np.arange(len(indices))
+        while len(remaining):
+            _, first = np.unique(indices[remaining], return_index=True)
+            batch = remaining[np.sort(first)]
+            remaining = np.setdiff1d(remaining, batch, assume_unique=True)
+            self._transact_unique(
+                indices[batch], [tickers[i] for i in batch.tolist()],
+                actions[batch], quantities[batch], prices[batch], commissions[batch]
+            )
+
+    def _transact_unique(self, indices, tickers, actions, quantities, prices, commissions) -> None:
+        is_new = self.book.action[indices] == 0
+        old_values = np.where(is_new, 0.0, self.book.values(indices))
+        old_unrealised_pnl = np.where(is_new, 0.0, self.book.unrealised_pnl[indices])
+
+        if is_new.any():
+            new_indices = indices[is_new]
+            new_tickers = [ticker for ticker, new in zip(tickers, is_new.tolist()) if new]
+            for ticker, time in zip(new_tickers, self.price_handler.last_timestamp[new_indices].tolist()):
+                self.entry_times[ticker] = time
+            self.book.open(
+                new_indices, new_tickers,
+                actions[is_new], quantities[is_new], prices[is_new], commissions[is_new]
+            )
+        if not is_new.all():
+            existing = ~is_new
+            self.book.transact(
+                indices[existing], actions[existing], quantities[existing], prices[existing], commissions[existing]
+            )
+
+        bids, asks = self._marks(indices)
+        self.book.mark_to_market(indices, bids, asks)
+        self.equity += float(np.sum(self.book.values(indices) - old_values))
+        self.unrealised_pnl += float(np.sum(self.book.unrealised_pnl[indices] - old_unrealised_pnl))
+
+        closed = indices[self.book.quantity[indices] == 0]
+        if len(closed):
+            self._close_positions(closed)
+
+    def _close_positions(self, closed: np.ndarray) -> None:
+        """
+        Records the positions at the given indices, all with a quantity
+        of zero, in the trade journal and frees their slots.
+        """
+        # The value of a closed position is its realised PnL, which moves
+        # from the open positions to the portfolio tally
+        self.realised_pnl += float(np.sum(self.book.realised_pnl[closed]))
+        self.unrealised_pnl -= float(np.sum(self.book.unrealised_pnl[closed]))
+        closed_list = closed.tolist()
+        tickers = [self.book.tickers[index] for index in closed_list]
+        if len(closed_list) == 1:
+            # A single fill closes at most one position, which is cheaper
+            # to record as a row than as columns
+            index = closed_list[0]
+            self.trade_journal.append(
+                PositionView(self.book, index), entry_time=self.entry_times.pop(tickers[0]),
+                exit_time=int(self.price_handler.last_timestamp[index]),
+            )
+        else:
+            self.trade_journal.extend(
+                tickers=tickers,
+                actions=self.book.action[closed],
+                entry_times=np.array([self.entry_times.pop(ticker) for ticker in tickers], dtype=np.int64),
+                exit_times=self.price_handler.last_timestamp[closed],
+                fields={field: getattr(self.book, field)[closed] for field in FIELDS},
+            )
+        for index in closed_list:
+            self.book.close(index)
@@ -1,12 +1,21 @@
+from typing import Optional
 from queue import Queue
 
-from backtester.portfolio import Portfolio
+from backtester.portfolio import Portfolio, BookPortfolio
 from backtester.price_handler.base import PriceHandler
-from backtester.event import OrderEvent, FillEvent
+from backtester.event import OrderEvent, FillEvent, FillBatchEvent
+from backtester.trade_journal import TradeJournal
 
 
 class PortfolioHandler(object):
-    def __init__(self, initial_cash: float, events_queue: Queue, price_handler: PriceHandler):
+    def __init__(
+            self,
+            initial_cash: float,
+            events_queue: Queue,
+            price_handler: PriceHandler,
+            position_book: bool = False,
+            trade_journal: Optional[TradeJournal] = None,
+    ):
         """
         The PortfolioHandler is designed to interact with the
         backtesting or live trading overall event-driven
@@ -24,11 +33,21 @@ class PortfolioHandler(object):
         The PortfolioHandler also takes a handle to the
         RiskManager, which is used to modify any generated
         Orders to remain in line with risk parameters.
+
+        With position_book=True the Portfolio keeps its positions in
+        NumPy arrays (see BookPortfolio), which scales better for
+        large universes.
+
+        Closed trades are recorded in trade_journal, by default a
+        TradeJournal that spills to a temporary directory.
         """
         self.initial_cash = initial_cash
         self.events_queue = events_queue
         self.price_handler = price_handler
-        self.portfolio = Portfolio(price_handler=price_handler, cash=initial_cash)
+        if position_book:
+            self.portfolio = BookPortfolio(price_handler=price_handler, cash=initial_cash, trade_journal=trade_journal)
+        else:
+            self.portfolio = Portfolio(price_handler=price_handler, cash=initial_cash, trade_journal=trade_journal)
 
     def _convert_fill_to_portfolio_update(self, fill_event: FillEvent) -> None:
         """
@@ -71,6 +90,16 @@ class PortfolioHandler(object):
         """
         self._convert_fill_to_portfolio_update(fill_event)
 
+    def on_fills(self, fill_event: FillBatchEvent) -> None:
+        """
+        Applies the fills of a FillBatchEvent to the Portfolio in one
+        update. A BookPortfolio applies them with array operations.
+        """
+        self.portfolio.transact_positions(
+            tickers=fill_event.tickers, actions=fill_event.actions, quantities=fill_event.quantities,
+            prices=fill_event.prices, commissions=fill_event.commissions
+        )
+
     def update_portfolio_value(self) -> None:
         """
         Update the portfolio to reflect current market value as
@@ -0,0 +1,258 @@
+from typing import Any, Dict, Iterator, List, Optional
+from collections.abc import Mapping
+
+import numpy as np
+
+BOT = 1
+SLD = -1
+
+FIELDS = (
+    "quantity", "init_price", "init_commission", "avg_price", "cost_basis",
+    "market_value", "realised_pnl", "unrealised_pnl", "buys", "sells",
+    "avg_bot", "avg_sld", "total_bot", "total_sld", "total_commission",
+    "net", "net_total", "net_incl_comm",
+)
+
+# Fields of an open position that a fill is applied to
+_TRANSACT_INPUTS = (
+    "avg_price", "buys", "sells", "avg_bot", "avg_sld", "realised_pnl", "unrealised_pnl", "total_commission",
+)
+
+
+def _open_values(bot, quantity, price, commission) -> Dict[str, Any]:
+    """
+    The fields of new positions, as Position._calculate_initial_value.
+    Arguments are floats or arrays of floats; bot is 1.0 for BOT and 0.0
+    for SLD. Both sides are computed and one is selected by multiplying
+    with bot, which is exact as both are finite.
+    """
+    sign = 2.0 * bot - 1.0
+    buys = bot * quantity
+    sells = (1.0 - bot) * quantity
+    avg_bot = bot * price
+    avg_sld = (1.0 - bot) * price
+    total_bot = buys * avg_bot
+    total_sld = sells * avg_sld
+    avg_price = (price * quantity + sign * commission) / quantity
+    net_total = total_sld - total_bot
+    zero = 0.0 * quantity
+    return {
+        "quantity": quantity, "init_price": price, "init_commission": commission, "avg_price": avg_price,
+        "cost_basis": sign * quantity * avg_price, "market_value": zero, "realised_pnl": zero,
+        "unrealised_pnl": zero, "buys": buys, "sells": sells, "avg_bot": avg_bot, "avg_sld": avg_sld,
+        "total_bot": total_bot, "total_sld": total_sld, "total_commission": commission,
+        "net": buys - sells, "net_total": net_total, "net_incl_comm": net_total - commission,
+    }
+
+
+def _transact_values(opened, bot, quantity, price, commission, state: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    The fields of open positions after a fill, as
+    Position.transact_shares. opened is the opening action, BOT or SLD,
+    and state holds the _TRANSACT_INPUTS fields before the fill. Works
+    on floats and on arrays alike, selecting like _open_values.
+    """
+    sld = 1.0 - bot
+    avg_price = state["avg_price"]
+    buys = state["buys"]
+    sells = state["sells"]
+    avg_bot = state["avg_bot"]
+    avg_sld = state["avg_sld"]
+
+    # A fill on the side the position was opened with increases it,
+    # one on the other side closes part of it out
+    increase = bot * (1.0 - (opened == SLD) * 1.0) + sld * (1.0 - (opened == BOT) * 1.0)
+    long_avg_price = (avg_price * buys + price * quantity + commission) / (buys + quantity)
+    short_avg_price = (avg_price * sells + price * quantity - commission) / (sells + quantity)
+    realised = bot * (quantity * (avg_price - price)) + sld * (quantity * (price - avg_price)) - commission
+
+    new_avg_bot = bot * ((avg_bot * buys + price * quantity) / (buys + quantity)) + sld * avg_bot
+    new_avg_sld = sld * ((avg_sld * sells + price * quantity) / (sells + quantity)) + bot * avg_sld
+    new_avg_price = increase * (bot * long_avg_price + sld * short_avg_price) + (1.0 - increase) * avg_price
+    new_buys = buys + bot * quantity
+    new_sells = sells + sld * quantity
+    total_bot = new_buys * new_avg_bot
+    total_sld = new_sells * new_avg_sld
+    total_commission = state["total_commission"] + commission
+
+    # Adjust net values, including commissions
+    net = new_buys - new_sells
+    net_total = total_sld - total_bot
+    return {
+        "avg_bot": new_avg_bot, "avg_sld": new_avg_sld, "avg_price": new_avg_price,
+        "realised_pnl": state["realised_pnl"] + (1.0 - increase) * realised,
+        "unrealised_pnl": state["unrealised_pnl"] - increase * sld * commission,
+        "buys": new_buys, "sells": new_sells, "total_bot": total_bot, "total_sld": total_sld,
+        "total_commission": total_commission, "net": net, "quantity": net, "net_total": net_total,
+        "net_incl_comm": net_total - total_commission, "cost_basis": net * new_avg_price,
+    }
+
+
+class PositionBook(object):
+    """
+    Structure-of-arrays store of the positions of a portfolio.
+
+    Every field of a Position is kept in a float64 array indexed by the
+    ticker index of the price handler, and a position's opening action
+    is kept as BOT (1) or SLD (-1) in an int8 array, 0 meaning no open
+    position. open and transact apply the arithmetic of Position to many
+    positions in one pass, open_one and transact_one the same arithmetic
+    to a single position on Python floats, and mark_to_market marks
+    positions to market.
+    """
+    def __init__(self, capacity: int = 8) -> None:
+        self.tickers: List[Optional[str]] = [None] * capacity
+        self.action = np.zeros(capacity, dtype=np.int8)
+        for field in FIELDS:
+            setattr(self, field, np.zeros(capacity))
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.action))
+
+    @property
+    def open_indices(self) -> np.ndarray:
+        return np.flatnonzero(self.action)
+
+    def ensure_capacity(self, capacity: int) -> None:
+        """
+        Grows the arrays by doubling until they hold at least capacity
+        tickers.
+        """
+        size = len(self.action)
+        if capacity <= size:
+            return
+        while size < capacity:
+            size *= 2
+        self.tickers.extend([None] * (size - len(self.tickers)))
+        for field in FIELDS + ("action",):
+            values = getattr(self, field)
+            grown = np.zeros(size, dtype=values.dtype)
+            grown[:len(values)] = values
+            setattr(self, field, grown)
+
+    def open(self, indices: np.ndarray, tickers: List[str], actions: np.ndarray,
+             quantities: np.ndarray, prices: np.ndarray, commissions: np.ndarray) -> None:
+        """
+        Opens new positions, as Position._calculate_initial_value.
+        """
+        self.ensure_capacity(int(indices.max()) + 1)
+        for index, ticker in zip(indices.tolist(), tickers):
+            self.tickers[index] = ticker
+        self.action[indices] = actions
+        values = _open_values((actions == BOT) * 1.0, quantities, prices, commissions)
+        for field in FIELDS:
+            getattr(self, field)[indices] = values[field]
+
+    def open_one(self, index: int, ticker: str, action: int, quantity: float, price: float, commission: float) -> None:
+        """
+        Opens a single new position, with the arithmetic of open on
+        Python floats.
+        """
+        self.ensure_capacity(index + 1)
+        self.tickers[index] = ticker
+        self.action[index] = action
+        values = _open_values(float(action == BOT), quantity, price, commission)
+        for field in FIELDS:
+            getattr(self, field)[index] = values[field]
+
+    def transact(self, indices: np.ndarray, actions: np.ndarray,
+                 quantities: np.ndarray, prices: np.ndarray, commissions: np.ndarray) -> None:
+        """
+        Applies fills to open positions, as Position.transact_shares.
+        Each index may appear only once per call.
+        """
+        state = {field: getattr(self, field)[indices] for field in _TRANSACT_INPUTS}
+        values = _transact_values(self.action[indices], (actions == BOT) * 1.0, quantities, prices, commissions, state)
+        for field, value in values.items():
+            getattr(self, field)[indices] = value
+
+    def transact_one(self, index: int, action: int, quantity: float, price: float, commission: float) -> None:
+        """
+        Applies a single fill to an open position, with the arithmetic of
+        transact on Python floats.
+        """
+        state = {field: float(getattr(self, field)[index]) for field in _TRANSACT_INPUTS}
+        values = _transact_values(int(self.action[index]), float(action == BOT), quantity, price, commission, state)
+        for field, value in values.items():
+            getattr(self, field)[index] = value
+
+    def mark_to_market(self, indices: np.ndarray, bids: np.ndarray, asks: np.ndarray) -> None:
+        """
+        Updates market value and unrealised PnL, as
+        Position.update_market_value.
+        """
+        midpoint = (bids + asks) / 2
+        self.market_value[indices] = self.quantity[indices] * midpoint * np.sign(self.net[indices])
+        self.unrealised_pnl[indices] = self.market_value[indices] - self.cost_basis[indices]
+
+    def values(self, indices: np.ndarray) -> np.ndarray:
+        """
+        The contributions of positions to the portfolio equity.
+        """
+        return self.market_value[indices] - self.cost_basis[indices] + self.realised_pnl[indices]
+
+    def get_state(self) -> Dict[str, Any]:
+        state = {field: getattr(self, field) for field in FIELDS}
+        state["tickers"] = list(self.tickers)
+        state["action"] = self.action
+        return state
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        self.tickers = list(state["tickers"])
+        for field in FIELDS + ("action",):
+            setattr(self, field, state[field].copy())
+
+    def close(self, index: int) -> None:
+        """
+        Frees the slot of a position. Its fields keep their values until
+        the slot is opened again.
+        """
+        self.action[index] = 0
+        self.tickers[index] = None
+
+
+class PositionView(object):
+    """
+    Read-only, Position-like view of one slot of a PositionBook.
+    """
+    __slots__ = ("book", "index")
+
+    def __init__(self, book: PositionBook, index: int) -> None:
+        self.book = book
+        self.index = index
+
+    @property
+    def ticker(self) -> str:
+        return self.book.tickers[self.index]
+
+    @property
+    def action(self) -> str:
+        return "BOT" if self.book.action[self.index] == BOT else "SLD"
+
+    def __getattr__(self, name: str) -> float:
+        if name in FIELDS:
+            return float(getattr(self.book, name)[self.index])
+        raise AttributeError(name)
+
+
+class PositionBookView(Mapping):
+    """
+    Mapping of ticker -> PositionView over the open positions of a
+    PositionBook, so code written against Portfolio.positions keeps
+    working.
+    """
+    def __init__(self, book: PositionBook, price_handler) -> None:
+        self.book = book
+        self.price_handler = price_handler
+
+    def __getitem__(self, ticker: str) -> PositionView:
+        index = self.price_handler.get_ticker_index(ticker)
+        if index is None or index >= len(self.book.action) or self.book.action[index] == 0:
+            raise KeyError(ticker)
+        return PositionView(self.book, index)
+
+    def __iter__(self) -> Iterator[str]:
+        return (self.book.tickers[index] for index in self.book.open_indices.tolist())
+
+    def __len__(self) -> int:
+        return len(self.book)
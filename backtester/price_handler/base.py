@@ -1,7 +1,12 @@
-from typing import Union, Optional, Tuple, Any
+from typing import Union, Optional, Tuple, Any, Sequence, Dict
 from abc import ABC, abstractmethod
 
-from backtester.event import BarEvent, TickEvent
+import numpy as np
+import pandas as pd
+
+from backtester.event import BarEvent, BarSliceEvent, TickEvent, EventType
+
+NAT = np.iinfo(np.int64).min
 
 
 class PriceHandler(ABC):
@@ -16,9 +21,20 @@ class PriceHandler(ABC):
     This will replicate how a live strategy would function as current
     tick/bar data would be streamed via a brokerage. Thus a historic and live
     system will be treated identically by the rest of the QSTrader suite.
+
+    The latest close, bid, ask and timestamp (int64 nanoseconds) of every
+    subscribed ticker are kept in NumPy arrays. The tickers dict maps each
+    ticker symbol to its integer index into these arrays, which allows
+    bulk lookups such as get_last_closes. Indices are handed out by a
+    counter and never reused, not even after an unsubscribe.
     """
     tickers: dict = None
+    _next_index: int = 0
     data: dict = None
+    last_close: np.ndarray = None
+    last_bid: np.ndarray = None
+    last_ask: np.ndarray = None
+    last_timestamp: np.ndarray = None
 
     @abstractmethod
     def istick(self) -> bool:
@@ -36,53 +52,141 @@ class PriceHandler(ABC):
     def continue_backtest(self):
         raise NotImplementedError("This method has not been implemented.")
 
+    def _add_ticker(self, ticker: str) -> int:
+        """
+        Registers a ticker and returns its index into the price arrays.
+        The arrays grow by doubling so repeated subscriptions are cheap.
+        """
+        if self.tickers is None:
+            self.tickers = {}
+        index = self._next_index
+        self._next_index = index + 1
+        capacity = 0 if self.last_close is None else len(self.last_close)
+        if index >= capacity:
+            capacity = max(8, 2 * capacity)
+            self.last_close = self._grow(self.last_close, capacity, np.nan, np.float64)
+            self.last_bid = self._grow(self.last_bid, capacity, np.nan, np.float64)
+            self.last_ask = self._grow(self.last_ask, capacity, np.nan, np.float64)
+            self.last_timestamp = self._grow(self.last_timestamp, capacity, NAT, np.int64)
+        self.tickers[ticker] = index
+        return index
+
+    @staticmethod
+    def _grow(values: Optional[np.ndarray], capacity: int, fill: Any, dtype: type) -> np.ndarray:
+        grown = np.full(capacity, fill, dtype=dtype)
+        if values is not None:
+            grown[:len(values)] = values
+        return grown
+
+    def get_ticker_index(self, ticker: str) -> Optional[int]:
+        """
+        Returns the index of a ticker into the price arrays.
+        """
+        return self.tickers.get(ticker)
+
+    def get_ticker_indices(self, tickers: Sequence[str]) -> np.ndarray:
+        """
+        Returns the indices of several tickers into the price arrays.
+        """
+        return np.fromiter((self.tickers[ticker] for ticker in tickers), dtype=np.intp, count=len(tickers))
+
     def unsubscribe_ticker(self, ticker):
         """
         Unsubscribes the price handler from a current ticker symbol.
+
+        The slot of the ticker in the price arrays is cleared but not
+        reused, so the indices of the other tickers remain valid.
         """
-        try:
-            self.tickers.pop(ticker, None)
-            self.data.pop(ticker, None)
-        except KeyError:
+        index = self.tickers.pop(ticker, None)
+        if index is None:
             print("Could not unsubscribe ticker %s as it was never subscribed." % ticker)
+            return
+        self.last_close[index] = np.nan
+        self.last_bid[index] = np.nan
+        self.last_ask[index] = np.nan
+        self.last_timestamp[index] = NAT
+        self.data.pop(ticker, None)
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Returns the latest prices and the position in the stream, for a
+        session snapshot. Only handlers that can resume their stream
+        from a snapshot implement it.
+        """
+        raise NotImplementedError(f"Snapshots have not been implemented for {self.__class__.__name__}.")
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        raise NotImplementedError(f"Snapshots have not been implemented for {self.__class__.__name__}.")
+
+    def _get_price_state(self) -> Dict[str, Any]:
+        """
+        Returns the latest prices of the subscribed tickers, for
+        get_state.
+        """
+        indices = np.fromiter(self.tickers.values(), dtype=np.intp, count=len(self.tickers))
+        return {
+            "tickers": list(self.tickers),
+            "indices": indices,
+            "last_close": self.last_close[indices],
+            "last_bid": self.last_bid[indices],
+            "last_ask": self.last_ask[indices],
+            "last_timestamp": self.last_timestamp[indices],
+        }
+
+    def _set_price_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restores the latest prices saved by _get_price_state. The
+        tickers of the snapshot must be subscribed, at the same indices.
+        """
+        tickers = state["tickers"]
+        indices = state["indices"]
+        for ticker, index in zip(tickers, indices.tolist()):
+            if self.tickers.get(ticker) != index:
+                raise ValueError(f"Ticker {ticker} of the snapshot is not subscribed at index {index}.")
+        self.last_close[indices] = state["last_close"]
+        self.last_bid[indices] = state["last_bid"]
+        self.last_ask[indices] = state["last_ask"]
+        self.last_timestamp[indices] = state["last_timestamp"]
 
     def get_last_timestamp(self, ticker):
         """
         Returns the most recent actual timestamp for a given ticker
         """
-        if ticker in self.tickers:
-            timestamp = self.tickers[ticker]["timestamp"]
-            return timestamp
+        index = self.tickers.get(ticker)
+        if index is not None and self.last_timestamp[index] != NAT:
+            return pd.Timestamp(int(self.last_timestamp[index]))
         else:
             print("Timestamp for ticker %s is not available from the %s." % (ticker, self.__class__.__name__))
             return None
 
-    def _store_event(self, event: Union[BarEvent, TickEvent]) -> None:
+    def _store_event(self, event: Union[BarEvent, BarSliceEvent, TickEvent]) -> None:
         """
         Store price event for closing price and adjusted closing price
         """
-        if event.type == BarEvent:
-            ticker = event.ticker
-            self.tickers[ticker]["close"] = event.close_price
-            self.tickers[ticker]["adj_close"] = event.close_price
-            self.tickers[ticker]["timestamp"] = event.time
-        elif event.type == TickEvent:
-            ticker = event.ticker
-            self.tickers[ticker]["bid"] = event.bid
-            self.tickers[ticker]["ask"] = event.ask
-            self.tickers[ticker]["timestamp"] = event.time
+        if event.type == EventType.BARS:
+            self.last_close[event.indices] = event.close_price
+            self.last_timestamp[event.indices] = pd.Timestamp(event.time).value
+            return
+        index = self.tickers[event.ticker]
+        if event.type == EventType.BAR:
+            self.last_close[index] = event.close_price
+        elif event.type == EventType.TICK:
+            self.last_bid[index] = event.bid
+            self.last_ask[index] = event.ask
         else:
             raise NotImplementedError(f"Event-type {event.type} has not been implemented for the price-handler.")
+        self.last_timestamp[index] = pd.Timestamp(event.time).value
 
     def get_best_bid_ask(self, ticker: str) -> Tuple[Any, Any]:
         """
         Returns the most recent bid/ask price for a ticker.
         """
-        if ticker in self.tickers:
-            if "bid" in self.tickers[ticker] & "ask" in self.tickers[ticker]:
-                bid = self.tickers[ticker]["bid"]
-                ask = self.tickers[ticker]["ask"]
-                return bid, ask
+        index = self.tickers.get(ticker)
+        if index is not None:
+            bid = self.last_bid[index]
+            ask = self.last_ask[index]
+            if not (np.isnan(bid) or np.isnan(ask)):
+                return float(bid), float(ask)
         print(f"Bid/ask values for ticker {ticker} are not available from the PriceHandler.")
         return None, None
 
@@ -90,9 +194,24 @@ class PriceHandler(ABC):
         """
         Returns the most recent actual (unadjusted) closing price.
         """
-        if ticker in self.tickers:
-            if "close" in self.tickers[ticker]:
-                close_price = self.tickers[ticker]["close"]
-                return close_price
+        index = self.tickers.get(ticker)
+        if index is not None:
+            close_price = self.last_close[index]
+            if not np.isnan(close_price):
+                return float(close_price)
         print(f"Close price for ticker {ticker} is not available from the PriceHandler.")
         return None
+
+    def get_best_bid_asks(self, ticker_indices: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Returns the most recent bid and ask prices for an array of
+        ticker indices. Missing prices are NaN.
+        """
+        return self.last_bid[ticker_indices], self.last_ask[ticker_indices]
+
+    def get_last_closes(self, ticker_indices: np.ndarray) -> np.ndarray:
+        """
+        Returns the most recent closing prices for an array of ticker
+        indices. Missing prices are NaN.
+        """
+        return self.last_close[ticker_indices]
@@ -0,0 +1,127 @@
+from typing import Dict, Optional, Tuple
+from datetime import date
+import hashlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from backtester.price_handler.pandas import OHLCVDataFrameReader, OHLCV_COLUMNS, clean_ohlcv
+
+
+class CachedOHLCVDataFrameReader(OHLCVDataFrameReader):
+    """
+    Wraps an OHLCVDataFrameReader and keeps the cleaned frame of every
+    ticker on disk as memory-mapped .npy arrays.
+
+    An entry is keyed by the ticker id, the requested date range, the
+    bar period and a source fingerprint, so a change of any of them
+    reads the source again. Every column of the frame is stored as its
+    own array. Hits open the arrays with np.load(mmap_mode='r') and wrap
+    them in a DataFrame without parsing or copying. The least recently
+    used entries are evicted once the cache exceeds max_bytes.
+
+    The cache directory can be shared by several processes, e.g. the
+    workers of a ParameterSweep: entries are written to a temporary
+    directory and renamed into place.
+    """
+    cleaned = True
+
+    def __init__(
+            self,
+            reader: OHLCVDataFrameReader,
+            cache_dir: str,
+            fingerprint: str = "",
+            max_bytes: Optional[int] = None,
+            period: int = 86400,
+    ) -> None:
+        """
+        :param reader: The source reader.
+        :param cache_dir: Directory holding the cache entries.
+        :param fingerprint: Identifies the state of the source, e.g. a database snapshot
+            or file checksum. Entries written under another fingerprint are not reused.
+        :param max_bytes: Size budget of the cache directory. None for unbounded.
+        :param period: Length in seconds of the bars of the source, which selects how
+            they are cleaned, see clean_ohlcv.
+        """
+        super().__init__()
+        self.reader = reader
+        self.cache_dir = cache_dir
+        self.fingerprint = fingerprint
+        self.max_bytes = max_bytes
+        self.period = period
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _entry_path(self, ticker_id: int, start: date, end: date) -> str:
+        key = f"{ticker_id}|{start}|{end}|{self.period}|{self.fingerprint}|ohlcv"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{ticker_id}-{digest}")
+
+    def read_ohlcv(self, ticker_id: int, start: date, end: date) -> pd.DataFrame:
+        """
+        Returns the cleaned frame of a ticker, from the cache if present.
+        The returned frame is backed by read-only memory maps.
+        """
+        path = self._entry_path(ticker_id=ticker_id, start=start, end=end)
+        try:
+            index, columns = self._load_entry(path)
+        except FileNotFoundError:
+            df = clean_ohlcv(
+                self.reader.read_ohlcv(ticker_id=ticker_id, start=start, end=end),
+                start=start, end=end, period=self.period
+            )
+            self._store_entry(path, df)
+            index, columns = self._load_entry(path)
+            self._evict()
+        return pd.DataFrame(columns, index=pd.DatetimeIndex(index), copy=False)
+
+    @staticmethod
+    def _load_entry(path: str) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        index = np.load(os.path.join(path, "index.npy"), mmap_mode="r")
+        columns = {}
+        for column in OHLCV_COLUMNS:
+            column_path = os.path.join(path, f"{column}.npy")
+            if column == "close_price" or os.path.exists(column_path):
+                columns[column] = np.load(column_path, mmap_mode="r")
+        # Mark the entry as recently used for the LRU eviction
+        os.utime(path)
+        return index, columns
+
+    def _store_entry(self, path: str, df: pd.DataFrame) -> None:
+        tmp = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            np.save(os.path.join(tmp, "index.npy"), np.asarray(df.index, dtype="datetime64[ns]"))
+            for column in df.columns:
+                np.save(os.path.join(tmp, f"{column}.npy"), df[column].to_numpy(dtype=np.float64))
+            os.replace(tmp, path)
+        except OSError:
+            # Another process stored the same entry first
+            shutil.rmtree(tmp, ignore_errors=True)
+
+    def _evict(self) -> None:
+        """
+        Removes the least recently used entries until the cache fits
+        within max_bytes.
+        """
+        if self.max_bytes is None:
+            return
+        entries = []
+        total = 0
+        for name in os.listdir(self.cache_dir):
+            path = os.path.join(self.cache_dir, name)
+            if name.startswith(".tmp-") or not os.path.isdir(path):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path))
+                entries.append((os.path.getmtime(path), size, path))
+            except FileNotFoundError:
+                continue
+            total += size
+
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            total -= size
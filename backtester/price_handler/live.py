@@ -0,0 +1,92 @@
+from typing import AsyncIterator, List, Optional, Union
+from abc import abstractmethod
+from collections import deque
+import asyncio
+import threading
+
+from backtester.price_handler.base import PriceHandler
+from backtester.event import BarEvent, TickEvent, EODEvent, EventType
+
+PriceEvent = Union[BarEvent, TickEvent, EODEvent]
+
+
+class AsyncPriceHandler(PriceHandler):
+    """
+    AsyncPriceHandler is a base class for price handlers of live feeds
+    that are awaited instead of polled, for use with an
+    AsyncTradingSession.
+
+    Subclasses implement stream, an async iterator that waits for the
+    next price from the feed, stores it and yields its event.
+    """
+
+    @abstractmethod
+    def stream(self) -> AsyncIterator[PriceEvent]:
+        pass
+
+    def stream_next(self) -> None:
+        raise NotImplementedError("An AsyncPriceHandler is consumed through stream by an AsyncTradingSession.")
+
+    @property
+    def continue_backtest(self) -> bool:
+        return False
+
+
+class FeedPriceHandler(AsyncPriceHandler):
+    def __init__(self, tickers: List[str], tick: bool = True) -> None:
+        """
+        Live price handler fed by the callbacks of a broker or market
+        data client, or by a fake feed in tests.
+
+        Events are handed over with publish, which may be called from
+        any thread, and streamed in the order they were published.
+        Events published before the stream has started are buffered.
+
+        :param tickers: Ticker symbols of the feed.
+        :param tick: True if the feed publishes TickEvents, False for BarEvents.
+        """
+        self.tick = tick
+        self.tickers = {}
+        self.data = {}
+        for ticker in tickers:
+            self._add_ticker(ticker)
+        self.pending = deque()
+        self.events: Optional[asyncio.Queue] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.lock = threading.Lock()
+
+    def istick(self) -> bool:
+        return self.tick
+
+    def isbar(self) -> bool:
+        return not self.tick
+
+    def publish(self, event: Optional[PriceEvent]) -> None:
+        """
+        Hands a price event to the stream. None ends the stream.
+        """
+        with self.lock:
+            if self.loop is None:
+                self.pending.append(event)
+                return
+        self.loop.call_soon_threadsafe(self.events.put_nowait, event)
+
+    def close(self) -> None:
+        """
+        Ends the stream after the events published so far.
+        """
+        self.publish(None)
+
+    async def stream(self) -> AsyncIterator[PriceEvent]:
+        with self.lock:
+            self.events = asyncio.Queue()
+            while self.pending:
+                self.events.put_nowait(self.pending.popleft())
+            self.loop = asyncio.get_running_loop()
+        while True:
+            event = await self.events.get()
+            if event is None:
+                return
+            if event.type != EventType.EOD:
+                self._store_event(event)
+            yield event
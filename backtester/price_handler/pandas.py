@@ -1,22 +1,195 @@
-from typing import Optional, List, Iterator
+from typing import Any, Dict, Optional, List, Iterator, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
 from queue import Queue
-from datetime import datetime, date
+import heapq
+import itertools
+import numbers
+from datetime import date
 from abc import abstractmethod
 
+import numpy as np
 import pandas as pd
 
 from backtester.price_handler.base import PriceHandler
-from backtester.event import BarEvent, EODEvent, EventType
+from backtester.event import BarEvent, BarSliceEvent, EODEvent, EventType
+
+_NS_PER_DAY = 86400 * 10 ** 9
+_EOD_OFFSET_NS = (23 * 3600 + 59 * 60 + 59) * 10 ** 9
+_CHUNK_SIZE = 65536
+# Midnight of the first Monday after the Unix epoch, which was a Thursday
+_MONDAY_NS = 4 * _NS_PER_DAY
+
+# Columns of a cleaned frame. Only close_price is required: a missing open,
+# high or low is taken to be the close and a missing volume is _VOLUME
+OHLCV_COLUMNS = ("open_price", "high_price", "low_price", "close_price", "volume")
+_VOLUME = 100000000000000
+
+
+def normalize_ohlcv(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Renames the columns of a reader's frame to OHLCV_COLUMNS and drops
+    any others. Columns are recognised by name, e.g. 'Open', 'high' or
+    'close_price'. A frame without a recognised close column must have
+    a single column, which is taken to be the close.
+    """
+    columns = {}
+    for column in df.columns:
+        name = str(column).lower()
+        name = name if name.endswith("_price") or name == "volume" else f"{name}_price"
+        if name in OHLCV_COLUMNS and name not in columns.values():
+            columns[column] = name
+    if "close_price" not in columns.values():
+        if len(df.columns) != 1:
+            raise ValueError(f"Could not find a close column among {list(df.columns)}")
+        columns = {df.columns[0]: "close_price"}
+    names = [name for name in OHLCV_COLUMNS if name in columns.values()]
+    if list(df.columns) == names:
+        return df
+    order = {name: column for column, name in columns.items()}
+    return pd.DataFrame({name: df[order[name]] for name in names}, index=df.index)
+
+
+def clean_ohlcv(df: pd.DataFrame, start: date, end: date, period: int = 86400) -> pd.DataFrame:
+    """
+    Normalizes the columns of a ticker's frame (see normalize_ohlcv) and
+    fills the gaps in its history.
+
+    Daily frames are reindexed to every calendar day between start and
+    the last available date. Missing prices are filled by interpolation
+    and missing volumes with zero. Intraday frames are only cut to the
+    dates from start to end and stripped of bars without a close, as
+    there is no sensible way to fill e.g. the nights.
+    """
+    df = normalize_ohlcv(df)
+    if period < 86400:
+        df = df.sort_index()
+        times = df.index
+        keep = df["close_price"].notna().to_numpy()
+        if start is not None:
+            keep = keep & (times >= pd.Timestamp(start).normalize())
+        if end is not None:
+            keep = keep & (times < pd.Timestamp(end).normalize() + pd.Timedelta(days=1))
+        return df[keep]
+
+    df = df.reindex(pd.date_range(start=start, end=min(end, df.index.max())))
+    filled = df["close_price"].isna().to_numpy()
+    df.loc[:, :] = df.interpolate()
+    df.loc[:, :] = df.bfill().ffill()
+    if "volume" in df.columns:
+        df.loc[filled, "volume"] = 0
+    return df
+
+
+def clean_ohlcv_batch(frames: Dict[str, pd.DataFrame], start: date, end: date, period: int = 86400) -> Dict[str, pd.DataFrame]:
+    """
+    Cleans the frames of many tickers as clean_ohlcv does, returning
+    a dict of ticker name -> cleaned frame.
+
+    Daily frames are joined into one wide frame, which is reindexed,
+    interpolated and filled in a single pass per step, and then split
+    again, each ticker ending at its own last available date.
+    """
+    frames = {name: normalize_ohlcv(df) for name, df in frames.items()}
+    if period < 86400 or not frames:
+        return {name: clean_ohlcv(df, start=start, end=end, period=period) for name, df in frames.items()}
+
+    last_dates = {name: min(end, df.index.max()) for name, df in frames.items()}
+    wide = pd.concat(frames, axis=1)
+    wide = wide.reindex(pd.date_range(start=start, end=max(last_dates.values())))
+    filled = wide.xs("close_price", axis=1, level=1).isna()
+    wide = wide.interpolate().bfill().ffill()
+
+    # Split the wide frame again from its values, without per-ticker pandas indexing
+    values = wide.to_numpy(dtype=np.float64)
+    filled = filled.to_numpy()
+    positions = {column: i for i, column in enumerate(wide.columns)}
+    close_positions = {name: i for i, name in enumerate(frames)}
+    cleaned = {}
+    for name, df in frames.items():
+        n = int(wide.index.searchsorted(last_dates[name], side="right"))
+        ticker = values[:n, [positions[(name, column)] for column in df.columns]]
+        if "volume" in df.columns:
+            ticker[filled[:n, close_positions[name]], list(df.columns).index("volume")] = 0
+        cleaned[name] = pd.DataFrame(ticker, index=wide.index[:n], columns=df.columns)
+    return cleaned
+
+
+def _bucket_starts(times: np.ndarray, period: int) -> np.ndarray:
+    """
+    Returns the start, in int64 nanoseconds, of the bar of period
+    seconds that each of the int64 nanosecond times falls into.
+
+    Bars of up to a day are counted from midnight of 1970-01-01, so a
+    period dividing a day gives bars aligned to midnight. Longer bars
+    are counted from midnight of Monday 1970-01-05, so 7-day bars run
+    from Monday to Sunday.
+    """
+    period_ns = period * 10 ** 9
+    anchor = 0 if period <= 86400 else _MONDAY_NS
+    return times - (times - anchor) % period_ns
+
+
+def resample_ohlcv(df: pd.DataFrame, period: int) -> pd.DataFrame:
+    """
+    Aggregates the bars of a time-sorted, cleaned frame to bars of
+    period seconds, aligned to midnight, in one vectorized pass. Bars
+    longer than a day are counted from a Monday, so 7-day bars run from
+    Monday to Sunday.
+
+    Each bar has the first open, the highest high, the lowest low, the
+    last close and the total volume of its source bars. It is labelled
+    with the time of its last source bar, so in a merged timeline it
+    follows all the data it summarises. Frames without open, high or
+    low columns get them from the closes.
+    """
+    times = np.asarray(df.index, dtype="datetime64[ns]").view(np.int64)
+    if len(times) == 0:
+        return df
+    buckets = _bucket_starts(times, period)
+    starts = np.flatnonzero(np.concatenate(([True], buckets[1:] != buckets[:-1])))
+    ends = np.append(starts[1:], len(times)) - 1
+
+    close = df["close_price"].to_numpy(dtype=np.float64)
+    columns = {
+        "open_price": df["open_price"].to_numpy(dtype=np.float64)[starts] if "open_price" in df else close[starts],
+        "high_price": np.maximum.reduceat(df["high_price"].to_numpy(dtype=np.float64) if "high_price" in df else close, starts),
+        "low_price": np.minimum.reduceat(df["low_price"].to_numpy(dtype=np.float64) if "low_price" in df else close, starts),
+        "close_price": close[ends],
+    }
+    if "volume" in df:
+        columns["volume"] = np.add.reduceat(df["volume"].to_numpy(dtype=np.float64), starts)
+    return pd.DataFrame(columns, index=df.index[ends])
 
 
 class OHLCVDataFrameReader:
+    # True for readers whose frames have already been through clean_ohlcv
+    cleaned: bool = False
+
     def __init__(self):
         pass
 
     @abstractmethod
     def read_ohlcv(self, ticker_id: int, start: date, end: date) -> pd.DataFrame:
+        """
+        Returns the bars of a ticker indexed by time, either as a single
+        column of closing prices or as open, high, low, close and
+        (optionally) volume columns, see normalize_ohlcv.
+        """
         pass
 
+    def iter_ohlcv(self, ticker_id: int, start: date, end: date, chunk_size: int) -> Iterator[pd.DataFrame]:
+        """
+        Returns the data of read_ohlcv as consecutive, time-ordered chunks
+        of at most chunk_size rows.
+
+        The default implementation reads the full frame and slices it.
+        Readers backed by a database or files should override this to
+        fetch one chunk at a time.
+        """
+        df = self.read_ohlcv(ticker_id=ticker_id, start=start, end=end)
+        for i in range(0, len(df), chunk_size):
+            yield df.iloc[i:i + chunk_size]
+
 
 class OHLCVPriceHandler(PriceHandler):
     def __init__(
@@ -27,6 +200,12 @@ class OHLCVPriceHandler(PriceHandler):
             reader: OHLCVDataFrameReader,
             start_date: Optional[date] = None,
             end_date: Optional[date] = None,
+            streaming: bool = False,
+            chunk_size: int = 10000,
+            period: int = 86400,
+            bar_period: Union[None, int, List[Optional[int]]] = None,
+            max_workers: Optional[int] = None,
+            batch: bool = False,
     ) -> None:
         """
 
@@ -35,6 +214,23 @@ class OHLCVPriceHandler(PriceHandler):
         :param events_queue:
         :param start_date:
         :param end_date:
+        :param streaming: Merge per-ticker chunk iterators on the fly instead of loading
+            all the data up front. Peak memory then depends on the number of tickers
+            and the chunk size, not on the length of the history.
+        :param chunk_size: Rows per chunk requested from the reader in streaming mode.
+        :param period: Length in seconds of the bars returned by the reader, e.g. 60 for
+            minute bars.
+        :param bar_period: Length in seconds of the bars to stream, a multiple of period.
+            The bars of the reader are resampled once at load time. One value for all
+            tickers or one per ticker, None to stream the bars of the reader as they are.
+            The same ticker id can be subscribed under several names to stream it at
+            several periods in one timeline. Bars longer than a day must be whole
+            weeks and are counted from a Monday, see resample_ohlcv.
+        :param max_workers: Number of threads reading tickers concurrently when not
+            streaming. None for the ThreadPoolExecutor default, 1 for a reader that
+            must not be called from several threads.
+        :param batch: Stream one BarSliceEvent with the bars of all tickers per timestamp
+            instead of one BarEvent per ticker, for strategies implementing on_bars.
         """
         self.cnt_backtest = True
         self.events_queue = events_queue
@@ -42,13 +238,34 @@ class OHLCVPriceHandler(PriceHandler):
         self.ticker_names = ticker_names
         self.tickers = {}
         self.data = {}
+        self.periods = {}
         self.reader = reader
         self.start_date = start_date
         self.end_date = end_date
-        for ticker_id, ticker_name in zip(self.ticker_ids, self.ticker_names):
-            self.subscribe_tickers(ticker_id=ticker_id, ticker_name=ticker_name)
+        self.streaming = streaming
+        self.chunk_size = chunk_size
+        self.period = period
+        self.max_workers = max_workers
+        self.batch = batch
+        self.streams = {}
+        # Time of the last streamed event, and of the checkpoint a session resumes from
+        self.cursor = None
+        self.resume_after = None
 
-        self.bar_stream = self._merge_sort_ticker_data()
+        if bar_period is None or isinstance(bar_period, numbers.Integral):
+            bar_periods = [bar_period] * len(self.ticker_ids)
+        else:
+            bar_periods = list(bar_period)
+        if self.streaming:
+            for ticker_id, ticker_name, ticker_period in zip(self.ticker_ids, self.ticker_names, bar_periods):
+                self.subscribe_ticker_stream(ticker_id=ticker_id, ticker_name=ticker_name, bar_period=ticker_period)
+        else:
+            self.subscribe_ticker_batch(ticker_ids=self.ticker_ids, ticker_names=self.ticker_names, bar_periods=bar_periods)
+
+        if self.streaming:
+            self.bar_stream = self._merge_ticker_streams()
+        else:
+            self.bar_stream = self._merge_sort_ticker_data()
 
     def istick(self) -> bool:
         return False
@@ -60,53 +277,432 @@ class OHLCVPriceHandler(PriceHandler):
     def continue_backtest(self) -> bool:
         return self.cnt_backtest
 
-    def subscribe_tickers(self, ticker_id: int, ticker_name: str) -> None:
+    def _check_bar_period(self, bar_period: Optional[int]) -> int:
+        """
+        Returns the period of the streamed bars of a ticker. Bars longer
+        than a day must be whole weeks, as they are counted from a Monday.
+        """
+        if bar_period is None:
+            return self.period
+        if bar_period < self.period or bar_period % self.period:
+            raise ValueError(f"bar_period {bar_period} is not a multiple of the reader period {self.period}")
+        if bar_period > 86400 and bar_period % (7 * 86400):
+            raise ValueError(f"bar_period {bar_period} is longer than a day but not a multiple of a week")
+        return bar_period
+
+    def subscribe_tickers(self, ticker_id: int, ticker_name: str, bar_period: Optional[int] = None) -> None:
         """
         Will remove any existing tickers...
         """
 
         if ticker_name not in self.tickers:
+            period = self._check_bar_period(bar_period)
             try:
                 df = self.reader.read_ohlcv(ticker_id=ticker_id, start=self.start_date, end=self.end_date)
-                df = df.reindex(pd.date_range(start=self.start_date, end=min(self.end_date, df.index.max())))
-                df.loc[:, :] = df.interpolate()
-                df.loc[:, :] = df.bfill().ffill()
-                df.columns = ["close_price"]
+                if not self.reader.cleaned:
+                    df = clean_ohlcv(df, start=self.start_date, end=self.end_date, period=self.period)
+                if period != self.period:
+                    df = resample_ohlcv(df, period=period)
                 df.loc[:, "ticker_name"] = ticker_name
                 df.loc[:, "ticker_id"] = ticker_id
 
                 self.data[ticker_name] = df
-                self.tickers[ticker_name] = dict()
+                self.periods[ticker_name] = period
+                self._add_ticker(ticker_name)
             except OSError:
                 print(f"Could not subscribe ticker {ticker_name} as no data CSV found for pricing.")
         else:
             print(f"Could not subscribe ticker {ticker_name} as is already subscribed.")
 
+    def subscribe_ticker_batch(
+            self, ticker_ids: List[int], ticker_names: List[str], bar_periods: Optional[List[Optional[int]]] = None
+    ) -> None:
+        """
+        Subscribes many tickers at once, with the same result and error
+        reporting as calling subscribe_tickers for each of them.
+
+        The frames are read concurrently by a pool of max_workers
+        threads, as reading is usually bound by I/O or a database,
+        and then cleaned together with clean_ohlcv_batch.
+        """
+        if bar_periods is None:
+            bar_periods = [None] * len(ticker_ids)
+        batch = {}
+        for ticker_id, ticker_name, bar_period in zip(ticker_ids, ticker_names, bar_periods):
+            if ticker_name in self.tickers or ticker_name in batch:
+                print(f"Could not subscribe ticker {ticker_name} as is already subscribed.")
+            else:
+                batch[ticker_name] = (ticker_id, self._check_bar_period(bar_period))
+
+        def read(ticker_id: int) -> Optional[pd.DataFrame]:
+            try:
+                return self.reader.read_ohlcv(ticker_id=ticker_id, start=self.start_date, end=self.end_date)
+            except OSError:
+                return None
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            frames = dict(zip(batch, executor.map(read, [ticker_id for ticker_id, _ in batch.values()])))
+        for ticker_name, df in frames.items():
+            if df is None:
+                print(f"Could not subscribe ticker {ticker_name} as no data CSV found for pricing.")
+        frames = {ticker_name: df for ticker_name, df in frames.items() if df is not None}
+        if not self.reader.cleaned:
+            frames = clean_ohlcv_batch(frames, start=self.start_date, end=self.end_date, period=self.period)
+
+        for ticker_name, df in frames.items():
+            ticker_id, period = batch[ticker_name]
+            if period != self.period:
+                df = resample_ohlcv(df, period=period)
+            df = df.assign(ticker_name=ticker_name, ticker_id=ticker_id)
+
+            self.data[ticker_name] = df
+            self.periods[ticker_name] = period
+            self._add_ticker(ticker_name)
+
+    def subscribe_ticker_stream(self, ticker_id: int, ticker_name: str, bar_period: Optional[int] = None) -> None:
+        """
+        Subscribes a ticker in streaming mode. The first chunk is read
+        immediately so a missing data source is reported here, the rest
+        is read as the stream is consumed.
+        """
+        if ticker_name not in self.tickers:
+            period = self._check_bar_period(bar_period)
+            try:
+                chunks = self.reader.iter_ohlcv(
+                    ticker_id=ticker_id, start=self.start_date, end=self.end_date, chunk_size=self.chunk_size
+                )
+                first = next(chunks, None)
+            except OSError:
+                print(f"Could not subscribe ticker {ticker_name} as no data CSV found for pricing.")
+            else:
+                if first is not None:
+                    chunks = itertools.chain([first], chunks)
+                chunks = self._clean_chunks(chunks)
+                if period != self.period:
+                    chunks = self._resample_chunks(chunks, period=period)
+                self.streams[ticker_name] = chunks
+                self.periods[ticker_name] = period
+                self._add_ticker(ticker_name)
+        else:
+            print(f"Could not subscribe ticker {ticker_name} as is already subscribed.")
+
+    def _clean_chunks(self, chunks: Iterator[pd.DataFrame]) -> Iterator[pd.DataFrame]:
+        """
+        Applies the same cleanup as subscribe_tickers, one chunk at a
+        time. For daily bars the rows after the last complete row of a
+        chunk are carried over, together with that row, so gaps across a
+        chunk boundary are interpolated as if the data was read in one
+        piece. Only when the stream ends are trailing gaps filled forward.
+        """
+        if self.period < 86400:
+            for chunk in chunks:
+                chunk = clean_ohlcv(chunk, start=self.start_date, end=self.end_date, period=self.period)
+                if len(chunk):
+                    yield chunk
+            return
+
+        start = self.start_date
+        # Reindexed, unfilled rows carried into the next chunk, of which the
+        # first has already been yielded if anchored
+        carry = None
+        anchored = False
+        for chunk in chunks:
+            if len(chunk) == 0:
+                continue
+            chunk = normalize_ohlcv(chunk)
+            if carry is not None:
+                chunk = pd.concat([carry, chunk])
+                start = carry.index[0]
+            chunk = chunk.reindex(pd.date_range(start=start, end=min(self.end_date, chunk.index.max())))
+            # Rows after the last complete row are filled against the next chunk
+            complete = np.flatnonzero(chunk.notna().all(axis=1).to_numpy())
+            if len(complete) == 0:
+                carry = chunk
+                continue
+            last = int(complete[-1])
+            carry = chunk.iloc[last:]
+            cleaned = self._fill_daily(chunk.iloc[:last + 1], skip_first=anchored)
+            anchored = True
+            if len(cleaned):
+                yield cleaned
+        if carry is not None:
+            # The stream has ended, so trailing gaps are filled from the last row
+            cleaned = self._fill_daily(carry, skip_first=anchored)
+            if len(cleaned):
+                yield cleaned
+
+    @staticmethod
+    def _fill_daily(chunk: pd.DataFrame, skip_first: bool) -> pd.DataFrame:
+        """
+        Fills the gaps of a reindexed daily chunk as clean_ohlcv does,
+        optionally dropping its first row.
+        """
+        filled = chunk["close_price"].isna().to_numpy()
+        chunk = chunk.interpolate().bfill().ffill()
+        if "volume" in chunk.columns:
+            chunk.loc[filled, "volume"] = 0
+        return chunk.iloc[1:] if skip_first else chunk
+
+    @staticmethod
+    def _resample_chunks(chunks: Iterator[pd.DataFrame], period: int) -> Iterator[pd.DataFrame]:
+        """
+        Resamples cleaned chunks with resample_ohlcv. The source bars of
+        the last, possibly incomplete, bar of a chunk are carried over
+        to the next chunk.
+        """
+        carry = None
+        for chunk in chunks:
+            if carry is not None:
+                chunk = pd.concat([carry, chunk])
+            times = np.asarray(chunk.index, dtype="datetime64[ns]").view(np.int64)
+            last_bucket = _bucket_starts(times[-1:], period)[0]
+            split = int(np.searchsorted(times, last_bucket))
+            carry = chunk.iloc[split:]
+            if split:
+                yield resample_ohlcv(chunk.iloc[:split], period=period)
+        if carry is not None and len(carry):
+            yield resample_ohlcv(carry, period=period)
+
+    def _merge_ticker_streams(self) -> Iterator:
+        """
+        Merges the per-ticker chunk streams by (timestamp, ticker code)
+        with a heap and inserts an end-of-day marker after the last bar
+        of each date.
+        """
+        names = list(self.streams.keys())
+        streams = list(self.streams.values())
+        if self.resume_after is not None:
+            streams = [self._skip_chunks(stream, self.resume_after) for stream in streams]
+        rows = heapq.merge(*[self._iter_stream_rows(code, stream) for code, stream in enumerate(streams)])
+        rows = self._insert_eod_rows(rows, eod_code=len(names))
+        periods = [self.periods[name] for name in names]
+        if self.batch:
+            return self._iter_row_slices(
+                names=names, indices=[self.tickers[name] for name in names], periods=periods, rows=rows
+            )
+        return self._iter_events(names=names, periods=periods, rows=rows)
+
+    @staticmethod
+    def _skip_chunks(chunks: Iterator[pd.DataFrame], after: int) -> Iterator[pd.DataFrame]:
+        """
+        Drops the bars of cleaned chunks up to and including the time
+        after, in nanoseconds.
+        """
+        for chunk in chunks:
+            times = np.asarray(chunk.index, dtype="datetime64[ns]").view(np.int64)
+            start = int(np.searchsorted(times, after, side="right"))
+            if start < len(chunk):
+                yield chunk.iloc[start:]
+
+    @staticmethod
+    def _ohlcv_arrays(df: pd.DataFrame) -> List[np.ndarray]:
+        """
+        The open, high, low, close and volume arrays of a cleaned frame,
+        with the defaults of OHLCV_COLUMNS for missing columns.
+        """
+        close = df["close_price"].to_numpy(dtype=np.float64)
+        arrays = [df[column].to_numpy(dtype=np.float64) if column in df else close for column in OHLCV_COLUMNS[:4]]
+        arrays.append(df["volume"].to_numpy(dtype=np.float64) if "volume" in df else np.full(len(df), float(_VOLUME)))
+        return arrays
+
+    @staticmethod
+    def _iter_stream_rows(code: int, chunks: Iterator[pd.DataFrame]) -> Iterator[Tuple]:
+        for chunk in chunks:
+            times = np.asarray(chunk.index, dtype="datetime64[ns]").view(np.int64)
+            columns = [values.tolist() for values in OHLCVPriceHandler._ohlcv_arrays(chunk)]
+            for time, open_price, high_price, low_price, close_price, volume in zip(times.tolist(), *columns):
+                yield time, code, open_price, high_price, low_price, close_price, volume
+
+    @staticmethod
+    def _insert_eod_rows(rows: Iterator[Tuple], eod_code: int) -> Iterator[Tuple]:
+        day = None
+        for row in rows:
+            row_day = row[0] - row[0] % _NS_PER_DAY
+            if day is not None and row_day != day:
+                yield day + _EOD_OFFSET_NS, eod_code, np.nan, np.nan, np.nan, np.nan, np.nan
+            day = row_day
+            yield row
+        if day is not None:
+            yield day + _EOD_OFFSET_NS, eod_code, np.nan, np.nan, np.nan, np.nan, np.nan
+
     def _merge_sort_ticker_data(self) -> Iterator:
-        df = pd.concat(self.data.values())
-        events = df.reset_index().apply(lambda x:
-                               BarEvent(
-                                   ticker=x["ticker_name"],
-                                   time=x["index"],
-                                   period=86400,
-                                   open_price=x["close_price"],
-                                   high_price=x["close_price"],
-                                   low_price=x["close_price"],
-                                   close_price=x["close_price"],
-                                   volume=100000000000000
-                               ),
-                               axis=1).to_list()
-        events = events + df.index.unique().map(lambda x: EODEvent(time=datetime(x.year, x.month, x.day, 23, 59, 59))).to_list()
-
-        events = sorted(events, key=lambda x: x.time, reverse=False)
-        return iter(events)
+        """
+        Builds the merged timeline of all subscribed tickers as flat
+        arrays and returns an iterator that creates the events lazily.
+
+        Bars and end-of-day markers are sorted together in one pass by
+        (timestamp, ticker code). End-of-day markers use the code after
+        the last ticker, so they always follow the bars of their date.
+        """
+        names = list(self.data.keys())
+        eod_code = len(names)
+        if eod_code == 0:
+            return iter([])
+
+        times = []
+        codes = []
+        columns = [[] for _ in OHLCV_COLUMNS]
+        for code, df in enumerate(self.data.values()):
+            times.append(np.asarray(df.index, dtype="datetime64[ns]").view(np.int64))
+            codes.append(np.full(len(df), code, dtype=np.int64))
+            for column, values in zip(columns, self._ohlcv_arrays(df)):
+                column.append(values)
+
+        bar_times = np.concatenate(times)
+        eod_times = np.unique(bar_times - bar_times % _NS_PER_DAY) + _EOD_OFFSET_NS
+
+        times = np.concatenate([bar_times, eod_times])
+        codes = np.concatenate(codes + [np.full(len(eod_times), eod_code, dtype=np.int64)])
+        columns = [np.concatenate(column + [np.full(len(eod_times), np.nan)]) for column in columns]
+
+        order = np.lexsort((codes, times))
+        if self.resume_after is not None:
+            order = order[np.searchsorted(times[order], self.resume_after, side="right"):]
+        periods = [self.periods[name] for name in names]
+        times, codes, columns = times[order], codes[order], [column[order] for column in columns]
+        if self.batch:
+            return self._iter_timeline_slices(
+                names=names, indices=[self.tickers[name] for name in names], periods=periods,
+                times=times, codes=codes, columns=columns
+            )
+        return self._iter_timeline(names=names, periods=periods, times=times, codes=codes, columns=columns)
+
+    @staticmethod
+    def _iter_timeline(
+            names: List[str], periods: List[int], times: np.ndarray, codes: np.ndarray, columns: List[np.ndarray]
+    ) -> Iterator:
+        """
+        Yields one BarEvent or EODEvent per row of the sorted timeline.
+        """
+        def rows():
+            for start in range(0, len(times), _CHUNK_SIZE):
+                stop = start + _CHUNK_SIZE
+                yield from zip(
+                    times[start:stop].tolist(), codes[start:stop].tolist(),
+                    *[column[start:stop].tolist() for column in columns]
+                )
+
+        return OHLCVPriceHandler._iter_events(names=names, periods=periods, rows=rows())
+
+    @staticmethod
+    def _iter_events(names: List[str], periods: List[int], rows: Iterator[Tuple]) -> Iterator:
+        """
+        Creates the events for (timestamp, ticker code, open, high, low,
+        close, volume) rows, where the code after the last ticker marks
+        an end-of-day event.
+        """
+        eod_code = len(names)
+        for time, code, open_price, high_price, low_price, close_price, volume in rows:
+            if code == eod_code:
+                yield EODEvent(time=pd.Timestamp(time))
+            else:
+                yield BarEvent(
+                    ticker=names[code],
+                    time=pd.Timestamp(time),
+                    period=periods[code],
+                    open_price=open_price,
+                    high_price=high_price,
+                    low_price=low_price,
+                    close_price=close_price,
+                    volume=volume
+                )
+
+    @staticmethod
+    def _iter_timeline_slices(
+            names: List[str], indices: List[int], periods: List[int], times: np.ndarray, codes: np.ndarray,
+            columns: List[np.ndarray]
+    ) -> Iterator:
+        """
+        Yields one BarSliceEvent per timestamp of the sorted timeline,
+        holding views of the timeline arrays, and one EODEvent per
+        end-of-day marker.
+        """
+        eod_code = len(names)
+        names = np.array(names, dtype=object)
+        indices = np.asarray(indices, dtype=np.intp)
+        periods = np.asarray(periods, dtype=np.int64)
+        is_eod = codes == eod_code
+        starts = np.union1d(np.flatnonzero(np.diff(times) != 0) + 1, np.flatnonzero(is_eod))
+        bounds = np.union1d(starts, [0, len(times)]).tolist()
+        for start, stop in zip(bounds[:-1], bounds[1:]):
+            if is_eod[start]:
+                yield EODEvent(time=pd.Timestamp(int(times[start])))
+                continue
+            slice_codes = codes[start:stop]
+            yield BarSliceEvent(
+                time=pd.Timestamp(int(times[start])),
+                tickers=names[slice_codes],
+                indices=indices[slice_codes],
+                periods=periods[slice_codes],
+                open_price=columns[0][start:stop],
+                high_price=columns[1][start:stop],
+                low_price=columns[2][start:stop],
+                close_price=columns[3][start:stop],
+                volume=columns[4][start:stop],
+            )
+
+    @staticmethod
+    def _iter_row_slices(names: List[str], indices: List[int], periods: List[int], rows: Iterator[Tuple]) -> Iterator:
+        """
+        Groups (timestamp, ticker code, open, high, low, close, volume)
+        rows with equal timestamps into BarSliceEvents, where the code
+        after the last ticker marks an end-of-day event.
+        """
+        eod_code = len(names)
+        names = np.array(names, dtype=object)
+        indices = np.asarray(indices, dtype=np.intp)
+        periods = np.asarray(periods, dtype=np.int64)
+        for (time, is_eod), group in itertools.groupby(rows, key=lambda row: (row[0], row[1] == eod_code)):
+            if is_eod:
+                for _ in group:
+                    yield EODEvent(time=pd.Timestamp(time))
+                continue
+            _, codes, open_price, high_price, low_price, close_price, volume = zip(*group)
+            codes = np.array(codes, dtype=np.intp)
+            yield BarSliceEvent(
+                time=pd.Timestamp(time),
+                tickers=names[codes],
+                indices=indices[codes],
+                periods=periods[codes],
+                open_price=np.array(open_price, dtype=np.float64),
+                high_price=np.array(high_price, dtype=np.float64),
+                low_price=np.array(low_price, dtype=np.float64),
+                close_price=np.array(close_price, dtype=np.float64),
+                volume=np.array(volume, dtype=np.float64),
+            )
+
+    def get_state(self) -> Dict[str, Any]:
+        state = self._get_price_state()
+        state["cursor"] = self.cursor
+        return state
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restores the latest prices of a snapshot and moves the stream
+        past its cursor, so only bars after the snapshot are streamed.
+        The snapshot must be taken between timestamps, e.g. at the end
+        of a session.
+        """
+        self._set_price_state(state)
+        self.cursor = state["cursor"]
+        self.resume_after = self.cursor
+        if self.streaming:
+            self.bar_stream = self._merge_ticker_streams()
+        else:
+            self.bar_stream = self._merge_sort_ticker_data()
 
     def _store_event(self, event):
         """
-        Store price event for closing price and adjusted closing price
+        Store price event for closing price and adjusted closing price.
+        The times of the bars of this handler are already Timestamps, so
+        a single bar skips the conversion of PriceHandler._store_event.
         """
-        self.tickers[event.ticker]["close"] = event.close_price
-        self.tickers[event.ticker]["timestamp"] = event.time
+        if event.type != EventType.BAR:
+            super()._store_event(event)
+            return
+        index = self.tickers[event.ticker]
+        self.last_close[index] = event.close_price
+        self.last_timestamp[index] = event.time.value
 
     def stream_next(self):
         """
@@ -119,8 +715,9 @@ class OHLCVPriceHandler(PriceHandler):
             return
 
         # Store event
-        if event.type == EventType.BAR:
+        if event.type != EventType.EOD:
             self._store_event(event)
+        self.cursor = event.time.value
 
         # Send event to queue
         self.events_queue.put(event)
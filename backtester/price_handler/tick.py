@@ -0,0 +1,246 @@
+from typing import Any, Dict, Optional, List, Iterator
+from queue import Queue
+from datetime import date
+import os
+
+import numpy as np
+import pandas as pd
+
+from backtester.price_handler.base import PriceHandler
+from backtester.price_handler.pandas import _NS_PER_DAY, _EOD_OFFSET_NS, _CHUNK_SIZE
+from backtester.event import TickEvent, EODEvent
+
+# Record layout of a tick file: nanosecond timestamp, ticker id, bid and ask,
+# little-endian and packed, 28 bytes per tick
+TICK_DTYPE = np.dtype([("time", "<i8"), ("ticker_id", "<i4"), ("bid", "<f8"), ("ask", "<f8")])
+
+
+def write_ticks(path: str, times: np.ndarray, ticker_ids: np.ndarray, bids: np.ndarray, asks: np.ndarray) -> None:
+    """
+    Writes ticks to a file in the TICK_DTYPE layout. The ticks must be
+    sorted by time.
+
+    :param path: File to write.
+    :param times: Timestamps, as datetime64 or int64 nanoseconds.
+    :param ticker_ids: Integer ticker ids.
+    :param bids: Best bid prices.
+    :param asks: Best ask prices.
+    """
+    records = np.empty(len(times), dtype=TICK_DTYPE)
+    records["time"] = np.asarray(times).astype("datetime64[ns]").view(np.int64)
+    records["ticker_id"] = ticker_ids
+    records["bid"] = bids
+    records["ask"] = asks
+    records.tofile(path)
+
+
+class MmapTickPriceHandler(PriceHandler):
+    def __init__(
+            self,
+            ticker_ids: List[int],
+            ticker_names: List[str],
+            events_queue: Queue,
+            paths: List[str],
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            chunk_size: int = _CHUNK_SIZE,
+    ) -> None:
+        """
+        Streams TickEvents from binary tick files in the TICK_DTYPE
+        layout, each sorted by time, e.g. one file per day or per venue.
+
+        The files are memory-mapped and merged in timestamp order one
+        block of at most chunk_size ticks per file at a time, so memory
+        use does not depend on the size of the files. Ticks of other
+        ticker ids are dropped by a lookup array. A TickEvent is only
+        created, and the bid/ask arrays only updated, when a tick is
+        dispatched. An EODEvent follows the last tick of every date.
+
+        :param ticker_ids: Ids of the tickers to stream, as stored in the files.
+        :param ticker_names: Ticker symbols, in the order of ticker_ids.
+        :param events_queue:
+        :param paths: Tick files.
+        :param start_date: First date to stream. None for the start of the files.
+        :param end_date: Last date to stream. None for the end of the files.
+        :param chunk_size: Ticks read from each file per block.
+        """
+        self.cnt_backtest = True
+        self.events_queue = events_queue
+        self.ticker_ids = ticker_ids
+        self.ticker_names = ticker_names
+        self.tickers = {}
+        self.data = {}
+        self.paths = paths
+        self.start_date = start_date
+        self.end_date = end_date
+        self.chunk_size = chunk_size
+
+        self.index_of_id = np.full(max(ticker_ids, default=-1) + 1, -1, dtype=np.intp)
+        self.names = []
+        for ticker_id, ticker_name in zip(self.ticker_ids, self.ticker_names):
+            self.subscribe_ticker(ticker_id=ticker_id, ticker_name=ticker_name)
+
+        self.files = []
+        for path in self.paths:
+            ticks = self._open(path)
+            if ticks is not None:
+                self.files.append(ticks)
+
+        # Time in nanoseconds of the last event streamed
+        self.cursor = None
+        self.tick_stream = self._iter_events()
+
+    def istick(self) -> bool:
+        return True
+
+    def isbar(self) -> bool:
+        return False
+
+    @property
+    def continue_backtest(self) -> bool:
+        return self.cnt_backtest
+
+    def subscribe_ticker(self, ticker_id: int, ticker_name: str) -> None:
+        if ticker_name not in self.tickers:
+            index = self._add_ticker(ticker_name)
+            if ticker_id >= len(self.index_of_id):
+                self.index_of_id = self._grow(self.index_of_id, ticker_id + 1, -1, np.intp)
+            self.index_of_id[ticker_id] = index
+            self.names.extend([None] * (index + 1 - len(self.names)))
+            self.names[index] = ticker_name
+        else:
+            print(f"Could not subscribe ticker {ticker_name} as is already subscribed.")
+
+    def unsubscribe_ticker(self, ticker):
+        """
+        Unsubscribes a ticker. Ticks of the ticker that were already
+        read into the current block are still dispatched.
+        """
+        index = self.tickers.get(ticker)
+        super().unsubscribe_ticker(ticker)
+        if index is not None:
+            self.index_of_id[self.index_of_id == index] = -1
+
+    def _open(self, path: str) -> Optional[np.ndarray]:
+        """
+        Memory-maps a tick file and returns the ticks within the date
+        range, found by binary search on the timestamps.
+        """
+        try:
+            if os.path.getsize(path) == 0:
+                return None
+            ticks = np.memmap(path, dtype=TICK_DTYPE, mode="r")
+        except (OSError, ValueError):
+            print(f"Could not open tick file {path}.")
+            return None
+
+        times = ticks["time"]
+        lo = 0 if self.start_date is None else np.searchsorted(times, pd.Timestamp(self.start_date).normalize().value)
+        hi = len(ticks) if self.end_date is None else np.searchsorted(
+            times, pd.Timestamp(self.end_date).normalize().value + _NS_PER_DAY
+        )
+        return ticks[lo:hi]
+
+    def _merge_files(self) -> Iterator[np.ndarray]:
+        """
+        Yields blocks of ticks from all files in timestamp order.
+
+        Each round reads the next chunk of every file and emits all
+        ticks up to the earliest last timestamp of these chunks, which
+        no later chunk can precede. Ticks with the same timestamp keep
+        the order of the files within a block.
+        """
+        files = self.files
+        cursors = [0] * len(files)
+        while True:
+            active = [i for i in range(len(files)) if cursors[i] < len(files[i])]
+            if not active:
+                return
+            chunks = [files[i][cursors[i]:cursors[i] + self.chunk_size] for i in active]
+            frontier = min(int(chunk["time"][-1]) for chunk in chunks)
+
+            parts = []
+            for i, chunk in zip(active, chunks):
+                n = int(np.searchsorted(chunk["time"], frontier, side="right"))
+                parts.append(chunk[:n])
+                cursors[i] += n
+            block = np.concatenate(parts)
+            if len(parts) > 1:
+                block = block[np.argsort(block["time"], kind="stable")]
+            yield block
+
+    def _iter_events(self) -> Iterator:
+        """
+        Yields the events of the merged ticks of the subscribed tickers,
+        with an EODEvent after the last tick of every date.
+        """
+        day = None
+        for block in self._merge_files():
+            # Subscriptions may have changed since the previous block
+            names = self.names
+            last_bid = self.last_bid
+            last_ask = self.last_ask
+            last_timestamp = self.last_timestamp
+
+            ids = block["ticker_id"]
+            known = (ids >= 0) & (ids < len(self.index_of_id))
+            indices = np.full(len(ids), -1, dtype=np.intp)
+            indices[known] = self.index_of_id[ids[known]]
+            keep = indices >= 0
+            times = block["time"][keep]
+            indices = indices[keep]
+            bids = block["bid"][keep]
+            asks = block["ask"][keep]
+            if len(times) == 0:
+                continue
+
+            # Split the block at date changes so the rows need no date check
+            days = times - times % _NS_PER_DAY
+            starts = np.flatnonzero(days[1:] != days[:-1]) + 1
+            for start, stop in zip([0] + starts.tolist(), starts.tolist() + [len(times)]):
+                row_day = int(days[start])
+                if day is not None and row_day != day:
+                    yield EODEvent(time=pd.Timestamp(day + _EOD_OFFSET_NS))
+                day = row_day
+                # Boxing the timestamps of a whole segment is cheaper than one pd.Timestamp per tick
+                stamps = pd.DatetimeIndex(times[start:stop].view("datetime64[ns]"))
+                for time, stamp, index, bid, ask in zip(
+                        times[start:stop].tolist(), stamps, indices[start:stop].tolist(),
+                        bids[start:stop].tolist(), asks[start:stop].tolist()
+                ):
+                    last_bid[index] = bid
+                    last_ask[index] = ask
+                    last_timestamp[index] = time
+                    yield TickEvent(ticker=names[index], time=stamp, bid=bid, ask=ask)
+        if day is not None:
+            yield EODEvent(time=pd.Timestamp(day + _EOD_OFFSET_NS))
+
+    def stream_next(self):
+        """
+        Place the next TickEvent onto the event queue.
+        """
+        try:
+            event = next(self.tick_stream)
+        except StopIteration:
+            self.cnt_backtest = False
+            return
+        self.cursor = event.time.value
+        self.events_queue.put(event)
+
+    def get_state(self) -> Dict[str, Any]:
+        state = self._get_price_state()
+        state["cursor"] = self.cursor
+        return state
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restores the latest prices of a snapshot and moves every file
+        past its cursor, so only ticks after the snapshot are streamed.
+        The snapshot must be taken between timestamps, e.g. at the end
+        of a session.
+        """
+        self._set_price_state(state)
+        self.cursor = state["cursor"]
+        if self.cursor is not None:
+            self.files = [ticks[np.searchsorted(ticks["time"], self.cursor, side="right"):] for ticks in self.files]
+        self.tick_stream = self._iter_events()
@@ -1,9 +1,12 @@
-from typing import Optional
+from typing import Any, Dict, Optional
+import os
 import pickle
 
 from abc import ABC, abstractmethod
 from datetime import datetime
 
+from backtester.statistics.results import load_results
+
 
 class Statistics(ABC):
     """
@@ -32,15 +35,31 @@ class Statistics(ABC):
         pass
 
     @abstractmethod
-    def plot_results(self, filename: Optional[str]):
+    def plot_results(self, filename: Optional[str], stats: Optional[dict] = None):
         pass
 
     @abstractmethod
     def save(self, filename):
         pass
 
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Returns the buffers of the statistics, for a session snapshot.
+        """
+        raise NotImplementedError(f"Snapshots have not been implemented for {self.__class__.__name__}.")
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        raise NotImplementedError(f"Snapshots have not been implemented for {self.__class__.__name__}.")
+
     @classmethod
     def load(cls, filename):
+        """
+        Opens results saved by save as a lazily loaded Results mapping.
+        Files written by earlier versions, which pickled the Statistics
+        object, are still unpickled.
+        """
+        if os.path.isdir(filename):
+            return load_results(filename)
         with open(filename, 'rb') as fd:
             stats = pickle.load(fd)
         return stats
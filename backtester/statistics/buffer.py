@@ -0,0 +1,92 @@
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+class SeriesBuffer(object):
+    """
+    Growable time series of float values, stored as int64 nanosecond
+    timestamps and float64 values in preallocated NumPy arrays.
+
+    Appending is amortised O(1): the arrays double in size when full.
+    to_series wraps the filled part of the arrays in a read-only pandas
+    Series without copying. The arrays are copied before the next write
+    that would change such a Series, so it keeps the values it had when
+    it was returned.
+
+    Like the dict it replaces, a value appended with the timestamp of an
+    earlier point replaces that point.
+    """
+    def __init__(self, capacity: int = 1024) -> None:
+        self.times = np.empty(capacity, dtype=np.int64)
+        self.values = np.empty(capacity, dtype=np.float64)
+        self.size = 0
+        # True while a Series returned by to_series shares the arrays
+        self.exported = False
+
+    def __len__(self) -> int:
+        return self.size
+
+    def append(self, timestamp: datetime, value: float) -> bool:
+        """
+        Appends a point and returns True, or replaces the last point if
+        it has the same timestamp and returns False.
+        """
+        time = timestamp.value if isinstance(timestamp, pd.Timestamp) else pd.Timestamp(timestamp).value
+        if self.size and self.times[self.size - 1] == time:
+            if self.exported:
+                self._grow(len(self.times))
+            self.values[self.size - 1] = value
+            return False
+        if self.size == len(self.times):
+            self._grow(2 * len(self.times))
+        self.times[self.size] = time
+        self.values[self.size] = value
+        self.size += 1
+        return True
+
+    def _grow(self, capacity: int) -> None:
+        times = np.empty(capacity, dtype=np.int64)
+        values = np.empty(capacity, dtype=np.float64)
+        times[:self.size] = self.times[:self.size]
+        values[:self.size] = self.values[:self.size]
+        self.times = times
+        self.values = values
+        self.exported = False
+
+    def get_state(self) -> dict:
+        return {"times": self.times[:self.size], "values": self.values[:self.size]}
+
+    def set_state(self, state: dict) -> None:
+        self.size = 0
+        if len(state["times"]) > len(self.times) or self.exported:
+            self._grow(max(len(state["times"]), len(self.times)))
+        self.size = len(state["times"])
+        self.times[:self.size] = state["times"]
+        self.values[:self.size] = state["values"]
+
+    def to_series(self) -> pd.Series:
+        """
+        Returns the buffer as a time-sorted pandas Series with one point
+        per timestamp, the value appended last. The Series is read-only
+        and shares memory with the buffer unless the points were appended
+        out of order or with the timestamp of a point other than the
+        previous one.
+        """
+        times = self.times[:self.size]
+        values = self.values[:self.size]
+        if self.size > 1 and np.any(np.diff(times) <= 0):
+            order = np.argsort(times, kind="stable")
+            times = times[order]
+            values = values[order]
+            # Of the points sharing a timestamp, the stable sort puts the last appended last
+            last = np.append(times[1:] != times[:-1], True)
+            times = times[last]
+            values = values[last]
+        else:
+            self.exported = True
+            values = values.view()
+        values.flags.writeable = False
+        index = pd.DatetimeIndex(times.view("datetime64[ns]"), copy=False)
+        return pd.Series(values, index=index, copy=False)
@@ -1,30 +1,86 @@
-from itertools import groupby
-
 import numpy as np
 import pandas as pd
 from scipy.stats import linregress
 
 
+# Calendar fields that make up the group keys of each aggregation period
+PERIOD_FIELDS = {
+    "weekly": ("year", "month", "week"),
+    "monthly": ("year", "month"),
+    "quarterly": ("year", "quarter"),
+    "yearly": ("year",),
+}
+
+
 def aggregate_returns(returns, convert_to):
     """
-    Aggregates returns by day, week, month, or year.
+    Aggregates returns by week, month, quarter or year.
+
+    The result is indexed by (year, month, week), (year, month),
+    (year, quarter) or year respectively.
+    """
+    if convert_to not in PERIOD_FIELDS:
+        raise ValueError(f"convert_to must be one of {', '.join(PERIOD_FIELDS)}, not {convert_to!r}")
+    return aggregate_returns_all(returns, periods=(convert_to,))[convert_to]
+
+
+def aggregate_returns_all(returns, periods=tuple(PERIOD_FIELDS)):
+    """
+    Aggregates returns to several calendar periods at once.
+
+    The log returns and calendar fields are computed once and shared by
+    all periods. Each period is aggregated by summing log returns over
+    integer period codes, so no Python function is called per element.
+
+    Parameters:
+    returns - A pandas Series of period returns with a DatetimeIndex.
+    periods - Names of the periods, see PERIOD_FIELDS.
+
+    Returns:
+    A dict of period name -> Series of compounded returns per period.
     """
-    def cumulate_returns(x):
-        return np.exp(np.log(1 + x).cumsum())[-1] - 1
+    unknown = [p for p in periods if p not in PERIOD_FIELDS]
+    if unknown:
+        raise ValueError(f"periods must be among {', '.join(PERIOD_FIELDS)}, not {unknown}")
+
+    index = pd.DatetimeIndex(returns.index)
+    logs = np.log1p(returns.to_numpy(dtype=np.float64))
+    logs[np.isnan(logs)] = 0.0
+    sorted_index = index.is_monotonic_increasing
+
+    fields = {}
+
+    def field(name):
+        if name not in fields:
+            if name == "week":
+                fields[name] = index.isocalendar().week.to_numpy(dtype=np.int64)
+            else:
+                fields[name] = np.asarray(getattr(index, name), dtype=np.int64)
+        return fields[name]
+
+    aggregated = {}
+    for period in periods:
+        columns = [field(name) for name in PERIOD_FIELDS[period]]
+        code = columns[0]
+        for column in columns[1:]:
+            code = code * 100 + column
+
+        if sorted_index:
+            # Every period is one contiguous run of a sorted index
+            starts = np.flatnonzero(np.concatenate(([True], code[1:] != code[:-1]))) if len(code) else code
+            sums = np.add.reduceat(logs, starts) if len(code) else logs
+            order = np.argsort(code[starts], kind="stable")
+            rows, sums = starts[order], sums[order]
+        else:
+            _, rows, inverse = np.unique(code, return_index=True, return_inverse=True)
+            sums = np.bincount(inverse.ravel(), weights=logs, minlength=len(rows))
 
-    if convert_to == 'weekly':
-        return returns.groupby(
-            [lambda x: x.year,
-             lambda x: x.month,
-             lambda x: x.isocalendar()[1]]).apply(cumulate_returns)
-    elif convert_to == 'monthly':
-        return returns.groupby(
-            [lambda x: x.year, lambda x: x.month]).apply(cumulate_returns)
-    elif convert_to == 'yearly':
-        return returns.groupby(
-            [lambda x: x.year]).apply(cumulate_returns)
-    else:
-        ValueError('convert_to must be weekly, monthly or yearly')
+        if len(columns) == 1:
+            agg_index = pd.Index(columns[0][rows])
+        else:
+            agg_index = pd.MultiIndex.from_arrays([column[rows] for column in columns])
+        aggregated[period] = pd.Series(np.expm1(sums), index=agg_index)
+    return aggregated
 
 
 def create_cagr(equity, periods=252):
@@ -39,7 +95,7 @@ def create_cagr(equity, periods=252):
     periods - Daily (252), Hourly (252*6.5), Minutely(252*6.5*60) etc.
     """
     years = len(equity) / float(periods)
-    return (equity[-1] ** (1.0 / years)) - 1.0
+    return (equity.iloc[-1] ** (1.0 / years)) - 1.0
 
 
 def create_sharpe_ratio(returns, periods=252):
@@ -66,6 +122,44 @@ def create_sortino_ratio(returns, periods=252):
     return np.sqrt(periods) * (np.mean(returns)) / np.std(returns[returns < 0])
 
 
+def create_trade_statistics(trade_pct, entry_times, exit_times):
+    """
+    Summarises closed trades, with one vectorized pass per statistic.
+
+    Parameters:
+    trade_pct - Array of the percentage returns of the trades.
+    entry_times - Array of datetime64 times the trades were opened.
+    exit_times - Array of datetime64 times the trades were closed.
+
+    Returns:
+    A dict with the number of trades, the fraction of winning trades,
+    the average, average winning, average losing, best and worst trade
+    returns, the entry time of the worst trade and the average number
+    of days in a trade.
+    """
+    trade_pct = np.asarray(trade_pct, dtype=np.float64)
+    entry_times = np.asarray(entry_times, dtype="datetime64[ns]")
+    exit_times = np.asarray(exit_times, dtype="datetime64[ns]")
+    num_trades = len(trade_pct)
+    if num_trades == 0:
+        return {"num_trades": 0}
+
+    wins = trade_pct > 0
+    with np.errstate(invalid="ignore"):
+        days_in_trade = (exit_times - entry_times) / np.timedelta64(1, "D")
+    return {
+        "num_trades": num_trades,
+        "win_pct": np.count_nonzero(wins) / float(num_trades),
+        "avg_trade_pct": np.mean(trade_pct),
+        "avg_win_pct": np.mean(trade_pct[wins]) if wins.any() else np.nan,
+        "avg_loss_pct": np.mean(trade_pct[~wins]) if not wins.all() else np.nan,
+        "max_win_pct": np.max(trade_pct),
+        "max_loss_pct": np.min(trade_pct),
+        "max_loss_date": pd.Timestamp(entry_times[np.argmin(trade_pct)]),
+        "avg_days_in_trade": np.mean(days_in_trade),
+    }
+
+
 def create_drawdowns(returns):
     """
     Calculate the largest peak-to-trough drawdown of the equity curve
@@ -78,25 +172,198 @@ def create_drawdowns(returns):
     Returns:
     drawdown, drawdown_max, duration
     """
-    # Calculate the cumulative returns curve
-    # and set up the High Water Mark
-    idx = returns.index
-    hwm = np.zeros(len(idx))
-
-    # Create the high water mark
-    for t in range(1, len(idx)):
-        hwm[t] = max(hwm[t - 1], returns.iloc[t])
-
-    # Calculate the drawdown and duration statistics
-    perf = pd.DataFrame(index=idx)
-    perf["Drawdown"] = (hwm - returns) / hwm
-    perf["Drawdown"].iloc[0] = 0.0
-    perf["DurationCheck"] = np.where(perf["Drawdown"] == 0, 0, 1)
-    duration = max(
-        sum(1 for i in g if i == 1)
-        for k, g in groupby(perf["DurationCheck"])
-    )
-    return perf["Drawdown"], np.max(perf["Drawdown"]), duration
+    values = returns.to_numpy(dtype=np.float64)
+    if len(values) == 0:
+        return pd.Series(dtype=np.float64, index=returns.index, name="Drawdown"), 0.0, 0
+
+    # High water mark and drawdown in one pass each
+    hwm = np.maximum.accumulate(values)
+    drawdown = (hwm - values) / hwm
+
+    duration = _longest_run(drawdown != 0)
+    return pd.Series(drawdown, index=returns.index, name="Drawdown"), np.max(drawdown), duration
+
+
+def _longest_run(mask):
+    """
+    Length of the longest run of True values in a boolean array.
+    """
+    if not mask.any():
+        return 0
+    padded = np.concatenate(([False], mask, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    return int(np.max(edges[1::2] - edges[::2]))
+
+
+def create_drawdown_periods(equity, top_n=5):
+    """
+    Find the top_n deepest drawdowns of an equity (or cumulative
+    returns) curve.
+
+    Parameters:
+    equity - A pandas Series representing the equity curve.
+    top_n - The number of drawdown periods to return.
+
+    Returns:
+    A DataFrame with one row per drawdown, deepest first, holding the
+    start (the peak), trough and recovery dates, the drawdown depth and
+    its duration in periods. The recovery date is NaT for a drawdown
+    that has not recovered by the end of the curve.
+    """
+    columns = ["start", "trough", "recovery", "drawdown", "duration"]
+    values = equity.to_numpy(dtype=np.float64)
+    index = equity.index
+    if len(values) == 0:
+        return pd.DataFrame(columns=columns)
+
+    hwm = np.maximum.accumulate(values)
+    drawdown = (hwm - values) / hwm
+    underwater = np.concatenate(([False], drawdown > 0, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(underwater))
+    starts, ends = edges[::2], edges[1::2]
+    if len(starts) == 0:
+        return pd.DataFrame(columns=columns)
+
+    # Depth and trough of every underwater run via a segmented argmax
+    run_id = np.cumsum(np.diff(underwater)[:-1] == 1) - 1
+    in_run = drawdown > 0
+    depth = np.zeros(len(starts))
+    np.maximum.at(depth, run_id[in_run], drawdown[in_run])
+    order = np.argsort(-depth, kind="stable")[:top_n]
+
+    rows = []
+    for i in order.tolist():
+        start, end = starts[i], ends[i]
+        trough = start + int(np.argmax(drawdown[start:end]))
+        rows.append({
+            "start": index[start - 1] if start > 0 else index[start],
+            "trough": index[trough],
+            "recovery": index[end] if end < len(values) else pd.NaT,
+            "drawdown": depth[i],
+            "duration": end - start,
+        })
+    return pd.DataFrame(rows, columns=columns)
+
+
+class DrawdownTracker(object):
+    """
+    Online drawdown statistics of an equity curve, updated one point
+    at a time in O(1).
+    """
+    def __init__(self):
+        self.hwm = None
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.duration = 0
+        self.max_duration = 0
+
+    def update(self, value):
+        """
+        Add the next point of the equity curve and return the current
+        drawdown.
+        """
+        if self.hwm is None or value >= self.hwm:
+            self.hwm = value
+            self.drawdown = 0.0
+            self.duration = 0
+        else:
+            self.drawdown = (self.hwm - value) / self.hwm
+            self.duration += 1
+            if self.drawdown > self.max_drawdown:
+                self.max_drawdown = self.drawdown
+            if self.duration > self.max_duration:
+                self.max_duration = self.duration
+        return self.drawdown
+
+
+class RunningMoments(object):
+    """
+    Welford's online mean and (population) variance.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def std(self):
+        if self.count == 0:
+            return np.nan
+        return np.sqrt(self.m2 / self.count)
+
+
+class OnlineStatistics(object):
+    """
+    Running equity statistics, updated one equity point at a time in
+    O(1) and readable at any point of a session.
+
+    Matches the definitions of create_sharpe_ratio, create_sortino_ratio
+    and create_drawdowns applied to the full curve, where the first
+    period has a return of zero.
+
+    Parameters:
+    periods - Daily (252), Hourly (252*6.5), Minutely(252*6.5*60) etc.
+    """
+    def __init__(self, periods=252):
+        self.periods = periods
+        self.equity = None
+        self.returns = RunningMoments()
+        self.downside = RunningMoments()
+        self.drawdowns = DrawdownTracker()
+
+    def update(self, equity):
+        if self.equity is None:
+            ret = 0.0
+        else:
+            ret = equity / self.equity - 1.0
+        self.equity = equity
+        self.returns.update(ret)
+        if ret < 0:
+            self.downside.update(ret)
+        self.drawdowns.update(equity)
+
+    def get_state(self):
+        """
+        Returns the running sums as a dict of scalars.
+        """
+        return {
+            "equity": self.equity,
+            "returns": dict(vars(self.returns)),
+            "downside": dict(vars(self.downside)),
+            "drawdowns": dict(vars(self.drawdowns)),
+        }
+
+    def set_state(self, state):
+        self.equity = state["equity"]
+        vars(self.returns).update(state["returns"])
+        vars(self.downside).update(state["downside"])
+        vars(self.drawdowns).update(state["drawdowns"])
+
+    @property
+    def sharpe(self):
+        return np.sqrt(self.periods) * self.returns.mean / self.returns.std
+
+    @property
+    def sortino(self):
+        return np.sqrt(self.periods) * self.returns.mean / self.downside.std
+
+    @property
+    def drawdown(self):
+        return self.drawdowns.drawdown
+
+    @property
+    def max_drawdown(self):
+        return self.drawdowns.max_drawdown
+
+    @property
+    def max_drawdown_duration(self):
+        return self.drawdowns.max_duration
 
 
 def rsquared(x, y):
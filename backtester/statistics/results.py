@@ -0,0 +1,289 @@
+from typing import Any, Dict, Iterator, List, Optional, Union
+from collections.abc import Mapping
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# A results directory holds one .npy file per array and a JSON manifest
+# with the scalar metrics and how to rebuild each Series and DataFrame.
+RESULTS_FORMAT = "backtester.results"
+RESULTS_VERSION = 1
+_MANIFEST = "manifest.json"
+_INDEX = "index.jsonl"
+
+
+def _encode(value: Any) -> Any:
+    """
+    Converts a scalar metric, or a dict of them, to JSON values.
+    Timestamps are kept as nanoseconds under a marker key.
+    """
+    if isinstance(value, dict):
+        return {str(key): _encode(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_encode(item) for item in value]
+    if isinstance(value, pd.Timestamp):
+        return {"__timestamp__": value.value}
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
+
+
+def _decode(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "__timestamp__" in value:
+            return pd.Timestamp(value["__timestamp__"])
+        return {key: _decode(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_decode(item) for item in value]
+    return value
+
+
+def _flatten_metrics(metrics: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """
+    Flattens nested metrics, e.g. {"trades": {"win_pct": ...}} to
+    {"trades.win_pct": ...}.
+    """
+    flat = {}
+    for key, value in metrics.items():
+        if isinstance(value, dict) and "__timestamp__" not in value:
+            flat.update(_flatten_metrics(value, prefix=f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+def _column_array(values: Union[pd.Series, pd.Index]) -> np.ndarray:
+    if values.dtype.kind in "biufcmM":
+        return values.to_numpy()
+    return values.to_numpy(dtype=str)
+
+
+class _ResultsWriter(object):
+    """
+    Writes the arrays of one results directory. Indexes equal to one
+    already written, e.g. the shared dates of the equity, returns and
+    drawdown curves, are stored once.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.indexes: List[tuple] = []
+
+    def _save(self, name: str, values: np.ndarray) -> str:
+        np.save(os.path.join(self.path, f"{name}.npy"), values, allow_pickle=False)
+        return name
+
+    def _save_index(self, name: str, index: pd.Index) -> Optional[dict]:
+        if isinstance(index, pd.RangeIndex) and index.start == 0 and index.step == 1:
+            return None
+        for stored, spec in self.indexes:
+            if stored.equals(index) and list(stored.names) == list(index.names):
+                return spec
+        if isinstance(index, pd.MultiIndex):
+            levels = [index.get_level_values(i) for i in range(index.nlevels)]
+        else:
+            levels = [index]
+        spec = {
+            "levels": [
+                self._save(f"{name}.index{i}", _column_array(level)) for i, level in enumerate(levels)
+            ],
+            "names": list(index.names),
+        }
+        self.indexes.append((index, spec))
+        return spec
+
+    def save_series(self, key: str, series: pd.Series) -> dict:
+        return {
+            "kind": "series",
+            "values": self._save(key, _column_array(series)),
+            "index": self._save_index(key, series.index),
+            "name": series.name,
+        }
+
+    def save_frame(self, key: str, frame: pd.DataFrame) -> dict:
+        return {
+            "kind": "frame",
+            "columns": {
+                str(column): self._save(f"{key}.{column}", _column_array(frame[column])) for column in frame.columns
+            },
+            "index": self._save_index(key, frame.index),
+        }
+
+
+def save_results(path: str, results: Dict[str, Any]) -> None:
+    """
+    Saves a get_results() dict to a results directory: every Series and
+    DataFrame column as its own .npy array and the scalar metrics in
+    the JSON manifest. The directory is written next to path and moved
+    into place, replacing an existing one.
+
+    :param path: The results directory.
+    :param results: Dict of name -> Series, DataFrame or scalar metric.
+    """
+    parent = os.path.dirname(os.path.abspath(path))
+    os.makedirs(parent, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=parent, prefix=".tmp-")
+    try:
+        writer = _ResultsWriter(tmp)
+        arrays = {}
+        metrics = {}
+        for key, value in results.items():
+            if isinstance(value, pd.Series):
+                arrays[key] = writer.save_series(key, value)
+            elif isinstance(value, pd.DataFrame):
+                arrays[key] = writer.save_frame(key, value)
+            else:
+                metrics[key] = _encode(value)
+        manifest = {"format": RESULTS_FORMAT, "version": RESULTS_VERSION, "metrics": metrics, "arrays": arrays}
+        with open(os.path.join(tmp, _MANIFEST), "w") as fd:
+            json.dump(manifest, fd)
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+
+class Results(Mapping):
+    """
+    Read-only, lazily loaded view of a results directory, with the same
+    keys as the get_results() dict it was saved from.
+
+    The scalar metrics are read with the manifest. A Series or
+    DataFrame is only built when its key is accessed, from arrays that
+    are memory-mapped rather than read, and is then kept.
+    """
+    def __init__(self, path: str) -> None:
+        self.path = path
+        with open(os.path.join(path, _MANIFEST)) as fd:
+            manifest = json.load(fd)
+        if manifest.get("format") != RESULTS_FORMAT:
+            raise ValueError(f"{path} is not a results directory.")
+        if manifest["version"] > RESULTS_VERSION:
+            raise ValueError(
+                f"{path} holds version {manifest['version']} results, this version reads up to {RESULTS_VERSION}."
+            )
+        self.metrics = _decode(manifest["metrics"])
+        self.arrays = manifest["arrays"]
+        self._loaded: Dict[str, Any] = {}
+
+    def _load(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+    def _load_index(self, spec: Optional[dict], length: int) -> pd.Index:
+        if spec is None:
+            return pd.RangeIndex(length)
+        levels = [self._load(name) for name in spec["levels"]]
+        if len(levels) > 1:
+            return pd.MultiIndex.from_arrays(levels, names=spec["names"])
+        return pd.Index(levels[0], name=spec["names"][0], copy=False)
+
+    def __getitem__(self, key: str) -> Any:
+        if key in self.metrics:
+            return self.metrics[key]
+        if key not in self._loaded:
+            spec = self.arrays[key]
+            if spec["kind"] == "series":
+                values = self._load(spec["values"])
+                self._loaded[key] = pd.Series(
+                    values, index=self._load_index(spec["index"], len(values)), name=spec["name"], copy=False
+                )
+            else:
+                columns = {column: self._load(name) for column, name in spec["columns"].items()}
+                length = len(next(iter(columns.values()))) if columns else 0
+                self._loaded[key] = pd.DataFrame(
+                    columns, index=self._load_index(spec["index"], length), copy=False
+                )
+        return self._loaded[key]
+
+    def __iter__(self) -> Iterator[str]:
+        yield from self.metrics
+        yield from self.arrays
+
+    def __len__(self) -> int:
+        return len(self.metrics) + len(self.arrays)
+
+
+def load_results(path: str) -> Results:
+    """
+    Opens a results directory written by save_results.
+    """
+    return Results(path)
+
+
+class ResultsStore(object):
+    """
+    Directory of many saved results, e.g. the runs of a ParameterSweep,
+    with an index of their scalar metrics.
+
+    Every add writes the results directory of the run and appends one
+    JSON line with its name, parameters and flattened metrics to
+    index.jsonl, so scanning the metrics of thousands of runs reads a
+    single file and no series. Lines are appended with one write each,
+    so several processes can add runs to the same store.
+    """
+    def __init__(self, root: str) -> None:
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def add(self, name: str, results: Dict[str, Any], params: Optional[dict] = None) -> str:
+        """
+        Saves the results of a run under name and adds it to the index.
+
+        :param name: Name of the run, used as its directory name.
+        :param results: The get_results() dict of the run.
+        :param params: Optional parameters of the run, stored in the index.
+        :return: The results directory of the run.
+        """
+        path = os.path.join(self.root, name)
+        save_results(path, results)
+        metrics = {
+            key: _encode(value) for key, value in results.items() if not isinstance(value, (pd.Series, pd.DataFrame))
+        }
+        line = json.dumps({"name": name, "params": _encode(params or {}), "metrics": metrics}, default=str)
+        with open(os.path.join(self.root, _INDEX), "a") as fd:
+            fd.write(line + "\n")
+        return path
+
+    def _entries(self) -> Iterator[dict]:
+        try:
+            with open(os.path.join(self.root, _INDEX)) as fd:
+                for line in fd:
+                    if line.strip():
+                        yield json.loads(line)
+        except FileNotFoundError:
+            return
+
+    def names(self) -> List[str]:
+        """
+        The names of the runs in the order they were added.
+        """
+        return list(dict.fromkeys(entry["name"] for entry in self._entries()))
+
+    def metrics(self) -> pd.DataFrame:
+        """
+        Returns the parameters and scalar metrics of all runs as one
+        frame indexed by run name, parameters prefixed with "params.".
+        A run added several times is listed with its last results.
+        """
+        rows = {}
+        for entry in self._entries():
+            row = {f"params.{key}": value for key, value in _flatten_metrics(entry["params"]).items()}
+            row.update(_flatten_metrics(entry["metrics"]))
+            rows[entry["name"]] = _decode(row)
+        frame = pd.DataFrame.from_dict(rows, orient="index")
+        frame.index.name = "name"
+        return frame
+
+    def load(self, name: str) -> Results:
+        """
+        Opens the results of a run, see Results.
+        """
+        return load_results(os.path.join(self.root, name))
+
+    def __len__(self) -> int:
+        return len(self.names())
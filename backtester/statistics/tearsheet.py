@@ -1,5 +1,9 @@
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
 from matplotlib.ticker import FuncFormatter
 from matplotlib import cm
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from datetime import datetime
 
 import pandas as pd
@@ -10,10 +14,25 @@ import matplotlib.dates as mdates
 import seaborn as sns
 
 from backtester.statistics.base import Statistics
+from backtester.statistics.buffer import SeriesBuffer
+from backtester.statistics.results import save_results
 from backtester.statistics import performance as perf
-from backtester.price_parser import PriceParser
 from backtester.portfolio_handler import PortfolioHandler
 
+PANELS = (
+    "equity", "rolling_sharpe", "drawdown", "monthly_returns",
+    "yearly_returns", "txt_curve", "txt_trade", "txt_time",
+)
+
+# Rows of the tearsheet grid as (height, [(panel, columns), ...])
+_PANEL_ROWS = (
+    (2, [("equity", slice(None))]),
+    (1, [("rolling_sharpe", slice(None))]),
+    (1, [("drawdown", slice(None))]),
+    (1, [("monthly_returns", slice(0, 2)), ("yearly_returns", 2)]),
+    (1, [("txt_curve", 0), ("txt_trade", 1), ("txt_time", 2)]),
+)
+
 
 class TearsheetStatistics(Statistics):
     """
@@ -28,40 +47,73 @@ class TearsheetStatistics(Statistics):
     ratio chart.
     """
     def __init__(self,
-                 portfolio_handler: PortfolioHandler,
+                 portfolio_handler: Optional[PortfolioHandler],
                  title: str = None,
                  benchmark: pd.Series = None,
                  periods: int = 365,
                  rolling_sharpe: bool = False
                  ):
         """
-        Takes in a portfolio handler.
+        Takes in a portfolio handler. Without one, the instance can
+        only render results computed elsewhere, see render_tearsheets.
         """
         self.portfolio_handler = portfolio_handler
-        self.price_handler = portfolio_handler.price_handler
+        self.price_handler = portfolio_handler.price_handler if portfolio_handler is not None else None
         self.title = title
         self.benchmark = benchmark
         self.periods = periods
         self.rolling_sharpe = rolling_sharpe
-        self.equity = {}
-        self.equity_benchmark = {}
+        self.equity = SeriesBuffer()
+        self.equity_benchmark = SeriesBuffer()
         self.log_scale = False
+        self.online = perf.OnlineStatistics(periods=periods)
 
     def update(self, timestamp: datetime):
         """
         Update equity curve and benchmark equity curve that must be tracked
         over time.
+
+        A second update at the same timestamp replaces the last point of
+        the equity curve but is not fed to the running statistics again.
         """
-        self.equity[timestamp] = PriceParser.display(self.portfolio_handler.portfolio.equity)
+        equity = self.portfolio_handler.portfolio.equity
+        if self.equity.append(timestamp, equity):
+            self.online.update(equity)
         if self.benchmark is not None:
-            self.equity_benchmark[timestamp] = PriceParser.display(self.price_handler.get_last_close(self.benchmark))
+            self.equity_benchmark.append(timestamp, self.price_handler.get_last_close(self.benchmark))
+
+    def get_state(self) -> Dict[str, Any]:
+        return {
+            "equity": self.equity.get_state(),
+            "equity_benchmark": self.equity_benchmark.get_state(),
+            "online": self.online.get_state(),
+        }
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        self.equity.set_state(state["equity"])
+        self.equity_benchmark.set_state(state["equity_benchmark"])
+        self.online.set_state(state["online"])
+
+    def get_current_results(self) -> dict:
+        """
+        Return the running Sharpe, Sortino and drawdown statistics in
+        O(1), e.g. for mid-run queries or early-abort checks.
+        """
+        return {
+            "equity": self.online.equity,
+            "sharpe": self.online.sharpe,
+            "sortino": self.online.sortino,
+            "drawdown": self.online.drawdown,
+            "max_drawdown": self.online.max_drawdown,
+            "max_drawdown_duration": self.online.max_drawdown_duration,
+        }
 
     def get_results(self) -> dict:
         """
         Return a dict with all important results & stats.
         """
         # Equity
-        equity_s = pd.Series(self.equity).sort_index()
+        equity_s = self.equity.to_series()
 
         # Returns
         returns_s = equity_s.pct_change().fillna(0.0)
@@ -90,13 +142,21 @@ class TearsheetStatistics(Statistics):
         statistics["rolling_sharpe"] = rolling_sharpe_s
         statistics["cum_returns"] = cum_returns_s
 
+        # Calendar returns, aggregated in one pass for the tearsheet panels
+        calendar_returns = perf.aggregate_returns_all(returns_s, periods=("monthly", "yearly"))
+        statistics["monthly_returns"] = calendar_returns["monthly"]
+        statistics["yearly_returns"] = calendar_returns["yearly"]
+
         positions = self._get_positions()
         if positions is not None:
             statistics["positions"] = positions
+            statistics["trades"] = perf.create_trade_statistics(
+                positions["trade_pct"], positions["entry_time"], positions["exit_time"]
+            )
 
         # Benchmark statistics if benchmark ticker specified
         if self.benchmark is not None:
-            equity_b = pd.Series(self.equity_benchmark).sort_index()
+            equity_b = self.equity_benchmark.to_series()
             returns_b = equity_b.pct_change().fillna(0.0)
             rolling_b = returns_b.rolling(window=self.periods)
             rolling_sharpe_b = np.sqrt(self.periods) * (
@@ -117,38 +177,14 @@ class TearsheetStatistics(Statistics):
 
     def _get_positions(self):
         """
-        Retrieve the list of closed Positions objects from the portfolio
-        and reformat into a pandas dataframe to be returned
+        Retrieve the closed trades from the trade journal of the
+        portfolio as a pandas dataframe, or None if there are none.
         """
-        def x(p):
-            return PriceParser.display(p)
-
-        pos = self.portfolio_handler.portfolio.closed_positions
-        a = []
-        for p in pos:
-            a.append(p.__dict__)
-        if len(a) == 0:
+        journal = self.portfolio_handler.portfolio.trade_journal
+        if len(journal) == 0:
             # There are no closed positions
             return None
-        else:
-            df = pd.DataFrame(a)
-            df['avg_bot'] = df['avg_bot'].apply(x)
-            df['avg_price'] = df['avg_price'].apply(x)
-            df['avg_sld'] = df['avg_sld'].apply(x)
-            df['cost_basis'] = df['cost_basis'].apply(x)
-            df['init_commission'] = df['init_commission'].apply(x)
-            df['init_price'] = df['init_price'].apply(x)
-            df['market_value'] = df['market_value'].apply(x)
-            df['net'] = df['net'].apply(x)
-            df['net_incl_comm'] = df['net_incl_comm'].apply(x)
-            df['net_total'] = df['net_total'].apply(x)
-            df['realised_pnl'] = df['realised_pnl'].apply(x)
-            df['total_bot'] = df['total_bot'].apply(x)
-            df['total_commission'] = df['total_commission'].apply(x)
-            df['total_sld'] = df['total_sld'].apply(x)
-            df['unrealised_pnl'] = df['unrealised_pnl'].apply(x)
-            df['trade_pct'] = (df['avg_sld'] / df['avg_bot'] - 1.0)
-            return df
+        return journal.to_frame()
 
     def _plot_equity(self, stats: dict, ax=None, **kwargs):
         """
@@ -265,7 +301,9 @@ class TearsheetStatistics(Statistics):
         if ax is None:
             ax = plt.gca()
 
-        monthly_ret = perf.aggregate_returns(returns, 'monthly')
+        monthly_ret = stats.get('monthly_returns')
+        if monthly_ret is None:
+            monthly_ret = perf.aggregate_returns(returns, 'monthly')
         monthly_ret = monthly_ret.unstack()
         monthly_ret = np.round(monthly_ret, 3)
         monthly_ret.rename(
@@ -308,7 +346,10 @@ class TearsheetStatistics(Statistics):
         ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
         ax.yaxis.grid(linestyle=':')
 
-        yly_ret = perf.aggregate_returns(returns, 'yearly') * 100.0
+        yly_ret = stats.get('yearly_returns')
+        if yly_ret is None:
+            yly_ret = perf.aggregate_returns(returns, 'yearly')
+        yly_ret = yly_ret * 100.0
         yly_ret.plot(ax=ax, kind="bar")
         ax.set_title('Yearly Returns (%)', fontweight='bold')
         ax.set_ylabel('')
@@ -342,7 +383,7 @@ class TearsheetStatistics(Statistics):
         y_axis_formatter = FuncFormatter(format_perc)
         ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
 
-        tot_ret = cum_returns[-1] - 1.0
+        tot_ret = cum_returns.iloc[-1] - 1.0
         cagr = perf.create_cagr(cum_returns, self.periods)
         sharpe = perf.create_sharpe_ratio(returns, self.periods)
         sortino = perf.create_sortino_ratio(returns, self.periods)
@@ -380,7 +421,7 @@ class TearsheetStatistics(Statistics):
         if self.benchmark is not None:
             returns_b = stats['returns_b']
             equity_b = stats['cum_returns_b']
-            tot_ret_b = equity_b[-1] - 1.0
+            tot_ret_b = equity_b.iloc[-1] - 1.0
             cagr_b = perf.create_cagr(equity_b)
             sharpe_b = perf.create_sharpe_ratio(returns_b)
             sortino_b = perf.create_sortino_ratio(returns_b)
@@ -421,33 +462,35 @@ class TearsheetStatistics(Statistics):
         if ax is None:
             ax = plt.gca()
 
-        if 'positions' not in stats:
+        trades = stats.get('trades')
+        if trades is None and 'positions' in stats:
+            pos = stats['positions']
+            trades = perf.create_trade_statistics(pos["trade_pct"], pos["entry_time"], pos["exit_time"])
+
+        if trades is None or trades["num_trades"] == 0:
             num_trades = 0
-            win_pct = "N/A"
             win_pct_str = "N/A"
             avg_trd_pct = "N/A"
             avg_win_pct = "N/A"
             avg_loss_pct = "N/A"
             max_win_pct = "N/A"
             max_loss_pct = "N/A"
+            max_loss_dt = "N/A"
+            avg_dit = "N/A"
         else:
-            pos = stats['positions']
-            num_trades = pos.shape[0]
-            win_pct = pos[pos["trade_pct"] > 0].shape[0] / float(num_trades)
-            win_pct_str = '{:.0%}'.format(win_pct)
-            avg_trd_pct = '{:.2%}'.format(np.mean(pos["trade_pct"]))
-            avg_win_pct = '{:.2%}'.format(np.mean(pos[pos["trade_pct"] > 0]["trade_pct"]))
-            avg_loss_pct = '{:.2%}'.format(np.mean(pos[pos["trade_pct"] <= 0]["trade_pct"]))
-            max_win_pct = '{:.2%}'.format(np.max(pos["trade_pct"]))
-            max_loss_pct = '{:.2%}'.format(np.min(pos["trade_pct"]))
+            num_trades = trades["num_trades"]
+            win_pct_str = '{:.0%}'.format(trades["win_pct"])
+            avg_trd_pct = '{:.2%}'.format(trades["avg_trade_pct"])
+            avg_win_pct = '{:.2%}'.format(trades["avg_win_pct"])
+            avg_loss_pct = '{:.2%}'.format(trades["avg_loss_pct"])
+            max_win_pct = '{:.2%}'.format(trades["max_win_pct"])
+            max_loss_pct = '{:.2%}'.format(trades["max_loss_pct"])
+            max_loss_dt = trades["max_loss_date"].strftime('%Y-%m-%d')
+            avg_dit = '{:.2f}'.format(trades["avg_days_in_trade"])
 
         y_axis_formatter = FuncFormatter(format_perc)
         ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
 
-        # TODO: Position class needs entry date
-        max_loss_dt = 'TBD'  # pos[pos["trade_pct"] == np.min(pos["trade_pct"])].entry_date.values[0]
-        avg_dit = '0.0'  # = '{:.2f}'.format(np.mean(pos.time_in_pos))
-
         ax.text(0.5, 8.9, 'Trade Winning %', fontsize=8)
         ax.text(9.5, 8.9, win_pct_str, fontsize=8, fontweight='bold', horizontalalignment='right')
 
@@ -504,8 +547,12 @@ class TearsheetStatistics(Statistics):
         y_axis_formatter = FuncFormatter(format_perc)
         ax.yaxis.set_major_formatter(FuncFormatter(y_axis_formatter))
 
-        mly_ret = perf.aggregate_returns(returns, 'monthly')
-        yly_ret = perf.aggregate_returns(returns, 'yearly')
+        mly_ret = stats.get('monthly_returns')
+        if mly_ret is None:
+            mly_ret = perf.aggregate_returns(returns, 'monthly')
+        yly_ret = stats.get('yearly_returns')
+        if yly_ret is None:
+            yly_ret = perf.aggregate_returns(returns, 'yearly')
 
         mly_pct = mly_ret[mly_ret >= 0].shape[0] / float(mly_ret.shape[0])
         mly_avg_win_pct = np.mean(mly_ret[mly_ret >= 0])
@@ -571,10 +618,8 @@ class TearsheetStatistics(Statistics):
         ax.axis([0, 10, 0, 10])
         return ax
 
-    def plot_results(self, filename: str = None):
-        """
-        Plot the Tearsheet
-        """
+    @staticmethod
+    def _set_style() -> None:
         rc = {
             'lines.linewidth': 1.0,
             'axes.facecolor': '0.995',
@@ -595,41 +640,118 @@ class TearsheetStatistics(Statistics):
         sns.set_style("whitegrid")
         sns.set_palette("deep", desat=.6)
 
-        if self.rolling_sharpe:
-            offset_index = 1
-        else:
-            offset_index = 0
-        vertical_sections = 5 + offset_index
-        fig = plt.figure(figsize=(10, vertical_sections * 3.5))
+    def _layout(self, panels: Optional[Sequence[str]]) -> List[Tuple[int, List[Tuple[str, Any]]]]:
+        """
+        The rows of the tearsheet grid that hold at least one of the
+        requested panels, as (height, [(panel, columns), ...]).
+        """
+        if panels is None:
+            panels = [p for p in PANELS if p != "rolling_sharpe" or self.rolling_sharpe]
+        unknown = set(panels) - set(PANELS)
+        if unknown:
+            raise ValueError(f"Unknown tearsheet panels {sorted(unknown)}, must be among {PANELS}")
+        rows = []
+        for height, row in _PANEL_ROWS:
+            row = [(panel, cols) for panel, cols in row if panel in panels]
+            if row:
+                rows.append((height, row))
+        return rows
+
+    def _draw(self, fig, stats: dict, panels: Optional[Sequence[str]]) -> None:
+        """
+        Draws the requested panels of the tearsheet onto a figure.
+        """
+        rows = self._layout(panels)
+        vertical_sections = sum(height for height, _ in rows)
+        fig.set_size_inches(10, vertical_sections * 3.5)
         fig.suptitle(self.title, weight='bold')
-        gs = gridspec.GridSpec(vertical_sections, 3, wspace=0.25, hspace=0.5)
-
-        stats = self.get_results()
-        ax_equity = plt.subplot(gs[:2, :])
-        if self.rolling_sharpe:
-            ax_sharpe = plt.subplot(gs[2, :])
-        ax_drawdown = plt.subplot(gs[2 + offset_index, :])
-        ax_monthly_returns = plt.subplot(gs[3 + offset_index, :2])
-        ax_yearly_returns = plt.subplot(gs[3 + offset_index, 2])
-        ax_txt_curve = plt.subplot(gs[4 + offset_index, 0])
-        ax_txt_trade = plt.subplot(gs[4 + offset_index, 1])
-        ax_txt_time = plt.subplot(gs[4 + offset_index, 2])
-
-        self._plot_equity(stats, ax=ax_equity)
-        if self.rolling_sharpe:
-            self._plot_rolling_sharpe(stats, ax=ax_sharpe)
-        self._plot_drawdown(stats, ax=ax_drawdown)
-        self._plot_monthly_returns(stats, ax=ax_monthly_returns)
-        self._plot_yearly_returns(stats, ax=ax_yearly_returns)
-        self._plot_txt_curve(stats, ax=ax_txt_curve)
-        self._plot_txt_trade(stats, ax=ax_txt_trade)
-        self._plot_txt_time(stats, ax=ax_txt_time)
+        gs = gridspec.GridSpec(vertical_sections, 3, figure=fig, wspace=0.25, hspace=0.5)
+
+        top = 0
+        for height, row in rows:
+            for panel, cols in row:
+                ax = fig.add_subplot(gs[top:top + height, cols])
+                getattr(self, f"_plot_{panel}")(stats, ax=ax)
+            top += height
+
+    def plot_results(self, filename: str = None, stats: Optional[dict] = None, panels: Optional[Sequence[str]] = None):
+        """
+        Plot the Tearsheet. Without a filename it is shown in a pyplot
+        window, otherwise it is rendered headless to the file.
+
+        :param filename: Optional PNG/PDF file to write the tearsheet to.
+        :param stats: Precomputed results of get_results, computed if None.
+        :param panels: Names of the panels to draw, see PANELS. All by default.
+        """
+        if stats is None:
+            stats = self.get_results()
+        if filename is not None:
+            self.render(filename=filename, stats=stats, panels=panels)
+            return
+
+        self._set_style()
+        fig = plt.figure()
+        self._draw(fig, stats, panels)
 
         # Plot the figure
         plt.show(block=False)
 
-        if filename is not None:
-            fig.savefig(filename, dpi=150, bbox_inches='tight')
+    def render(self, filename: str, stats: Optional[dict] = None, panels: Optional[Sequence[str]] = None,
+               dpi: int = 150) -> None:
+        """
+        Renders the Tearsheet to a PNG/PDF file on an Agg canvas, without
+        going through pyplot, so no window is opened and no figure is
+        kept alive afterwards.
+        """
+        if stats is None:
+            stats = self.get_results()
+        self._set_style()
+        fig = Figure()
+        FigureCanvasAgg(fig)
+        self._draw(fig, stats, panels)
+        fig.savefig(filename, dpi=dpi, bbox_inches='tight')
+
+    def save(self, filename: str, stats: Optional[dict] = None):
+        """
+        Saves the results to the directory filename, see save_results.
+        Open them again with Statistics.load.
+        """
+        if stats is None:
+            stats = self.get_results()
+        save_results(filename, stats)
 
-    def save(self, filename: str = ""):
-        raise NotImplementedError("This has not been implemented for this Tearsheet")
+
+def _render_job(settings: dict, filename: str, stats: dict, panels: Optional[Sequence[str]]) -> str:
+    TearsheetStatistics(None, **settings).render(filename=filename, stats=stats, panels=panels)
+    return filename
+
+
+def render_tearsheets(
+        results: Iterable[dict],
+        filenames: Iterable[str],
+        titles: Optional[Iterable[str]] = None,
+        panels: Optional[Sequence[str]] = None,
+        processes: Optional[int] = None,
+        **settings
+) -> List[str]:
+    """
+    Renders the tearsheets of many precomputed result sets, e.g. the
+    results of a ParameterSweep, to PNG/PDF files across a process pool.
+
+    :param results: get_results() dicts, one per tearsheet.
+    :param filenames: Output file per result set. The extension selects the format.
+    :param titles: Optional title per result set.
+    :param panels: Names of the panels to draw, see PANELS. All by default.
+    :param processes: Number of worker processes. Defaults to the number of CPUs.
+    :param settings: Other TearsheetStatistics arguments, e.g. benchmark or periods.
+    :return: The written filenames.
+    """
+    results = list(results)
+    filenames = list(filenames)
+    titles = [None] * len(results) if titles is None else list(titles)
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        futures = [
+            executor.submit(_render_job, dict(settings, title=title), filename, stats, panels)
+            for stats, filename, title in zip(results, filenames, titles)
+        ]
+        return [future.result() for future in futures]
@@ -1,10 +1,10 @@
 from abc import ABC, abstractmethod
 from queue import Queue
-from typing import Dict
+from typing import Any, Dict
 
 import pandas as pd
 
-from backtester.event import OrderEvent, BarEvent, TickEvent, EODEvent
+from backtester.event import OrderEvent, BarEvent, BarSliceEvent, TickEvent, EODEvent
 from backtester.portfolio_handler import PortfolioHandler
 
 
@@ -33,6 +33,51 @@ class Strategy(ABC):
     def on_eod(self, event):
         pass
 
+    def on_bars(self, event: BarSliceEvent):
+        """
+        Called with all the bars of one timestamp when the price
+        handler runs in batch mode. Strategies that can act on the
+        arrays of the slice at once should override this; the default
+        passes the bars to on_bar one by one.
+        """
+        for bar in event.bars():
+            self.on_bar(bar)
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Returns the state a strategy needs to resume from a session
+        snapshot, e.g. indicator windows. Values must be NumPy arrays of
+        numbers or strings, or JSON values. Stateless strategies need
+        not override this.
+        """
+        return {}
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Restores the state returned by get_state.
+        """
+        pass
+
+
+class TargetWeightStrategy(ABC):
+    """
+    TargetWeightStrategy is an abstract base class for strategies that
+    only decide target portfolio weights at the end of each day.
+
+    Such strategies can be run by the VectorizedBacktest without going
+    through the event loop.
+    """
+
+    @abstractmethod
+    def target_weights(self, prices: pd.DataFrame) -> pd.DataFrame:
+        """
+        Returns a (dates x tickers) frame of target weights of equity.
+        Rows that are all NaN mean "do not rebalance on this date".
+
+        :param prices: (dates x tickers) frame of closing prices.
+        """
+        pass
+
 
 class PortfolioOptimizationBaseClass(Strategy):
 
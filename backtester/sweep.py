@@ -0,0 +1,238 @@
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from multiprocessing import shared_memory
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from backtester.event_bus import DequeEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader, OHLCV_COLUMNS
+from backtester.statistics.results import ResultsStore
+from backtester.statistics.tearsheet import TearsheetStatistics
+from backtester.trading_session import TradingSession
+
+
+def expand_grid(param_grid: Union[Dict[str, Sequence], Iterable[dict]]) -> List[dict]:
+    """
+    Expands a dict of parameter name -> candidate values into the list
+    of all combinations. A list of parameter dicts is returned as is.
+    """
+    if isinstance(param_grid, dict):
+        names = list(param_grid.keys())
+        return [dict(zip(names, values)) for values in itertools.product(*param_grid.values())]
+    return list(param_grid)
+
+
+class SharedMemoryReader(OHLCVDataFrameReader):
+    """
+    Reads cleaned bars from a (columns x dates x tickers) float64 array
+    held in shared memory. The ticker_id is the position of the ticker on
+    the last axis. columns names the OHLCV_COLUMNS of the first axis and
+    has_column, a (tickers x columns) bool array, which of them each
+    ticker has. Rows where the close of a ticker is NaN, i.e. outside of
+    its history, are dropped.
+    """
+    cleaned = True
+
+    def __init__(
+            self, shm_name: str, shape: Tuple[int, int, int], index: np.ndarray,
+            columns: List[str], has_column: np.ndarray,
+    ) -> None:
+        super().__init__()
+        self.shm = _attach_shared_memory(shm_name)
+        self.values = np.ndarray(shape, dtype=np.float64, buffer=self.shm.buf)
+        self.index = pd.DatetimeIndex(index)
+        self.columns = columns
+        self.has_column = has_column
+
+    def read_ohlcv(self, ticker_id: int, start: date, end: date) -> pd.DataFrame:
+        valid = ~np.isnan(self.values[self.columns.index("close_price"), :, ticker_id])
+        return pd.DataFrame(
+            {
+                column: self.values[i, valid, ticker_id]
+                for i, column in enumerate(self.columns) if self.has_column[ticker_id, i]
+            },
+            index=self.index[valid],
+        )
+
+
+def _attach_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attaches to an existing shared memory block owned by the parent
+    process. Workers share the parent's resource tracker, so the block
+    is only unlinked once, by the parent.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+_worker = {}
+
+
+def _init_worker(
+        sweep: "ParameterSweep", shm_name: str, shape: Tuple[int, int, int], index: np.ndarray,
+        columns: List[str], has_column: np.ndarray,
+) -> None:
+    _worker["sweep"] = sweep
+    _worker["reader"] = SharedMemoryReader(
+        shm_name=shm_name, shape=shape, index=index, columns=columns, has_column=has_column
+    )
+
+
+def _run_worker(params: dict) -> dict:
+    sweep = _worker["sweep"]
+    return sweep.run_one(params=params, reader=_worker["reader"], ticker_ids=list(range(len(sweep.ticker_names))))
+
+
+class ParameterSweep(object):
+    """
+    Runs one TradingSession per parameter combination of a strategy,
+    fanned out across a process pool.
+
+    The price data is read and cleaned once in the parent process and
+    its OHLCV columns are placed in shared memory, from where every
+    worker reads them without a copy through the pickle channel and
+    without cleaning them again. Each worker returns the
+    get_results() dict of its session; no plots are made.
+    """
+    def __init__(
+            self,
+            strategy_factory: Callable,
+            param_grid: Union[Dict[str, Sequence], Iterable[dict]],
+            ticker_ids: List[int],
+            ticker_names: List[str],
+            reader: OHLCVDataFrameReader,
+            start_date: Optional[date] = None,
+            end_date: Optional[date] = None,
+            initial_cash: float = 100000.0,
+            execution_handler_cls: Callable = SimulatedStockExecutionHandler,
+            statistics_factory: Callable = TearsheetStatistics,
+            processes: Optional[int] = None,
+    ) -> None:
+        """
+        :param strategy_factory: Picklable callable (params, portfolio_handler, events_queue) -> Strategy.
+        :param param_grid: Dict of parameter name -> values, or a list of parameter dicts.
+        :param ticker_ids:
+        :param ticker_names:
+        :param reader: The reader used once, in the parent, to load the prices.
+        :param start_date:
+        :param end_date:
+        :param initial_cash: Initial cash of every run.
+        :param execution_handler_cls: Execution handler class taking (events_queue, price_handler).
+        :param statistics_factory: Picklable callable (portfolio_handler) -> Statistics.
+        :param processes: Number of worker processes. Defaults to the number of CPUs.
+        """
+        self.strategy_factory = strategy_factory
+        self.params = expand_grid(param_grid)
+        self.ticker_ids = ticker_ids
+        self.ticker_names = ticker_names
+        self.reader = reader
+        self.start_date = start_date
+        self.end_date = end_date
+        self.initial_cash = initial_cash
+        self.execution_handler_cls = execution_handler_cls
+        self.statistics_factory = statistics_factory
+        self.processes = processes
+
+    def __getstate__(self) -> dict:
+        # Workers read the prices from shared memory, never from the source reader
+        state = self.__dict__.copy()
+        state["reader"] = None
+        return state
+
+    def run_one(self, params: dict, reader: OHLCVDataFrameReader, ticker_ids: List[int]) -> dict:
+        """
+        Runs a single backtest for one parameter combination.
+        """
+        events_queue = DequeEventBus()
+        price_handler = OHLCVPriceHandler(
+            ticker_ids=ticker_ids,
+            ticker_names=self.ticker_names,
+            events_queue=events_queue,
+            reader=reader,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+        portfolio_handler = PortfolioHandler(
+            initial_cash=self.initial_cash, events_queue=events_queue, price_handler=price_handler
+        )
+        execution_handler = self.execution_handler_cls(events_queue=events_queue, price_handler=price_handler)
+        statistics = self.statistics_factory(portfolio_handler)
+        strategy = self.strategy_factory(params, portfolio_handler, events_queue)
+        session = TradingSession(
+            strategy=strategy,
+            price_handler=price_handler,
+            execution_handler=execution_handler,
+            portfolio_handler=portfolio_handler,
+            events_queue=events_queue,
+            statistics=statistics,
+        )
+        session._run_session()
+        return statistics.get_results()
+
+    def _load_prices(self) -> Tuple[pd.DatetimeIndex, List[str], List[pd.DataFrame]]:
+        """
+        Reads and cleans all tickers once. Returns the union of their
+        timestamps, the OHLCV columns found in any of them and the
+        cleaned frames in the order of ticker_names.
+        """
+        price_handler = OHLCVPriceHandler(
+            ticker_ids=self.ticker_ids,
+            ticker_names=self.ticker_names,
+            events_queue=DequeEventBus(),
+            reader=self.reader,
+            start_date=self.start_date,
+            end_date=self.end_date,
+        )
+        missing = [name for name in self.ticker_names if name not in price_handler.data]
+        if missing:
+            raise ValueError(f"Could not load prices for tickers {missing}")
+        frames = [price_handler.data[name] for name in self.ticker_names]
+        index = frames[0].index
+        for df in frames[1:]:
+            index = index.union(df.index)
+        columns = [column for column in OHLCV_COLUMNS if any(column in df.columns for df in frames)]
+        return index, columns, frames
+
+    def run(self, results_store: Optional[ResultsStore] = None) -> List[Tuple[dict, dict]]:
+        """
+        Runs all parameter combinations and returns (params, results)
+        pairs in the order of the parameter grid.
+
+        :param results_store: Optional store the results of every run are added to,
+            as run-00000, run-00001, ... in the order of the parameter grid.
+        """
+        index, columns, frames = self._load_prices()
+        shape = (len(columns), len(index), len(frames))
+        has_column = np.zeros((len(frames), len(columns)), dtype=bool)
+        shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+        try:
+            values = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+            values[:] = np.nan
+            for j, df in enumerate(frames):
+                rows = index.get_indexer(df.index)
+                for i, column in enumerate(columns):
+                    if column in df.columns:
+                        values[i, rows, j] = df[column].to_numpy(dtype=np.float64)
+                        has_column[j, i] = True
+            index = index.to_numpy(dtype="datetime64[ns]")
+            del values, frames
+            with ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    initializer=_init_worker,
+                    initargs=(self, shm.name, shape, index, columns, has_column),
+            ) as executor:
+                results = list(executor.map(_run_worker, self.params))
+        finally:
+            shm.close()
+            shm.unlink()
+        if results_store is not None:
+            for i, (params, run_results) in enumerate(zip(self.params, results)):
+                results_store.add(f"run-{i:05d}", run_results, params=params)
+        return list(zip(self.params, results))
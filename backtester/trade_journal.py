@@ -0,0 +1,199 @@
+from typing import Any, Dict, List, Optional
+import os
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from backtester.position_book import FIELDS, BOT, SLD
+
+# Fields shown rounded to cents in the trade table, as PriceParser.display
+DISPLAY_FIELDS = (
+    "avg_bot", "avg_price", "avg_sld", "cost_basis", "init_commission",
+    "init_price", "market_value", "net", "net_incl_comm", "net_total",
+    "realised_pnl", "total_bot", "total_commission", "total_sld", "unrealised_pnl",
+)
+
+
+class TradeJournal(object):
+    """
+    Columnar record of closed trades.
+
+    Each closed position is appended as one row of typed arrays: the
+    ticker as an integer code into the tickers list, the opening action
+    as BOT (1) or SLD (-1), the entry and exit times as int64
+    nanoseconds and every numeric Position field as float64.
+
+    Once spill_rows trades are buffered they are written to an .npz
+    file in spill_dir and the buffer is reused, so a long backtest
+    keeps at most spill_rows trades in memory. Without a spill_dir a
+    temporary directory is created on the first spill and removed with
+    the journal.
+    """
+    def __init__(self, spill_rows: int = 100000, spill_dir: Optional[str] = None) -> None:
+        self.spill_rows = spill_rows
+        self.spill_dir = spill_dir
+        self.spill_files: List[str] = []
+        self._tmp_dir = None
+        self.tickers: List[str] = []
+        self._ticker_codes: Dict[str, int] = {}
+        self.columns = self._empty_columns(min(spill_rows, 1024))
+        self.size = 0
+        self.spilled = 0
+
+    @staticmethod
+    def _empty_columns(capacity: int) -> Dict[str, np.ndarray]:
+        columns = {
+            "ticker": np.empty(capacity, dtype=np.int32),
+            "action": np.empty(capacity, dtype=np.int8),
+            "entry_time": np.empty(capacity, dtype=np.int64),
+            "exit_time": np.empty(capacity, dtype=np.int64),
+        }
+        for field in FIELDS:
+            columns[field] = np.empty(capacity, dtype=np.float64)
+        return columns
+
+    def __len__(self) -> int:
+        return self.spilled + self.size
+
+    def append(self, position, entry_time: int, exit_time: int) -> None:
+        """
+        Records a closed position.
+
+        :param position: A Position, or any object with its ticker, action and numeric fields.
+        :param entry_time: Time the position was opened, in nanoseconds.
+        :param exit_time: Time the position was closed, in nanoseconds.
+        """
+        if self.size == len(self.columns["ticker"]):
+            if self.size >= self.spill_rows:
+                self._spill()
+            else:
+                self._grow(min(2 * self.size, self.spill_rows))
+
+        code = self._ticker_codes.get(position.ticker)
+        if code is None:
+            code = self._ticker_codes[position.ticker] = len(self.tickers)
+            self.tickers.append(position.ticker)
+
+        row = self.size
+        columns = self.columns
+        columns["ticker"][row] = code
+        columns["action"][row] = BOT if position.action == "BOT" else SLD
+        columns["entry_time"][row] = entry_time
+        columns["exit_time"][row] = exit_time
+        for field in FIELDS:
+            columns[field][row] = getattr(position, field)
+        self.size += 1
+
+    def extend(
+            self, tickers: List[str], actions: np.ndarray, entry_times: np.ndarray, exit_times: np.ndarray,
+            fields: Dict[str, np.ndarray]
+    ) -> None:
+        """
+        Records several closed positions at once, e.g. the slots of a
+        PositionBook closed by one batch of fills.
+
+        :param tickers: The tickers of the positions.
+        :param actions: The opening actions as BOT (1) or SLD (-1).
+        :param entry_times: Times the positions were opened, in nanoseconds.
+        :param exit_times: Times the positions were closed, in nanoseconds.
+        :param fields: Field name -> values for every name in FIELDS.
+        """
+        codes = np.empty(len(tickers), dtype=np.int32)
+        for i, ticker in enumerate(tickers):
+            code = self._ticker_codes.get(ticker)
+            if code is None:
+                code = self._ticker_codes[ticker] = len(self.tickers)
+                self.tickers.append(ticker)
+            codes[i] = code
+        self._extend_columns(dict(fields, ticker=codes, action=actions, entry_time=entry_times, exit_time=exit_times))
+
+    def _extend_columns(self, values: Dict[str, np.ndarray]) -> None:
+        """
+        Appends rows given as column name -> values, spilling as the
+        buffer fills up.
+        """
+        codes = values["ticker"]
+        start = 0
+        while start < len(codes):
+            if self.size == len(self.columns["ticker"]):
+                if self.size >= self.spill_rows:
+                    self._spill()
+                else:
+                    self._grow(min(max(2 * self.size, self.size + len(codes) - start), self.spill_rows))
+            stop = min(len(codes), start + len(self.columns["ticker"]) - self.size)
+            rows = slice(self.size, self.size + stop - start)
+            for name, column in self.columns.items():
+                column[rows] = values[name][start:stop]
+            self.size += stop - start
+            start = stop
+
+    def _grow(self, capacity: int) -> None:
+        grown = self._empty_columns(capacity)
+        for name, values in self.columns.items():
+            grown[name][:self.size] = values[:self.size]
+        self.columns = grown
+
+    def _spill(self) -> None:
+        """
+        Writes the buffered trades to disk and empties the buffer.
+        """
+        if self.spill_dir is None:
+            self._tmp_dir = tempfile.TemporaryDirectory(prefix="trades-")
+            self.spill_dir = self._tmp_dir.name
+        os.makedirs(self.spill_dir, exist_ok=True)
+        path = os.path.join(self.spill_dir, f"trades-{len(self.spill_files):05d}.npz")
+        np.savez(path, **{name: values[:self.size] for name, values in self.columns.items()})
+        self.spill_files.append(path)
+        self.spilled += self.size
+        self.size = 0
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """
+        Returns all trades, spilled and buffered, as a dict of column
+        name -> array in the order they were closed.
+        """
+        parts = []
+        for path in self.spill_files:
+            with np.load(path) as spilled:
+                parts.append({name: spilled[name] for name in spilled.files})
+        parts.append({name: values[:self.size] for name, values in self.columns.items()})
+        return {name: np.concatenate([part[name] for part in parts]) for name in self.columns}
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Returns all trades and the ticker list, for a session snapshot.
+        """
+        return {"tickers": list(self.tickers), "columns": self.to_arrays()}
+
+    def set_state(self, state: Dict[str, Any]) -> None:
+        """
+        Replaces the trades of the journal by those saved by get_state.
+        """
+        self.spill_files = []
+        self.tickers = list(state["tickers"])
+        self._ticker_codes = {ticker: code for code, ticker in enumerate(self.tickers)}
+        self.columns = self._empty_columns(min(self.spill_rows, 1024))
+        self.size = 0
+        self.spilled = 0
+        self._extend_columns(state["columns"])
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Returns the trades as a DataFrame with one row per closed
+        position, the price fields rounded for display and the
+        percentage return of the trade as trade_pct.
+        """
+        arrays = self.to_arrays()
+        df = pd.DataFrame({
+            "ticker": np.asarray(self.tickers, dtype=object)[arrays["ticker"]] if self.tickers else np.empty(0, dtype=object),
+            "action": np.where(arrays["action"] == BOT, "BOT", "SLD"),
+            "entry_time": arrays["entry_time"].view("datetime64[ns]"),
+            "exit_time": arrays["exit_time"].view("datetime64[ns]"),
+        })
+        for field in FIELDS:
+            values = arrays[field]
+            df[field] = np.round(values, 2) if field in DISPLAY_FIELDS else values
+        with np.errstate(invalid="ignore", divide="ignore"):
+            df["trade_pct"] = df["avg_sld"].to_numpy() / df["avg_bot"].to_numpy() - 1.0
+        return df
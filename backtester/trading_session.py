@@ -1,13 +1,19 @@
-import queue
 from queue import Queue
 
-from typing import Optional
+from typing import Optional, Union
 from datetime import datetime
+import asyncio
 
-from backtester.event import EventType
+import pandas as pd
+
+from backtester.checkpoint import save_snapshot, load_snapshot
+from backtester.event import Event, EventType
+from backtester.event_bus import EventBus, QueueEventBus, AsyncEventBus
 from backtester.price_handler.base import PriceHandler
+from backtester.price_handler.live import AsyncPriceHandler
 from backtester.portfolio_handler import PortfolioHandler
 from backtester.execution_handler.base import ExecutionHandler
+from backtester.execution_handler.netting import OrderNetter
 from backtester.statistics.base import Statistics
 from backtester.strategy.base import Strategy
 
@@ -23,10 +29,11 @@ class TradingSession(object):
             price_handler: PriceHandler,
             execution_handler: ExecutionHandler,
             portfolio_handler: PortfolioHandler,
-            events_queue: Queue,
+            events_queue: Union[EventBus, Queue],
             statistics: Optional[Statistics] = None,
             live: Optional[bool] = False,
             end_session_time: Optional[datetime] = None,
+            net_orders: bool = False,
     ) -> None:
         """
         Set up the backtest variables according to
@@ -38,13 +45,19 @@ class TradingSession(object):
         :param price_handler: A price handler
         :param execution_handler: An execution handler
         :param portfolio_handler: A portfolio handler
-        :param events_queue: Queue of events.
+        :param events_queue: EventBus of events. A plain queue.Queue is wrapped in a QueueEventBus.
         :param statistics: Optional Statistics instance.
         :param live: Optional. None or True for backtesting, or False for live.
         :param end_session_time: Time of end session for live trading.
+        :param net_orders: Net the orders of each timestamp per ticker with an OrderNetter
+            before they are executed.
         """
         self.strategy = strategy
         self.events_queue = events_queue
+        if isinstance(events_queue, EventBus):
+            self.event_bus = events_queue
+        else:
+            self.event_bus = QueueEventBus(events_queue)
         self.price_handler = price_handler
         self.portfolio_handler = portfolio_handler
         self.execution_handler = execution_handler
@@ -52,11 +65,48 @@ class TradingSession(object):
         self.live = live
         self.cur_time = datetime(1900, 1, 1)
         self.end_session_time = end_session_time
+        self._check_end_session_time()
 
+        self.handlers = {
+            EventType.EOD: self._on_eod,
+            EventType.BAR: self._on_bar,
+            EventType.BARS: self._on_bars,
+            EventType.TICK: self._on_tick,
+            EventType.ORDER: self.execution_handler.execute_order,
+            EventType.FILL: self.portfolio_handler.on_fill,
+            EventType.ORDERS: self.execution_handler.execute_orders,
+            EventType.FILLS: self.portfolio_handler.on_fills,
+        }
+        self.order_netter = None
+        if net_orders:
+            self.order_netter = OrderNetter(self.execution_handler, self.portfolio_handler.portfolio)
+            self.handlers[EventType.ORDER] = self.order_netter.on_order
+            self.handlers[EventType.ORDERS] = self.order_netter.on_orders
+
+    def _check_end_session_time(self) -> None:
         if self.live:
             if self.end_session_time is None:
                 raise Exception("Must specify an end_session_time when live trading")
 
+    def _on_eod(self, event: Event) -> None:
+        self.cur_time = event.time
+        self.strategy.on_eod(event=event)
+        self.portfolio_handler.update_portfolio_value()
+        if self.statistics is not None:
+            self.statistics.update(event.time)
+
+    def _on_bar(self, event: Event) -> None:
+        self.cur_time = event.time
+        self.strategy.on_bar(event)
+
+    def _on_bars(self, event: Event) -> None:
+        self.cur_time = event.time
+        self.strategy.on_bars(event)
+
+    def _on_tick(self, event: Event) -> None:
+        self.cur_time = event.time
+        self.strategy.on_tick(event)
+
     def _continue_loop_condition(self) -> bool:
         if not self.live:
             return self.price_handler.continue_backtest
@@ -74,30 +124,59 @@ class TradingSession(object):
         else:
             print(f"Running Realtime Session until {self.end_session_time}")
 
+        poll = self.event_bus.poll
+        handlers = self.handlers
+        netter = self.order_netter
         while self._continue_loop_condition():
-            try:
-                event = self.events_queue.get(False)
-            except queue.Empty:
-                self.price_handler.stream_next()
+            event = poll()
+            if event is None:
+                if netter is not None and netter.pending:
+                    # Every event of the timestamp is handled, execute its net orders
+                    netter.flush()
+                else:
+                    self.price_handler.stream_next()
             else:
-                if event is not None:
-                    if event.type == EventType.EOD:
-                        self.cur_time = event.time
-                        self.strategy.on_eod(event=event)
-                        self.portfolio_handler.update_portfolio_value()
-                        self.statistics.update(event.time)
-                    elif event.type == EventType.BAR:
-                        self.cur_time = event.time
-                        self.strategy.on_bar(event)
-                    elif event.type == EventType.TICK:
-                        self.cur_time = event.time
-                        self.strategy.on_tick(event)
-                    elif event.type == EventType.ORDER:
-                        self.execution_handler.execute_order(event)
-                    elif event.type == EventType.FILL:
-                        self.portfolio_handler.on_fill(event)
-                    else:
-                        raise NotImplemented(f"Unsupported event.type {event.type}")
+                handler = handlers.get(event.type)
+                if handler is None:
+                    raise NotImplementedError(f"Unsupported event.type {event.type}")
+                handler(event)
+
+    def save_checkpoint(self, filename: str) -> None:
+        """
+        Saves the state of the session to a snapshot file: the cursor
+        and latest prices of the price handler, the portfolio and its
+        trade journal, the statistics buffers and the state returned by
+        strategy.get_state.
+
+        Typically called after a backtest has run, to extend it later
+        with load_checkpoint instead of running it again from the start.
+        """
+        if len(self.event_bus) or (self.order_netter is not None and self.order_netter.pending):
+            raise RuntimeError("A checkpoint can only be saved when every event has been handled.")
+        state = {
+            "session": {"cur_time": pd.Timestamp(self.cur_time).value},
+            "price_handler": self.price_handler.get_state(),
+            "portfolio": self.portfolio_handler.portfolio.get_state(),
+            "strategy": self.strategy.get_state(),
+        }
+        if self.statistics is not None:
+            state["statistics"] = self.statistics.get_state()
+        save_snapshot(filename, state)
+
+    def load_checkpoint(self, filename: str) -> None:
+        """
+        Restores the state saved by save_checkpoint into a new session,
+        set up with the same tickers and the data extended past the
+        snapshot. Running the session then only processes the bars that
+        come after the snapshot.
+        """
+        state = load_snapshot(filename)
+        self.cur_time = pd.Timestamp(state["session"]["cur_time"])
+        self.price_handler.set_state(state["price_handler"])
+        self.portfolio_handler.portfolio.set_state(state["portfolio"])
+        self.strategy.set_state(state["strategy"])
+        if self.statistics is not None and "statistics" in state:
+            self.statistics.set_state(state["statistics"])
 
     def start_trading(self, testing: bool = False, filename: Optional[str] = None) -> Optional[dict]:
         """
@@ -111,5 +190,118 @@ class TradingSession(object):
             print(f"Sharpe Ratio: {results['sharpe']:0.2f}")
             print(f"Max Drawdown: {results['max_drawdown_pct'] * 100:0.2f}")
             if not testing:
-                self.statistics.plot_results(filename=filename)
+                self.statistics.plot_results(filename=filename, stats=results)
             return results
+
+
+class AsyncTradingSession(TradingSession):
+    """
+    Live trading session on asyncio.
+
+    Instead of polling the event queue and the clock in a loop, the
+    session awaits the next price from an AsyncPriceHandler, the next
+    event from an AsyncEventBus and a timer for end_session_time, so
+    it uses no CPU while the market is quiet and handles an event as
+    soon as it arrives.
+    """
+    def __init__(
+            self,
+            strategy: Strategy,
+            price_handler: AsyncPriceHandler,
+            execution_handler: ExecutionHandler,
+            portfolio_handler: PortfolioHandler,
+            events_queue: AsyncEventBus,
+            statistics: Optional[Statistics] = None,
+            end_session_time: Optional[datetime] = None,
+            net_orders: bool = False,
+    ) -> None:
+        """
+        :param strategy: A Strategy object that acts on events.
+        :param price_handler: An AsyncPriceHandler.
+        :param execution_handler: An execution handler
+        :param portfolio_handler: A portfolio handler
+        :param events_queue: The AsyncEventBus the components put their events on.
+        :param statistics: Optional Statistics instance.
+        :param end_session_time: Time of end session. None to run until the price stream ends.
+        :param net_orders: Net the orders put while handling a burst of events per ticker
+            with an OrderNetter before they are executed.
+        """
+        super().__init__(
+            strategy=strategy,
+            price_handler=price_handler,
+            execution_handler=execution_handler,
+            portfolio_handler=portfolio_handler,
+            events_queue=events_queue,
+            statistics=statistics,
+            live=True,
+            end_session_time=end_session_time,
+            net_orders=net_orders,
+        )
+
+    def _check_end_session_time(self) -> None:
+        # Without an end_session_time the session runs until the price stream ends
+        pass
+
+    async def _pump_prices(self) -> None:
+        """
+        Moves the events of the price stream onto the event bus.
+        """
+        put = self.event_bus.put
+        async for event in self.price_handler.stream():
+            put(event)
+
+    async def _dispatch_events(self) -> None:
+        """
+        Waits for events and directs each to its handler.
+        """
+        get = self.event_bus.get
+        task_done = self.event_bus.task_done
+        handlers = self.handlers
+        netter = self.order_netter
+        while True:
+            event = await get()
+            try:
+                handler = handlers.get(event.type)
+                if handler is None:
+                    raise NotImplementedError(f"Unsupported event.type {event.type}")
+                handler(event)
+                if netter is not None and netter.pending and not len(self.event_bus):
+                    netter.flush()
+            finally:
+                task_done()
+
+    async def _wait_until_end(self) -> None:
+        await asyncio.sleep(max(0.0, (self.end_session_time - datetime.now()).total_seconds()))
+
+    async def run_session(self) -> None:
+        """
+        Runs the session until end_session_time, or until the price
+        stream ends and every remaining event has been handled.
+        """
+        if self.end_session_time is not None:
+            print(f"Running Realtime Session until {self.end_session_time}")
+        else:
+            print("Running Realtime Session until the price stream ends")
+        self.event_bus.start()
+        pump = asyncio.ensure_future(self._pump_prices())
+        dispatch = asyncio.ensure_future(self._dispatch_events())
+        tasks = {pump, dispatch}
+        if self.end_session_time is not None:
+            tasks.add(asyncio.ensure_future(self._wait_until_end()))
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+            if pump.done() and not dispatch.done():
+                # Handle the orders and fills following the last prices
+                drained = asyncio.ensure_future(self.event_bus.join())
+                tasks.add(drained)
+                await asyncio.wait({drained, dispatch}, return_when=asyncio.FIRST_COMPLETED)
+            for task in (pump, dispatch):
+                if task.done() and not task.cancelled() and task.exception() is not None:
+                    raise task.exception()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _run_session(self) -> None:
+        asyncio.run(self.run_session())
@@ -0,0 +1,119 @@
+from typing import Callable
+
+import numpy as np
+import pandas as pd
+
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler
+from backtester.strategy.base import TargetWeightStrategy
+
+
+class VectorizedBacktest(object):
+    """
+    Backtests target-weight strategies without the event loop.
+
+    Mirrors the event-driven path of a strategy that rebalances in
+    on_eod: equity is marked at each day's close before that day's
+    orders are filled, fills happen at the same close, and commission
+    uses the formula of the execution handler.
+
+    Only the rebalance dates are visited in Python. Equity between two
+    rebalances is one matrix-vector product over the closing prices.
+    """
+    def __init__(
+            self,
+            prices: pd.DataFrame,
+            initial_cash: float,
+            calculate_commission: Callable = SimulatedStockExecutionHandler.calculate_commission,
+            fractional_shares: bool = False,
+    ) -> None:
+        """
+        :param prices: (dates x tickers) frame of closing prices.
+        :param initial_cash: The starting cash of the portfolio.
+        :param calculate_commission: Commission function taking arrays of quantities and fill prices.
+        :param fractional_shares: Trade fractional shares instead of truncating target quantities.
+        """
+        self.prices = prices
+        self.initial_cash = initial_cash
+        self.calculate_commission = calculate_commission
+        self.fractional_shares = fractional_shares
+
+    @classmethod
+    def from_price_handler(cls, price_handler: OHLCVPriceHandler, initial_cash: float, **kwargs) -> "VectorizedBacktest":
+        """
+        Builds the backtest from the data loaded by an OHLCVPriceHandler.
+        The index is shifted to the end-of-day timestamps used by the
+        event-driven session, so the equity series lines up with the
+        one recorded by TearsheetStatistics.
+        """
+        if price_handler.streaming:
+            raise ValueError("A streaming OHLCVPriceHandler does not keep the data needed for a vectorized backtest.")
+        prices = pd.DataFrame({name: df["close_price"] for name, df in price_handler.data.items()})
+        prices.index = prices.index.normalize() + pd.Timedelta(hours=23, minutes=59, seconds=59)
+        return cls(prices=prices, initial_cash=initial_cash, **kwargs)
+
+    def run_strategy(self, strategy: TargetWeightStrategy) -> dict:
+        return self.run(strategy.target_weights(self.prices))
+
+    def run(self, weights: pd.DataFrame) -> dict:
+        """
+        Runs the backtest for a (dates x tickers) frame of target weights.
+        Rows that are all NaN, or dates missing from the frame, keep the
+        current holdings. Within a rebalance row, NaN weights are zero.
+
+        Returns a dict with the equity, cash and commission series, the
+        held quantities per date and the number of fills.
+        """
+        prices = self.prices.to_numpy(dtype=np.float64)
+        weights = weights.reindex(index=self.prices.index, columns=self.prices.columns).to_numpy(dtype=np.float64)
+        n_dates, n_tickers = prices.shape
+
+        tradable = np.isfinite(prices) & (prices > 0)
+        marks = np.where(tradable, prices, 0.0)
+        rebalances = np.flatnonzero(~np.isnan(weights).all(axis=1))
+
+        equity = np.empty(n_dates)
+        cash = np.empty(n_dates)
+        commission = np.zeros(n_dates)
+        quantities = np.zeros((n_dates, n_tickers))
+
+        cur_cash = float(self.initial_cash)
+        cur_quantity = np.zeros(n_tickers)
+        num_fills = 0
+        start = 0
+        for t in rebalances:
+            equity[start:t + 1] = cur_cash + marks[start:t + 1] @ cur_quantity
+            cash[start:t] = cur_cash
+            quantities[start:t] = cur_quantity
+
+            target = np.zeros(n_tickers)
+            np.divide(np.nan_to_num(weights[t]) * equity[t], prices[t], out=target, where=tradable[t])
+            if not self.fractional_shares:
+                target = np.trunc(target)
+            target = np.where(tradable[t], target, cur_quantity)
+
+            delta = target - cur_quantity
+            traded = delta != 0
+            fill_quantity = np.abs(delta[traded])
+            fill_price = prices[t, traded]
+            commission[t] = np.sum(self.calculate_commission(fill_quantity, fill_price))
+            num_fills += int(traded.sum())
+
+            cur_cash -= float(delta[traded] @ fill_price) + commission[t]
+            cur_quantity = target
+            cash[t] = cur_cash
+            quantities[t] = cur_quantity
+            start = t + 1
+
+        equity[start:] = cur_cash + marks[start:] @ cur_quantity
+        cash[start:] = cur_cash
+        quantities[start:] = cur_quantity
+
+        index = self.prices.index
+        return {
+            "equity": pd.Series(equity, index=index),
+            "cash": pd.Series(cash, index=index),
+            "commission": pd.Series(commission, index=index),
+            "positions": pd.DataFrame(quantities, index=index, columns=self.prices.columns),
+            "num_fills": num_fills,
+        }
@@ -0,0 +1,63 @@
+"""
+Benchmark of calendar return aggregation on a long minute-bar series.
+
+The previous implementation grouped by per-element lambdas and
+compounded every group through a Python function. It is compared
+against aggregate_returns_all, which aggregates weekly, monthly,
+quarterly and yearly returns in one pass. The results are checked
+against each other.
+
+Usage:
+    python benchmarks/bench_aggregate_returns.py [n_years]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtester.statistics.performance import aggregate_returns_all
+
+
+def legacy_aggregate_returns(returns, convert_to):
+    def cumulate_returns(x):
+        return np.exp(np.log(1 + x).cumsum()).iloc[-1] - 1
+
+    if convert_to == 'weekly':
+        return returns.groupby(
+            [lambda x: x.year,
+             lambda x: x.month,
+             lambda x: x.isocalendar()[1]]).apply(cumulate_returns)
+    elif convert_to == 'monthly':
+        return returns.groupby(
+            [lambda x: x.year, lambda x: x.month]).apply(cumulate_returns)
+    elif convert_to == 'yearly':
+        return returns.groupby(
+            [lambda x: x.year]).apply(cumulate_returns)
+
+
+def main(n_years: int = 20) -> None:
+    index = pd.date_range("2000-01-03 09:30", periods=n_years * 252 * 390, freq="min")
+    rng = np.random.default_rng(0)
+    returns = pd.Series(rng.normal(0.0, 0.0005, len(index)), index=index)
+    periods = ("weekly", "monthly", "yearly")
+
+    start = time.perf_counter()
+    legacy = {period: legacy_aggregate_returns(returns, period) for period in periods}
+    legacy_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    aggregated = aggregate_returns_all(returns, periods=periods)
+    new_s = time.perf_counter() - start
+
+    for period in periods:
+        assert list(legacy[period].index) == list(aggregated[period].index), period
+        assert np.allclose(legacy[period].to_numpy(), aggregated[period].to_numpy(), atol=1e-9), period
+
+    print(f"{len(returns)} minute returns, {n_years} years")
+    print(f"lambda groupby:        {legacy_s:8.3f}s")
+    print(f"aggregate_returns_all: {new_s:8.3f}s  ({legacy_s / new_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
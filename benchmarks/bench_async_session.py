@@ -0,0 +1,127 @@
+"""
+Idle CPU and latency benchmark for the AsyncTradingSession.
+
+A fake feed thread publishes bursts of ticks to a FeedPriceHandler with
+quiet periods in between, as a quiet market would. The strategy buys
+every 100th tick, so orders and fills go through the session as well.
+The CPU time used by the process is compared with the wall time, and
+the delay from publishing a tick to the strategy receiving it is
+reported, for all ticks and for the first tick of a burst, which has to
+wake the session up. For comparison the polling loop of a live TradingSession is
+run for the same time without any events.
+
+Usage:
+    python benchmarks/bench_async_session.py [n_bursts] [burst_size] [gap_ms]
+"""
+import sys
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backtester.event import OrderEvent, TickEvent
+from backtester.event_bus import AsyncEventBus, QueueEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.base import PriceHandler
+from backtester.price_handler.live import FeedPriceHandler
+from backtester.strategy.base import Strategy
+from backtester.trading_session import AsyncTradingSession, TradingSession
+
+
+class LatencyStrategy(Strategy):
+    def __init__(self, events_queue, sent):
+        self.events_queue = events_queue
+        self.sent = sent
+        self.latencies = []
+
+    def on_bar(self, event):
+        pass
+
+    def on_tick(self, event):
+        self.latencies.append(time.perf_counter() - self.sent[len(self.latencies)])
+        if len(self.latencies) % 100 == 0:
+            self.events_queue.put(OrderEvent(event.ticker, "BOT", 1))
+
+    def on_eod(self, event):
+        pass
+
+
+def fake_feed(handler, sent, n_bursts, burst_size, gap):
+    rng = np.random.default_rng(0)
+    for _ in range(n_bursts):
+        time.sleep(gap)
+        for bid in (100.0 + rng.normal(0.0, 0.1, burst_size)).tolist():
+            sent.append(time.perf_counter())
+            handler.publish(TickEvent("ACME", pd.Timestamp.now(), bid, bid + 0.01))
+    handler.close()
+
+
+class IdlePriceHandler(PriceHandler):
+    def __init__(self):
+        self.tickers = {}
+        self.data = {}
+        self._add_ticker("ACME")
+
+    def istick(self):
+        return True
+
+    def isbar(self):
+        return False
+
+    def stream_next(self):
+        pass
+
+
+def run_async(n_bursts, burst_size, gap):
+    events = AsyncEventBus()
+    handler = FeedPriceHandler(["ACME"])
+    portfolio_handler = PortfolioHandler(1e6, events, handler)
+    sent = []
+    strategy = LatencyStrategy(events, sent)
+    session = AsyncTradingSession(
+        strategy, handler, SimulatedStockExecutionHandler(events, handler), portfolio_handler, events
+    )
+    feed = threading.Thread(target=fake_feed, args=(handler, sent, n_bursts, burst_size, gap))
+
+    wall, cpu = time.perf_counter(), time.process_time()
+    feed.start()
+    session._run_session()
+    feed.join()
+    wall, cpu = time.perf_counter() - wall, time.process_time() - cpu
+    return wall, cpu, strategy, portfolio_handler
+
+
+def run_polling(seconds):
+    events = QueueEventBus()
+    handler = IdlePriceHandler()
+    session = TradingSession(
+        LatencyStrategy(events, []), handler, SimulatedStockExecutionHandler(events, handler),
+        PortfolioHandler(1e6, events, handler), events, live=True,
+        end_session_time=datetime.now() + timedelta(seconds=seconds),
+    )
+    wall, cpu = time.perf_counter(), time.process_time()
+    session._run_session()
+    return time.perf_counter() - wall, time.process_time() - cpu
+
+
+def main(n_bursts: int = 20, burst_size: int = 500, gap_ms: int = 100) -> None:
+    wall, cpu, strategy, portfolio_handler = run_async(n_bursts, burst_size, gap_ms / 1000.0)
+    latencies = np.array(strategy.latencies) * 1e6
+    assert len(latencies) == n_bursts * burst_size
+    if n_bursts * burst_size >= 100:
+        assert portfolio_handler.portfolio.positions["ACME"].quantity == n_bursts * burst_size // 100
+
+    poll_wall, poll_cpu = run_polling(wall)
+    print(f"{len(latencies)} ticks in {n_bursts} bursts, {gap_ms} ms apart")
+    print(f"async session:   wall {wall:6.2f}s  cpu {cpu:6.2f}s  ({cpu / wall:6.1%} of a core)")
+    print(f"polling session: wall {poll_wall:6.2f}s  cpu {poll_cpu:6.2f}s  ({poll_cpu / poll_wall:6.1%} of a core, no events)")
+    wake_ups = latencies[::burst_size]
+    print(f"tick latency:    p50 {np.percentile(latencies, 50):8.1f}us  p99 {np.percentile(latencies, 99):8.1f}us")
+    print(f"wake-up latency: p50 {np.percentile(wake_ups, 50):8.1f}us  p99 {np.percentile(wake_ups, 99):8.1f}us")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
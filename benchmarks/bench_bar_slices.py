@@ -0,0 +1,92 @@
+"""
+Dispatch benchmark for per-timestamp bar slices.
+
+Runs a backtest over many tickers with a strategy that keeps a running
+sum of the closes it is given, once with one BarEvent per ticker and
+on_bar, and once in batch mode, where the price handler streams one
+BarSliceEvent per timestamp and the strategy adds the close array of
+the slice in on_bars. The sums and the last closes of the price handler
+are checked to be equal.
+
+Usage:
+    python benchmarks/bench_bar_slices.py [n_tickers] [n_years]
+"""
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtester.event_bus import DequeEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+from backtester.strategy.base import Strategy
+from backtester.trading_session import TradingSession
+
+
+class RandomReader(OHLCVDataFrameReader):
+    def __init__(self, start, end):
+        super().__init__()
+        self.index = pd.bdate_range(start, end)
+
+    def read_ohlcv(self, ticker_id, start, end):
+        rng = np.random.default_rng(ticker_id)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(self.index))))
+        return pd.DataFrame({"close": close}, index=self.index)
+
+
+class CloseSumStrategy(Strategy):
+    def __init__(self):
+        self.total = 0.0
+        self.bars = 0
+
+    def on_bar(self, event):
+        self.total += event.close_price
+        self.bars += 1
+
+    def on_bars(self, event):
+        self.total += event.close_price.sum()
+        self.bars += len(event)
+
+    def on_tick(self, event):
+        pass
+
+    def on_eod(self, event):
+        pass
+
+
+def run(reader, ids, names, start_date, end_date, batch):
+    events = DequeEventBus()
+    handler = OHLCVPriceHandler(ids, names, events, reader, start_date, end_date, batch=batch)
+    strategy = CloseSumStrategy()
+    session = TradingSession(
+        strategy, handler, SimulatedStockExecutionHandler(events, handler),
+        PortfolioHandler(1e6, events, handler), events
+    )
+    start = time.perf_counter()
+    session._run_session()
+    return time.perf_counter() - start, strategy, handler
+
+
+def main(n_tickers: int = 2000, n_years: int = 2) -> None:
+    start_date, end_date = datetime(2010, 1, 1), datetime(2009 + n_years, 12, 31)
+    reader = RandomReader(start_date, end_date)
+    ids = list(range(n_tickers))
+    names = [f"T{i}" for i in ids]
+
+    bar_s, bar_strategy, bar_handler = run(reader, ids, names, start_date, end_date, batch=False)
+    slice_s, slice_strategy, slice_handler = run(reader, ids, names, start_date, end_date, batch=True)
+
+    assert bar_strategy.bars == slice_strategy.bars
+    assert np.isclose(bar_strategy.total, slice_strategy.total)
+    assert np.array_equal(bar_handler.last_close, slice_handler.last_close, equal_nan=True)
+    assert np.array_equal(bar_handler.last_timestamp, slice_handler.last_timestamp)
+    print(f"{bar_strategy.bars} bars, {n_tickers} tickers, {n_years} years")
+    print(f"per-bar events: {bar_s:8.3f}s  ({bar_strategy.bars / bar_s / 1e6:6.2f}M bars/s)")
+    print(f"bar slices:     {slice_s:8.3f}s  ({slice_strategy.bars / slice_s / 1e6:6.2f}M bars/s, {bar_s / slice_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,128 @@
+"""
+Startup benchmark for the merged bar stream of the OHLCVPriceHandler.
+
+Compares the previous row-wise construction of all events (DataFrame.apply
+followed by a Python sort) with the columnar timeline that creates the
+events lazily. First checks that the streaming mode yields the same
+events as the in-memory path for several chunk sizes, on data with gaps
+and missing closes at chunk boundaries, for daily and weekly bars.
+
+Usage:
+    python benchmarks/bench_bar_stream.py [n_tickers] [n_years]
+"""
+import sys
+import time
+from datetime import datetime
+from queue import Queue
+
+import numpy as np
+import pandas as pd
+
+from backtester.event import BarEvent, EODEvent, EventType
+from backtester.event_bus import DequeEventBus
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+
+
+class RandomWalkReader(OHLCVDataFrameReader):
+    def read_ohlcv(self, ticker_id, start, end):
+        rng = np.random.default_rng(ticker_id)
+        index = pd.bdate_range(start, end)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(index))))
+        return pd.DataFrame({"close": close}, index=index)
+
+
+class GappyReader(OHLCVDataFrameReader):
+    """
+    Business-day bars with missing closes: a leading one, runs of one
+    and two in the middle and a trailing one.
+    """
+    def read_ohlcv(self, ticker_id, start, end):
+        index = pd.bdate_range(start, end)
+        close = np.arange(1.0, len(index) + 1.0) * (ticker_id + 1)
+        close[[0, 4, 9, 10, len(index) - 1]] = np.nan
+        volume = np.full(len(index), 1000.0)
+        return pd.DataFrame({"close": close, "volume": volume}, index=index)
+
+
+def collect_events(handler):
+    events = []
+    while handler.continue_backtest:
+        handler.stream_next()
+        while len(handler.events_queue):
+            event = handler.events_queue.poll()
+            if event.type == EventType.EOD:
+                events.append(("EOD", event.time))
+            else:
+                events.append((event.ticker, event.time, event.close_price, event.volume))
+    return events
+
+
+def check_streaming_parity(start, end, bar_period=None):
+    reader = GappyReader()
+    ticker_ids = [0, 1]
+    ticker_names = ["A", "B"]
+    expected = collect_events(
+        OHLCVPriceHandler(ticker_ids, ticker_names, DequeEventBus(), reader, start, end, bar_period=bar_period)
+    )
+    for chunk_size in (1, 2, 3, 5, 7, 1000):
+        actual = collect_events(OHLCVPriceHandler(
+            ticker_ids, ticker_names, DequeEventBus(), reader, start, end,
+            streaming=True, chunk_size=chunk_size, bar_period=bar_period,
+        ))
+        assert actual == expected, (
+            f"Streaming {bar_period or 'daily'} bars with chunks of {chunk_size} rows differs from the in-memory path"
+        )
+
+
+class LegacyOHLCVPriceHandler(OHLCVPriceHandler):
+    def _merge_sort_ticker_data(self):
+        df = pd.concat(self.data.values())
+        events = df.reset_index().apply(lambda x:
+                                        BarEvent(
+                                            ticker=x["ticker_name"],
+                                            time=x["index"],
+                                            period=86400,
+                                            open_price=x["close_price"],
+                                            high_price=x["close_price"],
+                                            low_price=x["close_price"],
+                                            close_price=x["close_price"],
+                                            volume=100000000000000
+                                        ),
+                                        axis=1).to_list()
+        events = events + df.index.unique().map(
+            lambda x: EODEvent(time=datetime(x.year, x.month, x.day, 23, 59, 59))).to_list()
+        return iter(sorted(events, key=lambda x: x.time, reverse=False))
+
+
+def time_startup(handler_cls, n_tickers, start, end):
+    ticker_ids = list(range(n_tickers))
+    ticker_names = [f"T{i}" for i in ticker_ids]
+    handler = handler_cls(ticker_ids, ticker_names, Queue(), RandomWalkReader(), start, end)
+
+    t0 = time.perf_counter()
+    stream = handler._merge_sort_ticker_data()
+    first = next(stream)
+    elapsed = time.perf_counter() - t0
+    return elapsed, first
+
+
+def main():
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+    start = datetime(2000, 1, 1)
+    end = datetime(2000 + n_years, 1, 1)
+
+    check_streaming_parity(datetime(2020, 1, 1), datetime(2020, 2, 1))
+    # Weekly bars span several chunks, which _resample_chunks has to join
+    check_streaming_parity(datetime(2020, 1, 1), datetime(2020, 4, 1), bar_period=7 * 86400)
+    legacy, _ = time_startup(LegacyOHLCVPriceHandler, n_tickers, start, end)
+    columnar, _ = time_startup(OHLCVPriceHandler, n_tickers, start, end)
+
+    print(f"Tickers: {n_tickers}, years: {n_years}")
+    print(f"Row-wise apply + sort: {legacy:8.3f} s")
+    print(f"Columnar timeline:     {columnar:8.3f} s")
+    print(f"Speed-up:              {legacy / columnar:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+Benchmark of extending a backtest from a checkpoint.
+
+A strategy trades a universe of tickers over n years of daily bars. The
+nightly job of adding one more day is done twice: by running the whole
+history again, and by resuming the session from a snapshot saved by the
+previous night's run, which then only processes the new day. The time
+of both, the size of the snapshot and the time to save and load it are
+reported, and the equity curves and trade journals are checked to be
+equal.
+
+Usage:
+    python benchmarks/bench_checkpoint.py [n_tickers] [n_years]
+"""
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+from backtester.checkpoint import load_snapshot
+from backtester.event import OrderBatchEvent
+from backtester.event_bus import DequeEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+from backtester.statistics.tearsheet import TearsheetStatistics
+from backtester.strategy.base import Strategy
+from backtester.trading_session import TradingSession
+
+
+class RandomReader(OHLCVDataFrameReader):
+    def __init__(self, start, end):
+        super().__init__()
+        self.index = pd.bdate_range(start, end)
+
+    def read_ohlcv(self, ticker_id, start, end):
+        rng = np.random.default_rng(ticker_id)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(self.index))))
+        return pd.DataFrame({"close": close}, index=self.index)[start:end]
+
+
+class MomentumStrategy(Strategy):
+    """
+    Every week holds the tickers whose close rose over the last 20 days.
+    The close window is the state saved with the session.
+    """
+    def __init__(self, events_queue, tickers, window=20):
+        self.events_queue = events_queue
+        self.tickers = tickers
+        self.closes = np.full((window, len(tickers)), np.nan)
+        self.holdings = np.zeros(len(tickers))
+        self.days = 0
+
+    def on_bar(self, event):
+        pass
+
+    def on_bars(self, event):
+        self.closes[self.days % len(self.closes), event.indices] = event.close_price
+
+    def on_tick(self, event):
+        pass
+
+    def on_eod(self, event):
+        self.days += 1
+        if self.days % 5:
+            return
+        latest = self.closes[(self.days - 1) % len(self.closes)]
+        oldest = self.closes[self.days % len(self.closes)]
+        targets = np.where(latest > oldest, 10.0, 0.0)
+        trades = targets - self.holdings
+        self.holdings = targets
+        traded = np.flatnonzero(trades)
+        if len(traded):
+            self.events_queue.put(OrderBatchEvent(
+                [self.tickers[i] for i in traded.tolist()], np.where(trades[traded] > 0, "BOT", "SLD"),
+                np.abs(trades[traded])
+            ))
+
+    def get_state(self):
+        return {"closes": self.closes, "holdings": self.holdings, "days": self.days}
+
+    def set_state(self, state):
+        self.closes = state["closes"].copy()
+        self.holdings = state["holdings"].copy()
+        self.days = state["days"]
+
+
+def session(reader, ids, names, start_date, end_date):
+    events = DequeEventBus()
+    handler = OHLCVPriceHandler(ids, names, events, reader, start_date, end_date, batch=True)
+    portfolio_handler = PortfolioHandler(1e6, events, handler, position_book=True)
+    statistics = TearsheetStatistics(portfolio_handler, periods=252)
+    return TradingSession(
+        MomentumStrategy(events, names), handler, SimulatedStockExecutionHandler(events, handler),
+        portfolio_handler, events, statistics=statistics
+    )
+
+
+def main(n_tickers: int = 100, n_years: int = 15) -> None:
+    start_date = datetime(2000, 1, 1)
+    last_night = datetime(1999 + n_years, 12, 30)
+    tonight = last_night + timedelta(days=1)
+    reader = RandomReader(start_date, tonight)
+    ids = list(range(n_tickers))
+    names = [f"T{i}" for i in ids]
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "session.npz")
+        previous = session(reader, ids, names, start_date, last_night)
+        previous._run_session()
+        start = time.perf_counter()
+        previous.save_checkpoint(filename)
+        save_s = time.perf_counter() - start
+        start = time.perf_counter()
+        load_snapshot(filename)
+        load_s = time.perf_counter() - start
+        size = os.path.getsize(filename)
+
+        start = time.perf_counter()
+        full = session(reader, ids, names, start_date, tonight)
+        full._run_session()
+        full_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        resumed = session(reader, ids, names, start_date, tonight)
+        resumed.load_checkpoint(filename)
+        resumed._run_session()
+        resume_s = time.perf_counter() - start
+
+    full_equity = full.statistics.equity.to_series()
+    resumed_equity = resumed.statistics.equity.to_series()
+    assert full_equity.index.equals(resumed_equity.index)
+    assert np.array_equal(full_equity.to_numpy(), resumed_equity.to_numpy())
+    assert full.portfolio_handler.portfolio.trade_journal.to_frame().equals(
+        resumed.portfolio_handler.portfolio.trade_journal.to_frame()
+    )
+    print(f"{n_tickers} tickers, {n_years} years, {len(full_equity)} days, "
+          f"{len(full.portfolio_handler.portfolio.trade_journal)} trades")
+    print(f"snapshot: {size / 1e6:6.2f} MB  save {save_s * 1e3:7.1f} ms  load {load_s * 1e3:7.1f} ms")
+    print(f"full re-run:     {full_s:8.3f}s")
+    print(f"resume + 1 day:  {resume_s:8.3f}s  ({full_s / resume_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,107 @@
+"""
+Throughput benchmark for the TradingSession event loop.
+
+Runs the same bar-only backtest through the previous loop (queue.Queue
+polled with get(False) and an if/elif chain over EventType) and the
+current loop (DequeEventBus and the dispatch table), and reports events
+per second for both.
+
+Usage:
+    python benchmarks/bench_event_loop.py [n_tickers] [n_years]
+"""
+import queue
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtester.event import EventType
+from backtester.event_bus import DequeEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+from backtester.strategy.base import Strategy
+from backtester.trading_session import TradingSession
+
+
+class RandomWalkReader(OHLCVDataFrameReader):
+    def read_ohlcv(self, ticker_id, start, end):
+        rng = np.random.default_rng(ticker_id)
+        index = pd.bdate_range(start, end)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(index))))
+        return pd.DataFrame({"close": close}, index=index)
+
+
+class CountingStrategy(Strategy):
+    def __init__(self):
+        self.events = 0
+
+    def on_bar(self, event):
+        self.events += 1
+
+    def on_tick(self, event):
+        self.events += 1
+
+    def on_eod(self, event):
+        self.events += 1
+
+
+class LegacyTradingSession(TradingSession):
+    def _run_session(self):
+        while self._continue_loop_condition():
+            try:
+                event = self.events_queue.get(False)
+            except queue.Empty:
+                self.price_handler.stream_next()
+            else:
+                if event is not None:
+                    if event.type == EventType.EOD:
+                        self.cur_time = event.time
+                        self.strategy.on_eod(event=event)
+                        self.portfolio_handler.update_portfolio_value()
+                    elif event.type == EventType.BAR:
+                        self.cur_time = event.time
+                        self.strategy.on_bar(event)
+                    elif event.type == EventType.TICK:
+                        self.cur_time = event.time
+                        self.strategy.on_tick(event)
+                    elif event.type == EventType.ORDER:
+                        self.execution_handler.execute_order(event)
+                    elif event.type == EventType.FILL:
+                        self.portfolio_handler.on_fill(event)
+
+
+def events_per_second(session_cls, events_queue, n_tickers, start, end):
+    ticker_ids = list(range(n_tickers))
+    ticker_names = [f"T{i}" for i in ticker_ids]
+    price_handler = OHLCVPriceHandler(ticker_ids, ticker_names, events_queue, RandomWalkReader(), start, end)
+    portfolio_handler = PortfolioHandler(100000.0, events_queue, price_handler)
+    execution_handler = SimulatedStockExecutionHandler(events_queue, price_handler)
+    strategy = CountingStrategy()
+    session = session_cls(strategy, price_handler, execution_handler, portfolio_handler, events_queue)
+
+    t0 = time.perf_counter()
+    session._run_session()
+    elapsed = time.perf_counter() - t0
+    return strategy.events / elapsed
+
+
+def main():
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    start = datetime(2000, 1, 1)
+    end = datetime(2000 + n_years, 1, 1)
+
+    legacy = events_per_second(LegacyTradingSession, queue.Queue(), n_tickers, start, end)
+    current = events_per_second(TradingSession, DequeEventBus(), n_tickers, start, end)
+
+    print(f"Tickers: {n_tickers}, years: {n_years}")
+    print(f"queue.Queue + if/elif:       {legacy:12,.0f} events/s")
+    print(f"DequeEventBus + dispatch:    {current:12,.0f} events/s")
+    print(f"Speed-up:                    {current / legacy:12.2f}x")
+
+
+if __name__ == "__main__":
+    main()
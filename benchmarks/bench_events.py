@@ -0,0 +1,74 @@
+"""
+Microbenchmark for event construction.
+
+Reports the construction time and the memory allocated per BarEvent for
+the previous __dict__-based layout and the current slotted layout.
+
+Usage:
+    python benchmarks/bench_events.py [n_events]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from backtester.event import BarEvent, EventType
+
+
+class LegacyBarEvent(object):
+    def __init__(self, ticker, time, period, open_price, high_price, low_price, close_price, volume):
+        self.type = EventType.BAR
+        self.ticker = ticker
+        self.time = time
+        self.period = period
+        self.open_price = open_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.close_price = close_price
+        self.volume = volume
+        self.period_readable = self._readable_period()
+
+    def _readable_period(self):
+        lut = {
+            1: "1sec", 5: "5sec", 10: "10sec", 15: "15sec", 30: "30sec",
+            60: "1min", 300: "5min", 600: "10min", 900: "15min", 1800: "30min",
+            3600: "1hr", 86400: "1day", 604800: "1wk"
+        }
+        if self.period in lut:
+            return lut[self.period]
+        else:
+            return "%ssec" % str(self.period)
+
+
+def build(cls, n, now):
+    return [cls("GOOG", now, 86400, 1.0, 2.0, 0.5, 1.5, 1000.0) for _ in range(n)]
+
+
+def measure(cls, n):
+    now = datetime(2020, 1, 1)
+
+    t0 = time.perf_counter()
+    build(cls, n, now)
+    elapsed = time.perf_counter() - t0
+
+    tracemalloc.start()
+    events = build(cls, n, now)
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del events
+    return elapsed / n, allocated / n
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    legacy_time, legacy_bytes = measure(LegacyBarEvent, n)
+    slotted_time, slotted_bytes = measure(BarEvent, n)
+
+    print(f"Events: {n}")
+    print(f"{'':16}{'ns/event':>12}{'bytes/event':>14}")
+    print(f"{'__dict__':16}{legacy_time * 1e9:12.1f}{legacy_bytes:14.1f}")
+    print(f"{'__slots__':16}{slotted_time * 1e9:12.1f}{slotted_bytes:14.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""
+Benchmark of batched order execution for cross-sectional rebalances.
+
+A strategy rebalances a basket of tickers to random target positions
+every n-th day, either by putting one OrderEvent per ticker on the
+queue or one OrderBatchEvent for the basket, which the execution
+handler fills as one FillBatchEvent. Both are run with the dict-based
+Portfolio and with the BookPortfolio. The time spent in the order and
+fill handlers is reported, and cash, equity, realised PnL and the
+number of closed trades are checked to be equal.
+
+Usage:
+    python benchmarks/bench_order_batch.py [n_tickers] [n_years] [rebalance_days]
+"""
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtester.event import EventType, OrderEvent, OrderBatchEvent
+from backtester.event_bus import DequeEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+from backtester.strategy.base import Strategy
+from backtester.trading_session import TradingSession
+
+
+class RandomReader(OHLCVDataFrameReader):
+    def __init__(self, start, end):
+        super().__init__()
+        self.index = pd.bdate_range(start, end)
+
+    def read_ohlcv(self, ticker_id, start, end):
+        rng = np.random.default_rng(ticker_id)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(self.index))))
+        return pd.DataFrame({"close": close}, index=self.index)
+
+
+class RebalanceStrategy(Strategy):
+    def __init__(self, events_queue, tickers, rebalance_days, batch):
+        self.events_queue = events_queue
+        self.tickers = tickers
+        self.rebalance_days = rebalance_days
+        self.batch = batch
+        self.holdings = np.zeros(len(tickers))
+        self.days = 0
+        self.rng = np.random.default_rng(0)
+
+    def on_bar(self, event):
+        pass
+
+    def on_tick(self, event):
+        pass
+
+    def on_eod(self, event):
+        self.days += 1
+        if self.days % self.rebalance_days:
+            return
+        # Close about a third of the positions and resize the others
+        targets = self.rng.integers(-100, 101, len(self.tickers)).astype(np.float64)
+        targets[self.rng.random(len(self.tickers)) < 0.3] = 0.0
+        trades = targets - self.holdings
+        self.holdings = targets
+        traded = np.flatnonzero(trades)
+        tickers = [self.tickers[i] for i in traded.tolist()]
+        actions = np.where(trades[traded] > 0, "BOT", "SLD")
+        quantities = np.abs(trades[traded])
+        if self.batch:
+            self.events_queue.put(OrderBatchEvent(tickers, actions, quantities))
+        else:
+            for ticker, action, quantity in zip(tickers, actions.tolist(), quantities.tolist()):
+                self.events_queue.put(OrderEvent(ticker, action, quantity))
+
+
+def run(reader, ids, names, start_date, end_date, rebalance_days, batch, position_book):
+    events = DequeEventBus()
+    handler = OHLCVPriceHandler(ids, names, events, reader, start_date, end_date, batch=True)
+    portfolio_handler = PortfolioHandler(1e7, events, handler, position_book=position_book)
+    session = TradingSession(
+        RebalanceStrategy(events, names, rebalance_days, batch), handler,
+        SimulatedStockExecutionHandler(events, handler), portfolio_handler, events
+    )
+    timed = {}
+    for event_type in (EventType.ORDER, EventType.FILL, EventType.ORDERS, EventType.FILLS):
+        def timed_handler(event, _handler=session.handlers[event_type]):
+            start = time.perf_counter()
+            _handler(event)
+            timed["s"] = timed.get("s", 0.0) + time.perf_counter() - start
+        session.handlers[event_type] = timed_handler
+    session._run_session()
+    portfolio_handler.update_portfolio_value()
+    return timed.get("s", 0.0), portfolio_handler.portfolio
+
+
+def main(n_tickers: int = 500, n_years: int = 2, rebalance_days: int = 5) -> None:
+    start_date, end_date = datetime(2010, 1, 1), datetime(2009 + n_years, 12, 31)
+    reader = RandomReader(start_date, end_date)
+    ids = list(range(n_tickers))
+    names = [f"T{i}" for i in ids]
+
+    print(f"{n_tickers} tickers, {n_years} years, rebalanced every {rebalance_days} days")
+    for position_book in (False, True):
+        order_s, order_portfolio = run(
+            reader, ids, names, start_date, end_date, rebalance_days, batch=False, position_book=position_book
+        )
+        batch_s, batch_portfolio = run(
+            reader, ids, names, start_date, end_date, rebalance_days, batch=True, position_book=position_book
+        )
+        for attribute in ("cur_cash", "equity", "realised_pnl", "unrealised_pnl"):
+            assert np.isclose(getattr(order_portfolio, attribute), getattr(batch_portfolio, attribute)), attribute
+        assert len(order_portfolio.trade_journal) == len(batch_portfolio.trade_journal)
+
+        name = "BookPortfolio" if position_book else "Portfolio"
+        print(f"{name:>13}: per-order {order_s:8.3f}s  batch {batch_s:8.3f}s  ({order_s / batch_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
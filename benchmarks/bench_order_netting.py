@@ -0,0 +1,136 @@
+"""
+Benchmark of the order netting stage for liquidate-and-reallocate
+strategies.
+
+Every n-th day a PortfolioOptimizationBaseClass strategy liquidates its
+portfolio and allocates it afresh to random long target quantities, with
+the same tickers largely held again, so most of its orders offset each
+other. The backtest is run with and without net_orders, with the
+dict-based Portfolio and with the BookPortfolio. The number of fills
+and the time spent in the order and fill handlers are reported, and
+the final positions and cash less commissions are checked to be equal.
+
+Usage:
+    python benchmarks/bench_order_netting.py [n_tickers] [n_years] [rebalance_days]
+"""
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtester.event import EventType, OrderEvent
+from backtester.event_bus import DequeEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+from backtester.strategy.base import PortfolioOptimizationBaseClass
+from backtester.trading_session import TradingSession
+
+
+class RandomReader(OHLCVDataFrameReader):
+    def __init__(self, start, end):
+        super().__init__()
+        self.index = pd.bdate_range(start, end)
+
+    def read_ohlcv(self, ticker_id, start, end):
+        rng = np.random.default_rng(ticker_id)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(self.index))))
+        return pd.DataFrame({"close": close}, index=self.index)
+
+
+class ReallocatingStrategy(PortfolioOptimizationBaseClass):
+    def __init__(self, portfolio_handler, events_queue, tickers, rebalance_days):
+        super().__init__(portfolio_handler, events_queue)
+        self.tickers = tickers
+        self.rebalance_days = rebalance_days
+        self.days = 0
+        self.rng = np.random.default_rng(0)
+
+    def optimize_portfolio(self, prices):
+        quantities = self.rng.integers(0, 101, len(self.tickers))
+        quantities[self.rng.random(len(self.tickers)) < 0.1] = 0
+        return {ticker: quantity for ticker, quantity in zip(self.tickers, quantities.tolist()) if quantity}
+
+    def on_bar(self, event):
+        pass
+
+    def on_tick(self, event):
+        pass
+
+    def on_eod(self, event):
+        self.days += 1
+        if self.days % self.rebalance_days:
+            return
+        self.liquidate_portfolio()
+        for ticker, quantity in self.optimize_portfolio(None).items():
+            self.events_queue.put(OrderEvent(ticker, "BOT" if quantity > 0 else "SLD", abs(quantity)))
+
+
+def run(reader, ids, names, start_date, end_date, rebalance_days, net_orders, position_book):
+    events = DequeEventBus()
+    handler = OHLCVPriceHandler(ids, names, events, reader, start_date, end_date, batch=True)
+    portfolio_handler = PortfolioHandler(1e7, events, handler, position_book=position_book)
+    session = TradingSession(
+        ReallocatingStrategy(portfolio_handler, events, names, rebalance_days), handler,
+        SimulatedStockExecutionHandler(events, handler), portfolio_handler, events, net_orders=net_orders
+    )
+    counts = {"s": 0.0, "fills": 0, "commission": 0.0}
+    for event_type in (EventType.ORDER, EventType.FILL, EventType.ORDERS, EventType.FILLS):
+        def timed_handler(event, _handler=session.handlers[event_type], _type=event_type):
+            start = time.perf_counter()
+            _handler(event)
+            counts["s"] += time.perf_counter() - start
+            if _type == EventType.FILL:
+                counts["fills"] += 1
+                counts["commission"] += event.commission
+            elif _type == EventType.FILLS:
+                counts["fills"] += len(event)
+                counts["commission"] += float(np.sum(event.commissions))
+        session.handlers[event_type] = timed_handler
+    flush = session.order_netter.flush if net_orders else None
+    if flush is not None:
+        def timed_flush():
+            start = time.perf_counter()
+            flush()
+            counts["s"] += time.perf_counter() - start
+        session.order_netter.flush = timed_flush
+    session._run_session()
+    return counts, portfolio_handler.portfolio
+
+
+def main(n_tickers: int = 200, n_years: int = 2, rebalance_days: int = 5) -> None:
+    start_date, end_date = datetime(2010, 1, 1), datetime(2009 + n_years, 12, 31)
+    reader = RandomReader(start_date, end_date)
+    ids = list(range(n_tickers))
+    names = [f"T{i}" for i in ids]
+
+    print(f"{n_tickers} tickers, {n_years} years, reallocated every {rebalance_days} days")
+    for position_book in (False, True):
+        results = {}
+        for net_orders in (False, True):
+            counts, portfolio = run(
+                reader, ids, names, start_date, end_date, rebalance_days, net_orders, position_book
+            )
+            quantities = {ticker: position.quantity for ticker, position in portfolio.positions.items()}
+            results[net_orders] = counts, quantities, portfolio
+
+        (plain, plain_quantities, plain_portfolio), (netted, netted_quantities, netted_portfolio) = (
+            results[False], results[True]
+        )
+        # Netting changes what is paid in commission, not what is paid for the shares
+        assert plain_quantities == netted_quantities
+        assert np.isclose(
+            plain_portfolio.cur_cash + plain["commission"], netted_portfolio.cur_cash + netted["commission"]
+        )
+        name = "BookPortfolio" if position_book else "Portfolio"
+        print(
+            f"{name:>13}: fills {plain['fills']:7d} -> {netted['fills']:7d}  "
+            f"commission {plain['commission']:9.0f} -> {netted['commission']:9.0f}  "
+            f"time {plain['s']:7.3f}s -> {netted['s']:7.3f}s  ({plain['s'] / netted['s']:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,102 @@
+"""
+Benchmark of portfolio valuation on fills as the number of open
+positions grows.
+
+Every simulated day fills one random order per ticker: it opens a long
+or short position, adds to it, closes part of it or closes all of it.
+The previous behaviour, a full re-mark after every fill, is compared
+against the incremental update of the touched position only. The
+incremental equity is checked against a full recompute after every day.
+
+Usage:
+    python benchmarks/bench_portfolio_valuation.py [n_days]
+"""
+import sys
+import time
+
+import numpy as np
+
+from backtester.event import BarEvent
+from backtester.portfolio import Portfolio
+from backtester.price_handler.base import PriceHandler
+
+
+class StaticPriceHandler(PriceHandler):
+    def __init__(self, tickers):
+        for ticker in tickers:
+            self._add_ticker(ticker)
+        self.data = {}
+
+    def istick(self):
+        return False
+
+    def isbar(self):
+        return True
+
+    def stream_next(self):
+        pass
+
+    def set_close(self, ticker, close, time):
+        self._store_event(BarEvent(ticker, time, 86400, close, close, close, close, 0))
+
+
+class FullRecomputePortfolio(Portfolio):
+    def _update_position_value(self, position, old_value, old_unrealised_pnl):
+        self.update_portfolio()
+
+
+def random_fill(position, rng):
+    """
+    Returns the (action, quantity) of a random fill for a ticker with
+    the given open position, None when the ticker is flat.
+    """
+    if position is None:
+        return ("BOT" if rng.random() < 0.5 else "SLD"), int(rng.integers(2, 21))
+    held = abs(position.net)
+    close = "SLD" if position.action == "BOT" else "BOT"
+    kind = rng.integers(3)
+    if kind == 0:
+        return position.action, int(rng.integers(1, 11))
+    if kind == 1 and held > 1:
+        return close, held // 2
+    return close, held
+
+
+def run(portfolio_cls, n_positions, n_days):
+    tickers = [f"T{i}" for i in range(n_positions)]
+    price_handler = StaticPriceHandler(tickers)
+    portfolio = portfolio_cls(price_handler=price_handler, cash=1e9)
+    rng = np.random.default_rng(0)
+
+    elapsed = 0.0
+    max_error = 0.0
+    for day in range(n_days):
+        closes = 100.0 + rng.normal(0.0, 1.0, n_positions)
+        for ticker, close in zip(tickers, closes.tolist()):
+            price_handler.set_close(ticker, close, day)
+        fills = [random_fill(portfolio.positions.get(ticker), rng) for ticker in tickers]
+        t0 = time.perf_counter()
+        for ticker, close, (action, quantity) in zip(tickers, closes.tolist(), fills):
+            portfolio.transact_position(action, ticker, quantity, close, 1.0)
+        elapsed += time.perf_counter() - t0
+
+        # Every ticker had a fill, so the delta-maintained equity is fully marked
+        equity = portfolio.equity
+        portfolio.update_portfolio()
+        max_error = max(max_error, abs(portfolio.equity - equity) / abs(portfolio.equity))
+    assert len(portfolio.trade_journal), "No position was closed"
+    return elapsed, max_error
+
+
+def main():
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"{'positions':>10}{'full (s)':>12}{'incremental (s)':>18}{'speed-up':>10}{'rel. error':>12}")
+    for n_positions in (10, 100, 500, 1000):
+        full, _ = run(FullRecomputePortfolio, n_positions, n_days)
+        incremental, error = run(Portfolio, n_positions, n_days)
+        assert error <= 1e-12, f"Incremental equity is off by a fraction of {error} with {n_positions} positions"
+        print(f"{n_positions:>10}{full:12.3f}{incremental:18.3f}{full / incremental:10.1f}{error:12.2e}")
+
+
+if __name__ == "__main__":
+    main()
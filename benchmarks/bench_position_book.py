@@ -0,0 +1,149 @@
+"""
+Parity check and benchmark for the BookPortfolio.
+
+Applies the same random sequences of fills to a Portfolio and to a
+BookPortfolio: fills that open long and short positions, add to them,
+close part of them and close them fully. The BookPortfolio gets them
+either one at a time through transact_position or per day as one batch,
+with repeated tickers, through transact_positions. Equity, cash, PnL,
+every field of the open positions and the trade journal are asserted to
+agree after every day, and the time per fill is reported.
+
+Usage:
+    python benchmarks/bench_position_book.py [n_days]
+"""
+import sys
+import time
+
+import numpy as np
+
+from backtester.event import BarEvent
+from backtester.portfolio import Portfolio, BookPortfolio
+from backtester.position_book import FIELDS
+from backtester.price_handler.base import PriceHandler
+
+
+class StaticPriceHandler(PriceHandler):
+    def __init__(self, tickers):
+        for ticker in tickers:
+            self._add_ticker(ticker)
+        self.data = {}
+
+    def istick(self):
+        return False
+
+    def isbar(self):
+        return True
+
+    def stream_next(self):
+        pass
+
+    def set_close(self, ticker, close, time):
+        self._store_event(BarEvent(ticker, time, 86400, close, close, close, close, 0))
+
+
+def random_fill(position, rng):
+    """
+    Returns the (action, quantity) of a random fill for a ticker with
+    the given open position, None when the ticker is flat.
+    """
+    if position is None:
+        return ("BOT" if rng.random() < 0.5 else "SLD"), int(rng.integers(2, 21))
+    held = abs(position.net)
+    close = "SLD" if position.action == "BOT" else "BOT"
+    kind = rng.integers(3)
+    if kind == 0:
+        return position.action, int(rng.integers(1, 11))
+    if kind == 1 and held > 1:
+        return close, held // 2
+    return close, held
+
+
+def assert_close(name, expected, actual):
+    assert np.allclose(expected, actual, rtol=1e-9, atol=1e-6), f"{name} differs: {expected} != {actual}"
+
+
+def check_parity(reference, book):
+    for name in ("equity", "cur_cash", "realised_pnl", "unrealised_pnl"):
+        assert_close(name, getattr(reference, name), getattr(book, name))
+    assert set(reference.positions) == set(book.positions), "Open positions differ"
+    assert reference.entry_times == book.entry_times, "Entry times differ"
+    for ticker, position in reference.positions.items():
+        view = book.positions[ticker]
+        assert position.action == view.action, f"Action of {ticker} differs"
+        for field in FIELDS:
+            assert_close(f"{ticker}.{field}", getattr(position, field), getattr(view, field))
+    assert len(reference.trade_journal) == len(book.trade_journal), "Number of closed trades differs"
+    # A batch records the trades it closes per ticker, so only the order within a ticker is kept
+    expected, actual = journal_by_ticker(reference.trade_journal), journal_by_ticker(book.trade_journal)
+    assert expected["ticker"] == actual["ticker"], "Tickers of the closed trades differ"
+    for name in ("action", "entry_time", "exit_time") + FIELDS:
+        assert_close(f"journal.{name}", expected[name], actual[name])
+
+
+def journal_by_ticker(journal):
+    arrays = journal.to_arrays()
+    tickers = [journal.tickers[code] for code in arrays["ticker"].tolist()]
+    order = sorted(range(len(tickers)), key=tickers.__getitem__)
+    arrays = {name: values[order] for name, values in arrays.items()}
+    arrays["ticker"] = [tickers[i] for i in order]
+    return arrays
+
+
+def run(n_tickers, n_days, fills_per_day, batch):
+    tickers = [f"T{i}" for i in range(n_tickers)]
+    price_handler = StaticPriceHandler(tickers)
+    reference = Portfolio(price_handler=price_handler, cash=1e9)
+    book = BookPortfolio(price_handler=price_handler, cash=1e9)
+    rng = np.random.default_rng(0)
+
+    reference_time = book_time = 0.0
+    n_fills = 0
+    for day in range(n_days):
+        closes = 100.0 + rng.normal(0.0, 1.0, n_tickers)
+        for ticker, close in zip(tickers, closes.tolist()):
+            price_handler.set_close(ticker, close, day)
+        # Tickers repeat within a day, so a batch holds several fills of a ticker
+        day_tickers = [tickers[i] for i in rng.integers(0, n_tickers, fills_per_day).tolist()]
+        fills = []
+        for ticker in day_tickers:
+            action, quantity = random_fill(reference.positions.get(ticker), rng)
+            price = float(closes[price_handler.get_ticker_index(ticker)])
+            t0 = time.perf_counter()
+            reference.transact_position(action, ticker, quantity, price, 1.0)
+            reference_time += time.perf_counter() - t0
+            fills.append((ticker, action, quantity, price))
+
+        t0 = time.perf_counter()
+        if batch:
+            book.transact_positions(
+                tickers=[fill[0] for fill in fills], actions=[fill[1] for fill in fills],
+                quantities=[fill[2] for fill in fills], prices=[fill[3] for fill in fills],
+                commissions=[1.0] * len(fills),
+            )
+        else:
+            for ticker, action, quantity, price in fills:
+                book.transact_position(action, ticker, quantity, price, 1.0)
+        book_time += time.perf_counter() - t0
+        n_fills += len(fills)
+
+        check_parity(reference, book)
+        reference.update_portfolio()
+        book.update_portfolio()
+        check_parity(reference, book)
+    assert len(reference.trade_journal), "No position was closed"
+    return reference_time / n_fills, book_time / n_fills
+
+
+def main():
+    n_days = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    print(f"{'tickers':>8}{'mode':>8}{'Portfolio (us/fill)':>22}{'BookPortfolio (us/fill)':>26}")
+    for n_tickers in (10, 100, 500):
+        for batch in (False, True):
+            reference, book = run(n_tickers, n_days, fills_per_day=2 * n_tickers, batch=batch)
+            mode = "batch" if batch else "single"
+            print(f"{n_tickers:>8}{mode:>8}{reference * 1e6:22.1f}{book * 1e6:26.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Benchmark of resampling minute bars to longer bars at load time.
+
+Compares resample_ohlcv, one reduceat pass over the sorted bars, with
+pandas' resample().agg() followed by dropping the empty bars, for
+5-minute, hourly, daily and Monday-to-Sunday weekly bars. The bar values are checked against
+each other.
+
+Usage:
+    python benchmarks/bench_resample.py [n_years]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtester.price_handler.pandas import resample_ohlcv
+
+AGGREGATIONS = {
+    "open_price": "first", "high_price": "max", "low_price": "min", "close_price": "last", "volume": "sum",
+}
+
+
+def minute_bars(n_years):
+    days = pd.bdate_range("2000-01-03", periods=n_years * 252)
+    minutes = pd.timedelta_range("9h30min", periods=390, freq="min").to_numpy()
+    index = pd.DatetimeIndex((days.to_numpy()[:, None] + minutes[None, :]).ravel())
+    rng = np.random.default_rng(0)
+    close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.0005, len(index))))
+    open_price = np.roll(close, 1)
+    return pd.DataFrame({
+        "open_price": open_price,
+        "high_price": np.maximum(open_price, close) + 0.01,
+        "low_price": np.minimum(open_price, close) - 0.01,
+        "close_price": close,
+        "volume": rng.integers(1, 1000, len(index)).astype(np.float64),
+    }, index=index)
+
+
+def main(n_years: int = 10) -> None:
+    bars = minute_bars(n_years)
+    print(f"{len(bars)} minute bars, {n_years} years")
+    print(f"{'period':>8}{'pandas (s)':>12}{'reduceat (s)':>14}{'speed-up':>10}")
+    for period, freq in ((300, "5min"), (3600, "1h"), (86400, "1D"), (7 * 86400, "W-SUN")):
+        start = time.perf_counter()
+        expected = bars.resample(freq).agg(AGGREGATIONS).dropna()
+        pandas_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        resampled = resample_ohlcv(bars, period=period)
+        reduceat_s = time.perf_counter() - start
+
+        assert np.allclose(expected.to_numpy(), resampled.to_numpy())
+        print(f"{freq:>8}{pandas_s:12.3f}{reduceat_s:14.3f}{pandas_s / reduceat_s:10.1f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,142 @@
+"""
+Benchmark of the results store against pickled result files.
+
+Builds the get_results() dicts of many runs from one real backtest over
+n years with the equity curve scaled per run, so every run has full
+size series and trade journals. They are saved once as one pickle file
+per run and once to a ResultsStore. Reported are the write time and
+disk size of both, the time to scan the Sharpe ratio of every run,
+which unpickles every file but reads only the store's index, and the
+time to open a single equity curve. The scanned metrics and the loaded
+series are checked to be equal.
+
+Usage:
+    python benchmarks/bench_results_store.py [n_runs] [n_years]
+"""
+import os
+import pickle
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtester.event import OrderBatchEvent
+from backtester.event_bus import DequeEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+from backtester.statistics.base import Statistics
+from backtester.statistics.results import ResultsStore
+from backtester.statistics.tearsheet import TearsheetStatistics
+from backtester.strategy.base import Strategy
+from backtester.trading_session import TradingSession
+
+
+class RandomReader(OHLCVDataFrameReader):
+    def __init__(self, start, end):
+        super().__init__()
+        self.index = pd.bdate_range(start, end)
+
+    def read_ohlcv(self, ticker_id, start, end):
+        rng = np.random.default_rng(ticker_id)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(self.index))))
+        return pd.DataFrame({"close": close}, index=self.index)
+
+
+class WeeklyStrategy(Strategy):
+    def __init__(self, events_queue, tickers):
+        self.events_queue = events_queue
+        self.tickers = tickers
+        self.days = 0
+
+    def on_bar(self, event):
+        pass
+
+    def on_tick(self, event):
+        pass
+
+    def on_eod(self, event):
+        self.days += 1
+        if self.days % 5 == 0:
+            action = "BOT" if self.days % 10 == 0 else "SLD"
+            self.events_queue.put(OrderBatchEvent(self.tickers, [action] * len(self.tickers), [10] * len(self.tickers)))
+
+
+def template_results(n_years):
+    start_date, end_date = datetime(2000, 1, 1), datetime(1999 + n_years, 12, 31)
+    names = [f"T{i}" for i in range(20)]
+    events = DequeEventBus()
+    handler = OHLCVPriceHandler(list(range(20)), names, events, RandomReader(start_date, end_date), start_date, end_date)
+    portfolio_handler = PortfolioHandler(1e6, events, handler)
+    statistics = TearsheetStatistics(portfolio_handler, periods=252)
+    TradingSession(
+        WeeklyStrategy(events, names), handler, SimulatedStockExecutionHandler(events, handler),
+        portfolio_handler, events, statistics=statistics
+    )._run_session()
+    return statistics.get_results()
+
+
+def run_results(template, i):
+    results = dict(template)
+    results["equity"] = template["equity"] * (1.0 + i / 1000.0)
+    results["sharpe"] = template["sharpe"] + i
+    return results
+
+
+def main(n_runs: int = 1000, n_years: int = 15) -> None:
+    template = template_results(n_years)
+    with tempfile.TemporaryDirectory() as directory:
+        pickle_dir = os.path.join(directory, "pickles")
+        os.makedirs(pickle_dir)
+        start = time.perf_counter()
+        for i in range(n_runs):
+            with open(os.path.join(pickle_dir, f"run-{i:05d}.pkl"), "wb") as fd:
+                pickle.dump(run_results(template, i), fd)
+        pickle_write_s = time.perf_counter() - start
+
+        store = ResultsStore(os.path.join(directory, "store"))
+        start = time.perf_counter()
+        for i in range(n_runs):
+            store.add(f"run-{i:05d}", run_results(template, i), params={"run": i})
+        store_write_s = time.perf_counter() - start
+
+        pickle_bytes = sum(os.path.getsize(os.path.join(pickle_dir, name)) for name in os.listdir(pickle_dir))
+        store_bytes = sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(store.root) for name in names
+        )
+
+        start = time.perf_counter()
+        pickle_sharpes = []
+        for i in range(n_runs):
+            pickle_sharpes.append(Statistics.load(os.path.join(pickle_dir, f"run-{i:05d}.pkl"))["sharpe"])
+        pickle_scan_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        store_sharpes = store.metrics()["sharpe"].to_numpy()
+        store_scan_s = time.perf_counter() - start
+
+        name = f"run-{n_runs // 2:05d}"
+        start = time.perf_counter()
+        pickle_equity = Statistics.load(os.path.join(pickle_dir, f"{name}.pkl"))["equity"]
+        pickle_open_s = time.perf_counter() - start
+        start = time.perf_counter()
+        store_equity = Statistics.load(os.path.join(store.root, name))["equity"]
+        store_open_s = time.perf_counter() - start
+
+        assert np.array_equal(pickle_sharpes, store_sharpes)
+        assert np.array_equal(pickle_equity.to_numpy(), store_equity.to_numpy())
+        assert pickle_equity.index.equals(store_equity.index)
+
+    print(f"{n_runs} runs, {len(template['equity'])} days, {len(template['positions'])} trades per run")
+    print(f"{'':>15}{'pickle':>12}{'store':>12}")
+    print(f"{'write (s)':>15}{pickle_write_s:12.3f}{store_write_s:12.3f}")
+    print(f"{'disk (MB)':>15}{pickle_bytes / 1e6:12.1f}{store_bytes / 1e6:12.1f}")
+    print(f"{'scan sharpe (s)':>15}{pickle_scan_s:12.3f}{store_scan_s:12.3f}  ({pickle_scan_s / store_scan_s:.0f}x)")
+    print(f"{'open equity (ms)':>15}{pickle_open_s * 1e3:12.2f}{store_open_s * 1e3:12.2f}")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,131 @@
+"""
+Parity check and benchmark for the ParameterSweep.
+
+Runs a breakout strategy that trades on the high and low of each bar
+over a parameter grid, once through the ParameterSweep and once as a
+serial TradingSession per parameter combination, asserts that both give
+the same equity curves and reports the speed-up.
+
+Usage:
+    python benchmarks/bench_sweep.py [n_tickers] [n_years] [n_params]
+"""
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtester.event import OrderEvent
+from backtester.event_bus import DequeEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+from backtester.statistics.tearsheet import TearsheetStatistics
+from backtester.strategy.base import Strategy
+from backtester.sweep import ParameterSweep, expand_grid
+from backtester.trading_session import TradingSession
+
+INITIAL_CASH = 1000000.0
+
+
+class RandomWalkOHLCVReader(OHLCVDataFrameReader):
+    """
+    Business-day OHLCV bars, each ticker starting on a different date
+    so the cleaned histories have different lengths.
+    """
+    def read_ohlcv(self, ticker_id, start, end):
+        rng = np.random.default_rng(ticker_id)
+        index = pd.bdate_range(start, end)[ticker_id * 5:]
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(index))))
+        spread = close * rng.uniform(0.0, 0.02, (2, len(index)))
+        return pd.DataFrame({
+            "Open": close * (1.0 + rng.normal(0.0, 0.005, len(index))),
+            "High": close + spread[0],
+            "Low": close - spread[1],
+            "Close": close,
+            "Volume": rng.integers(1000, 100000, len(index)),
+        }, index=index)
+
+
+class BreakoutStrategy(Strategy):
+    """
+    Buys when a bar closes within threshold of its range below the
+    high and sells when it closes within threshold above the low.
+    """
+    def __init__(self, threshold, portfolio_handler, events_queue):
+        self.threshold = threshold
+        self.portfolio = portfolio_handler.portfolio
+        self.events_queue = events_queue
+
+    def on_bar(self, event):
+        band = self.threshold * (event.high_price - event.low_price)
+        held = event.ticker in self.portfolio.positions
+        if not held and event.close_price >= event.high_price - band:
+            self.events_queue.put(OrderEvent(ticker=event.ticker, action="BOT", quantity=100))
+        elif held and event.close_price <= event.low_price + band:
+            self.events_queue.put(OrderEvent(ticker=event.ticker, action="SLD", quantity=100))
+
+    def on_tick(self, event):
+        pass
+
+    def on_eod(self, event):
+        pass
+
+
+def make_strategy(params, portfolio_handler, events_queue):
+    return BreakoutStrategy(params["threshold"], portfolio_handler, events_queue)
+
+
+def run_serial(params, ticker_ids, ticker_names, start, end):
+    events_queue = DequeEventBus()
+    price_handler = OHLCVPriceHandler(ticker_ids, ticker_names, events_queue, RandomWalkOHLCVReader(), start, end)
+    portfolio_handler = PortfolioHandler(INITIAL_CASH, events_queue, price_handler)
+    execution_handler = SimulatedStockExecutionHandler(events_queue, price_handler)
+    statistics = TearsheetStatistics(portfolio_handler)
+    strategy = make_strategy(params, portfolio_handler, events_queue)
+    session = TradingSession(
+        strategy, price_handler, execution_handler, portfolio_handler, events_queue, statistics=statistics
+    )
+    session._run_session()
+    return statistics.get_results()
+
+
+def main():
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    n_params = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    start = datetime(2000, 1, 1)
+    end = datetime(2000 + n_years, 1, 1)
+    ticker_ids = list(range(n_tickers))
+    ticker_names = [f"T{i}" for i in ticker_ids]
+    param_grid = {"threshold": np.linspace(0.05, 0.4, n_params).tolist()}
+
+    t0 = time.perf_counter()
+    serial = [run_serial(params, ticker_ids, ticker_names, start, end) for params in expand_grid(param_grid)]
+    serial_time = time.perf_counter() - t0
+
+    sweep = ParameterSweep(
+        make_strategy, param_grid, ticker_ids, ticker_names, RandomWalkOHLCVReader(),
+        start_date=start, end_date=end, initial_cash=INITIAL_CASH,
+    )
+    t0 = time.perf_counter()
+    swept = sweep.run()
+    sweep_time = time.perf_counter() - t0
+
+    max_diff = 0.0
+    for (params, results), expected in zip(swept, serial):
+        assert results["equity"].index.equals(expected["equity"].index), f"Equity dates differ for {params}"
+        diff = np.max(np.abs(results["equity"].to_numpy() - expected["equity"].to_numpy()))
+        assert diff <= 1e-6, f"Equity curves differ by up to {diff} for {params}"
+        max_diff = max(max_diff, diff)
+
+    print(f"Tickers: {n_tickers}, years: {n_years}, parameter sets: {len(swept)}")
+    print(f"Max equity difference: {max_diff:.6f}")
+    print(f"Serial sessions: {serial_time:8.3f} s")
+    print(f"ParameterSweep:  {sweep_time:8.3f} s")
+    print(f"Speed-up:        {serial_time / sweep_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
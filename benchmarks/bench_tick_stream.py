@@ -0,0 +1,105 @@
+"""
+Throughput benchmark for the MmapTickPriceHandler.
+
+Writes random ticks for one trading day to several binary tick files,
+then measures the block merge of the files alone and the full dispatch
+of TickEvents through stream_next. The dispatched ticks are checked to
+be in timestamp order and complete, and a handler resumed from the
+state of another is checked to stream only the ticks that follow it.
+
+Usage:
+    python benchmarks/bench_tick_stream.py [n_ticks] [n_files]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtester.event import EventType
+from backtester.event_bus import DequeEventBus
+from backtester.price_handler.tick import MmapTickPriceHandler, write_ticks
+
+
+def write_files(directory, n_ticks, n_files, n_tickers):
+    rng = np.random.default_rng(0)
+    open_ns = pd.Timestamp("2020-01-02 09:00").value
+    session_ns = int(8.5 * 3600 * 10 ** 9)
+    paths = []
+    for f in range(n_files):
+        n = n_ticks // n_files
+        times = np.sort(open_ns + rng.integers(0, session_ns, n))
+        bids = 100.0 + rng.normal(0.0, 1.0, n)
+        path = os.path.join(directory, f"ticks-{f}.bin")
+        write_ticks(path, times, rng.integers(0, n_tickers, n), bids, bids + 0.01)
+        paths.append(path)
+    return paths
+
+
+def collect_events(handler, limit=None):
+    events = []
+    while handler.continue_backtest and (limit is None or len(events) < limit):
+        handler.stream_next()
+        while len(handler.events_queue):
+            event = handler.events_queue.poll()
+            if event.type == EventType.TICK:
+                events.append((event.ticker, event.time, event.bid, event.ask))
+            else:
+                events.append(("EOD", event.time))
+    return events
+
+
+def check_resume(n_ticks=10000, n_files=3, n_tickers=10):
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(directory, n_ticks, n_files, n_tickers)
+        ids = list(range(n_tickers))
+        names = [f"T{i}" for i in ids]
+        expected = collect_events(MmapTickPriceHandler(ids, names, DequeEventBus(), paths))
+
+        previous = MmapTickPriceHandler(ids, names, DequeEventBus(), paths)
+        events = collect_events(previous, limit=len(expected) // 2)
+        resumed = MmapTickPriceHandler(ids, names, DequeEventBus(), paths)
+        resumed.set_state(previous.get_state())
+        events += collect_events(resumed)
+    assert events == expected, "Resuming from a snapshot replays or drops ticks"
+
+
+def main(n_ticks: int = 2000000, n_files: int = 4) -> None:
+    check_resume()
+    n_tickers = 100
+    with tempfile.TemporaryDirectory() as directory:
+        paths = write_files(directory, n_ticks, n_files, n_tickers)
+        ids = list(range(n_tickers))
+        names = [f"T{i}" for i in ids]
+
+        handler = MmapTickPriceHandler(ids, names, DequeEventBus(), paths)
+        start = time.perf_counter()
+        merged = sum(len(block) for block in handler._merge_files())
+        merge_s = time.perf_counter() - start
+
+        events = DequeEventBus()
+        handler = MmapTickPriceHandler(ids, names, events, paths)
+        last = None
+        ticks = 0
+        start = time.perf_counter()
+        while handler.continue_backtest:
+            handler.stream_next()
+            event = events.poll()
+            while event is not None:
+                if event.type == EventType.TICK:
+                    assert last is None or event.time >= last
+                    last = event.time
+                    ticks += 1
+                event = events.poll()
+        dispatch_s = time.perf_counter() - start
+
+    assert merged == ticks == n_ticks // n_files * n_files
+    print(f"{ticks} ticks in {n_files} files")
+    print(f"block merge: {merge_s:8.3f}s  ({merged / merge_s / 1e6:6.1f}M ticks/s)")
+    print(f"dispatch:    {dispatch_s:8.3f}s  ({ticks / dispatch_s / 1e6:6.2f}M ticks/s)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
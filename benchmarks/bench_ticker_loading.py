@@ -0,0 +1,65 @@
+"""
+Startup benchmark for subscribing many tickers to the OHLCVPriceHandler.
+
+The reader waits a fixed latency per call to stand in for a database or
+network round trip. The previous behaviour, subscribe_tickers called
+for one ticker after the other, is compared against the thread pool
+read and batched cleanup of subscribe_ticker_batch. The cleaned frames
+are checked against each other.
+
+Usage:
+    python benchmarks/bench_ticker_loading.py [n_tickers] [latency_ms] [max_workers]
+"""
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtester.event_bus import DequeEventBus
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+
+
+class SlowReader(OHLCVDataFrameReader):
+    def __init__(self, latency, start, end):
+        super().__init__()
+        self.latency = latency
+        self.index = pd.bdate_range(start, end)
+
+    def read_ohlcv(self, ticker_id, start, end):
+        time.sleep(self.latency)
+        if ticker_id % 100 == 99:
+            raise OSError(f"No data for {ticker_id}")
+        rng = np.random.default_rng(ticker_id)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(self.index))))
+        return pd.DataFrame({"close": close}, index=self.index)
+
+
+def main(n_tickers: int = 500, latency_ms: int = 20, max_workers: int = 32) -> None:
+    start_date, end_date = datetime(2010, 1, 1), datetime(2019, 12, 31)
+    reader = SlowReader(latency_ms / 1000.0, start_date, end_date)
+    ids = list(range(n_tickers))
+    names = [f"T{i}" for i in ids]
+
+    serial = OHLCVPriceHandler([], [], DequeEventBus(), reader, start_date, end_date)
+    start = time.perf_counter()
+    for ticker_id, ticker_name in zip(ids, names):
+        serial.subscribe_tickers(ticker_id=ticker_id, ticker_name=ticker_name)
+    serial_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = OHLCVPriceHandler([], [], DequeEventBus(), reader, start_date, end_date, max_workers=max_workers)
+    batch.subscribe_ticker_batch(ticker_ids=ids, ticker_names=names)
+    batch_s = time.perf_counter() - start
+
+    assert list(serial.data) == list(batch.data)
+    for name in serial.data:
+        assert np.allclose(serial.data[name]["close_price"], batch.data[name]["close_price"])
+    print(f"{n_tickers} tickers, {latency_ms} ms read latency, {max_workers} threads")
+    print(f"serial subscribe_tickers: {serial_s:8.3f}s")
+    print(f"subscribe_ticker_batch:   {batch_s:8.3f}s  ({serial_s / batch_s:.1f}x)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,64 @@
+"""
+Benchmark of building the closed-trade table of the tearsheet.
+
+The previous approach kept every closed Position object, built a
+DataFrame from their __dict__ and rounded fifteen columns with
+per-element apply calls. It is compared against recording the trades
+in a TradeJournal, with a small spill threshold so part of the trades
+is read back from disk, and converting it with to_frame. The trade
+returns of both tables are checked against each other.
+
+Usage:
+    python benchmarks/bench_trade_journal.py [n_trades]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from backtester.position import Position
+from backtester.price_parser import PriceParser
+from backtester.trade_journal import TradeJournal, DISPLAY_FIELDS
+
+
+def closed_positions(n_trades):
+    rng = np.random.default_rng(0)
+    prices = 100.0 + rng.normal(0.0, 5.0, (n_trades, 2))
+    for i, (entry, exit_) in enumerate(prices.tolist()):
+        position = Position("BOT", f"T{i % 500}", 10, entry, 1.0, entry, entry)
+        position.transact_shares("SLD", 10, exit_, 1.0)
+        position.update_market_value(exit_, exit_)
+        yield position
+
+
+def legacy_frame(positions):
+    df = pd.DataFrame([p.__dict__ for p in positions])
+    for field in DISPLAY_FIELDS:
+        df[field] = df[field].apply(PriceParser.display)
+    df['trade_pct'] = (df['avg_sld'] / df['avg_bot'] - 1.0)
+    return df
+
+
+def main(n_trades: int = 200000) -> None:
+    positions = list(closed_positions(n_trades))
+
+    start = time.perf_counter()
+    legacy = legacy_frame(positions)
+    legacy_s = time.perf_counter() - start
+
+    journal = TradeJournal(spill_rows=n_trades // 4)
+    for i, position in enumerate(positions):
+        journal.append(position, entry_time=i * 10 ** 9, exit_time=(i + 1) * 10 ** 9)
+    start = time.perf_counter()
+    frame = journal.to_frame()
+    journal_s = time.perf_counter() - start
+
+    assert np.allclose(legacy["trade_pct"].to_numpy(), frame["trade_pct"].to_numpy())
+    print(f"{n_trades} closed trades, {len(journal.spill_files)} spill files")
+    print(f"__dict__ + apply:      {legacy_s:8.3f}s")
+    print(f"TradeJournal.to_frame: {journal_s:8.3f}s  ({legacy_s / journal_s:.0f}x)")
+
+
+if __name__ == "__main__":
+    main(*[int(arg) for arg in sys.argv[1:]])
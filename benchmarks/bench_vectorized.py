@@ -0,0 +1,133 @@
+"""
+Parity check and benchmark for the VectorizedBacktest.
+
+Runs the same long-only target-weight strategy through the event-driven
+TradingSession and through the VectorizedBacktest, asserts that both
+equity curves agree and reports the speed-up.
+
+Usage:
+    python benchmarks/bench_vectorized.py [n_tickers] [n_years]
+"""
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from backtester.event import OrderEvent
+from backtester.event_bus import DequeEventBus
+from backtester.execution_handler.simulator import SimulatedStockExecutionHandler
+from backtester.portfolio_handler import PortfolioHandler
+from backtester.price_handler.pandas import OHLCVPriceHandler, OHLCVDataFrameReader
+from backtester.statistics.tearsheet import TearsheetStatistics
+from backtester.strategy.base import Strategy, TargetWeightStrategy
+from backtester.trading_session import TradingSession
+from backtester.vectorized import VectorizedBacktest
+
+INITIAL_CASH = 1000000.0
+
+
+class RandomWalkReader(OHLCVDataFrameReader):
+    def read_ohlcv(self, ticker_id, start, end):
+        rng = np.random.default_rng(ticker_id)
+        index = pd.bdate_range(start, end)
+        close = 100.0 * np.exp(np.cumsum(rng.normal(0.0, 0.01, len(index))))
+        return pd.DataFrame({"close": close}, index=index)
+
+
+class RotationStrategy(TargetWeightStrategy):
+    """
+    Every 21 days, holds the ticker with the best trailing return.
+    """
+    def target_weights(self, prices):
+        momentum = prices.pct_change(21)
+        best = momentum.to_numpy().argmax(axis=1)
+        weights = np.zeros(prices.shape)
+        weights[np.arange(len(prices)), best] = 0.95
+        weights = pd.DataFrame(weights, index=prices.index, columns=prices.columns)
+        rebalance = np.zeros(len(prices), dtype=bool)
+        rebalance[21::21] = True
+        return weights.where(np.broadcast_to(rebalance[:, None], weights.shape))
+
+
+class EventDrivenTargetWeights(Strategy):
+    """
+    Sends the orders that move the portfolio to the target weights at
+    each end-of-day event.
+    """
+    def __init__(self, weights, portfolio_handler, events_queue):
+        self.weights = weights
+        self.portfolio_handler = portfolio_handler
+        self.price_handler = portfolio_handler.price_handler
+        self.events_queue = events_queue
+
+    def on_bar(self, event):
+        pass
+
+    def on_tick(self, event):
+        pass
+
+    def on_eod(self, event):
+        if event.time not in self.weights.index:
+            return
+        weights = self.weights.loc[event.time]
+        if weights.isna().all():
+            return
+        portfolio = self.portfolio_handler.portfolio
+        equity = portfolio.cur_cash + sum(
+            p.quantity * self.price_handler.get_last_close(t) for t, p in portfolio.positions.items()
+        )
+        for ticker, weight in weights.fillna(0.0).items():
+            price = self.price_handler.get_last_close(ticker)
+            held = portfolio.positions[ticker].quantity if ticker in portfolio.positions else 0
+            delta = np.trunc(weight * equity / price) - held
+            if delta > 0:
+                self.events_queue.put(OrderEvent(ticker=ticker, action="BOT", quantity=delta))
+            elif delta < 0:
+                self.events_queue.put(OrderEvent(ticker=ticker, action="SLD", quantity=-delta))
+
+
+def main():
+    n_tickers = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    n_years = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    start = datetime(2000, 1, 1)
+    end = datetime(2000 + n_years, 1, 1)
+    ticker_ids = list(range(n_tickers))
+    ticker_names = [f"T{i}" for i in ticker_ids]
+
+    events_queue = DequeEventBus()
+    price_handler = OHLCVPriceHandler(ticker_ids, ticker_names, events_queue, RandomWalkReader(), start, end)
+
+    backtest = VectorizedBacktest.from_price_handler(price_handler, INITIAL_CASH)
+    t0 = time.perf_counter()
+    weights = RotationStrategy().target_weights(backtest.prices)
+    vectorized = backtest.run(weights)
+    vectorized_time = time.perf_counter() - t0
+
+    portfolio_handler = PortfolioHandler(INITIAL_CASH, events_queue, price_handler)
+    execution_handler = SimulatedStockExecutionHandler(events_queue, price_handler)
+    statistics = TearsheetStatistics(portfolio_handler)
+    strategy = EventDrivenTargetWeights(weights, portfolio_handler, events_queue)
+    session = TradingSession(
+        strategy, price_handler, execution_handler, portfolio_handler, events_queue, statistics=statistics
+    )
+    t0 = time.perf_counter()
+    session._run_session()
+    event_time = time.perf_counter() - t0
+
+    event_equity = statistics.equity.to_series()
+    vectorized_equity = vectorized["equity"]
+    assert event_equity.index.equals(vectorized_equity.index)
+    max_diff = np.max(np.abs(event_equity.to_numpy() - vectorized_equity.to_numpy()))
+    assert max_diff <= 1e-6, f"Equity curves differ by up to {max_diff}"
+
+    print(f"Tickers: {n_tickers}, years: {n_years}, fills: {vectorized['num_fills']}")
+    print(f"Max equity difference: {max_diff:.4f}")
+    print(f"Event-driven: {event_time:8.3f} s")
+    print(f"Vectorized:   {vectorized_time:8.3f} s")
+    print(f"Speed-up:     {event_time / vectorized_time:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()